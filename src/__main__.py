@@ -0,0 +1,188 @@
+# ============================
+# src/__main__.py
+# ============================
+"""
+Season-scale command line:
+
+    python -m src ingest   --season 2015-16 --workers 8 --memory-gb 32
+    python -m src label    --games 21500622 21500623
+    python -m src features --tracking-dir data/raw/json --out data/pipeline
+    python -m src maps
+    python -m src ist      --export data/processed
+
+Every command brings its stage (and everything upstream) up to date in
+the artifact store under --out, skipping fresh artifacts, and prints
+per-stage throughput. Games that fail are reported and skipped by their
+downstream stages; the command still finishes, writes its report and
+exits 1. --metrics run.json (or .csv) also records stage
+timers, shot match / drop-reason counters and per-game peak memory.
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.pipelines.runner import PipelineRunner
+from src.pipelines.season import season_stages
+from src.utils import instrumentation as inst
+
+COMMANDS = {
+    "ingest": ["index", "pbp"],
+    "label": ["label"],
+    "features": ["kinematics", "def_variables"],
+    "maps": ["maps"],
+    "ist": ["ist"],
+}
+
+GB = 1024 ** 3
+
+
+def discover_games(tracking_dir, games=None, limit=None):
+    """
+    game_id -> raw file for tracking files named by game id
+    (0021500622.json / .7z) under tracking_dir.
+    """
+    found = {}
+    for p in sorted(Path(tracking_dir).glob("*")):
+        if p.suffix in (".json", ".7z") and p.stem.isdigit():
+            found.setdefault(int(p.stem), p)
+    if games:
+        wanted = [int(g) for g in games]
+        missing = [g for g in wanted if g not in found]
+        if missing:
+            raise ValueError(f"no tracking file in {tracking_dir} for games {missing}")
+        found = {g: found[g] for g in wanted}
+    if limit:
+        found = dict(list(found.items())[:limit])
+    return found
+
+
+def plan_workers(workers, memory_gb, worker_memory_gb):
+    """Worker count and per-worker memory cap (bytes) fitting a memory budget."""
+    workers = workers or os.cpu_count() or 1
+    if memory_gb is None:
+        return workers, None
+    if memory_gb < worker_memory_gb:
+        raise ValueError(f"--memory-gb {memory_gb} is below one worker ({worker_memory_gb} GB)")
+    return max(1, min(workers, int(memory_gb // worker_memory_gb))), int(worker_memory_gb * GB)
+
+
+def ensure_shots_csv(path, season):
+    """Season shot chart CSV, fetched through the nba_api cache when missing."""
+    path = Path(path)
+    if not path.exists():
+        from src.data_sources.nba_api_shots import fetch_league_shots
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fetch_league_shots(season).to_csv(path, index=False)
+    return path
+
+
+def _throughput(name, rep, wall):
+    ran = rep[rep["status"] == "ran"]
+    counts = pd.DataFrame(list(ran["counts"])).sum() if len(ran) else pd.Series(dtype=float)
+    parts = [f"ran {len(ran)}", f"cached {int((rep['status'] == 'cached').sum())}",
+             f"failed {int((rep['status'] == 'failed').sum())}"]
+    skipped = int((rep["status"] == "skipped_upstream_failed").sum())
+    if skipped:
+        parts.append(f"skipped {skipped}")
+    parts.append(f"{wall:.1f}s")
+    if wall > 0 and len(ran):
+        if rep["game_id"].notna().any():
+            parts.append(f"{len(ran) / wall:.2f} games/s")
+        for unit, n in counts.items():
+            parts.append(f"{n / wall:,.0f} {unit}/s")
+    return f"[{name}] " + " | ".join(parts)
+
+
+def export(runner, command, out_dir):
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    if command == "features":
+        runner.load("def_variables").to_csv(out_dir / "def_variables.csv", index=False)
+    elif command == "maps":
+        np.savez_compressed(out_dir / "maps.npz", **runner.load("maps")["maps_npz"])
+    elif command == "ist":
+        runner.load("ist").to_csv(out_dir / "ist.csv", index=False)
+    else:
+        return None
+    return out_dir
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m src", description="NBA defensive DNA season pipeline")
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    parser.add_argument("--season", default="2015-16")
+    parser.add_argument("--games", nargs="+", help="game ids (default: every game in --tracking-dir)")
+    parser.add_argument("--limit", type=int, help="only the first N games")
+    parser.add_argument("--tracking-dir", default="data/raw/json")
+    parser.add_argument("--pbp", help="season PBP CSV (default data/raw/<season>_pbp.csv)")
+    parser.add_argument("--shots", help="season shot chart CSV (default data/raw/<season>_shots.csv)")
+    parser.add_argument("--out", default="data/pipeline", help="artifact store directory")
+    parser.add_argument("--export", help="also write the command's result (CSV / NPZ) here")
+    parser.add_argument("--workers", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument("--memory-gb", type=float, help="total memory budget for workers")
+    parser.add_argument("--worker-memory-gb", type=float, default=2.0,
+                        help="memory reserved (and capped) per worker under --memory-gb; "
+                             "a game over the cap fails alone")
+    parser.add_argument("--metrics", help="write run metrics (timers, counters, memory) to this .json / .csv")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="per-game peak memory via tracemalloc (slower) instead of process peak RSS")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    games = discover_games(args.tracking_dir, args.games, args.limit)
+    if not games:
+        print(f"no tracking files named by game id in {args.tracking_dir}", file=sys.stderr)
+        return 2
+    workers, worker_memory = plan_workers(args.workers, args.memory_gb, args.worker_memory_gb)
+
+    pbp = args.pbp or f"data/raw/{args.season}_pbp.csv"
+    shots = args.shots or f"data/raw/{args.season}_shots.csv"
+    if args.metrics and Path(args.metrics).suffix not in (".json", ".csv"):
+        raise ValueError(f"--metrics must end in .json or .csv, got {args.metrics}")
+    metrics = inst.Metrics(f"{args.command}_{args.season}", trace_memory=args.trace_memory) \
+        if args.metrics else None
+    runner = PipelineRunner(season_stages(pbp, shots), games, root=args.out,
+                            workers=workers, worker_memory=worker_memory, metrics=metrics)
+    plan = runner.plan(COMMANDS[args.command])
+    if "xfg" in plan:
+        ensure_shots_csv(shots, args.season)
+
+    print(f"{args.command}: {len(games)} games, {workers} workers"
+          + (f", {args.worker_memory_gb:g} GB each" if worker_memory else "")
+          + f", stages {' -> '.join(plan)}")
+
+    t_start = time.perf_counter()
+    report = runner.run(COMMANDS[args.command], verbose=False)
+    for name in plan:
+        print(_throughput(name, report[report["stage"] == name], runner.stage_seconds.get(name, 0.0)))
+
+    runs = Path(args.out) / "runs"
+    runs.mkdir(parents=True, exist_ok=True)
+    report_path = runs / f"{time.strftime('%Y%m%d-%H%M%S')}_{args.command}.csv"
+    report.to_csv(report_path, index=False)
+    if metrics is not None:
+        print(f"metrics -> {metrics.export(args.metrics)}")
+
+    if runner.n_failed:
+        for stage, game_id, error in runner.failures[:10]:
+            print(f"[{stage}] {'game ' + str(game_id) if game_id is not None else 'stage'} failed: {error}",
+                  file=sys.stderr)
+        print(f"{runner.n_failed} failures, see {report_path}", file=sys.stderr)
+        return 1
+
+    if args.export:
+        export(runner, args.command, args.export)
+    print(f"done in {time.perf_counter() - t_start:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
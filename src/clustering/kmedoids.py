@@ -0,0 +1,169 @@
+# ============================
+# src/clustering/kmedoids.py
+# ============================
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from src.ot.distance_matrix import condensed_index
+
+
+def n_from_condensed(length):
+    n = int(round((1 + np.sqrt(1 + 8 * length)) / 2))
+    if n * (n - 1) // 2 != length:
+        raise ValueError(f"{length} is not a condensed distance length")
+    return n
+
+
+def gather(D, n, rows, cols):
+    """
+    Dense block d(rows[a], cols[b]) read from a condensed vector D
+    (ndarray or memmap); only the needed entries are touched.
+    """
+    r = np.asarray(rows, dtype=np.int64)[:, None]
+    c = np.asarray(cols, dtype=np.int64)[None, :]
+    i, j = np.minimum(r, c), np.maximum(r, c)
+    same = i == j
+    k = condensed_index(i, np.where(same, i + 1, j), n)
+    k = np.minimum(k, len(D) - 1)
+    return np.where(same, 0.0, np.asarray(D[k.ravel()]).reshape(k.shape))
+
+
+def assign(D, n, medoids, block_rows=50_000):
+    """
+    Nearest medoid for every point, streamed in row blocks.
+    Returns labels (n,) and total cost.
+    """
+    medoids = np.asarray(medoids, dtype=np.int64)
+    labels = np.empty(n, dtype=np.int64)
+    cost = 0.0
+    for start in range(0, n, block_rows):
+        rows = np.arange(start, min(start + block_rows, n))
+        d = gather(D, n, rows, medoids)
+        labels[rows] = np.argmin(d, axis=1)
+        cost += float(d[np.arange(len(rows)), labels[rows]].sum())
+    return labels, cost
+
+
+def _init_plusplus(Dsub, k, rng):
+    # k-medoids++ seeding on a dense sample matrix
+    m = Dsub.shape[0]
+    medoids = [int(rng.integers(m))]
+    nearest = Dsub[medoids[0]].copy()
+    for _ in range(1, k):
+        w = nearest ** 2
+        nxt = int(rng.choice(m, p=w / w.sum())) if w.sum() > 0 else int(rng.integers(m))
+        medoids.append(nxt)
+        nearest = np.minimum(nearest, Dsub[nxt])
+    return np.array(medoids)
+
+
+def pam_dense(Dsub, k, rng, max_iter=100):
+    """
+    k-medoids on a dense (m, m) matrix: ++ seeding, then alternating
+    assignment / per-cluster medoid update until the medoids stop moving.
+    """
+    medoids = _init_plusplus(Dsub, k, rng)
+    for _ in range(max_iter):
+        labels = np.argmin(Dsub[:, medoids], axis=1)
+        new = medoids.copy()
+        for c in range(k):
+            members = np.flatnonzero(labels == c)
+            if len(members):
+                within = Dsub[np.ix_(members, members)].sum(axis=1)
+                new[c] = members[np.argmin(within)]
+        if np.array_equal(np.sort(new), np.sort(medoids)):
+            break
+        medoids = new
+    return medoids
+
+
+def _load(D):
+    return np.load(D, mmap_mode="r") if isinstance(D, (str, os.PathLike)) else D
+
+
+def check_finite(D, block=10_000_000):
+    """
+    Raise ValueError if the condensed vector has NaN / inf entries, e.g.
+    pairs of chunks a gw_distance_matrix run has not finished yet.
+    Scanned in blocks so memmaps are not loaded whole.
+    """
+    bad = 0
+    for start in range(0, len(D), block):
+        bad += int((~np.isfinite(np.asarray(D[start:start + block]))).sum())
+    if bad:
+        raise ValueError(f"{bad} of {len(D)} distances are NaN / inf (unfinished "
+                         f"gw_distance_matrix chunks?); finish the matrix before clustering")
+
+
+def _clara_restart(args):
+    D, k, sample_size, seed_seq, max_iter, block_rows = args
+    D = _load(D)
+    n = n_from_condensed(len(D))
+    rng = np.random.default_rng(seed_seq)
+
+    sample = np.sort(rng.choice(n, size=min(sample_size, n), replace=False))
+    Dsub = gather(D, n, sample, sample)
+    medoids = sample[pam_dense(Dsub, k, rng, max_iter=max_iter)]
+
+    _, cost = assign(D, n, medoids, block_rows=block_rows)
+    return medoids, cost
+
+
+def clara(
+    D,
+    k,
+    *,
+    n_restarts=5,
+    sample_size=None,
+    seed=0,
+    workers=1,
+    max_iter=100,
+    block_rows=50_000,
+):
+    """
+    CLARA k-medoids on a condensed distance matrix.
+
+    Each restart draws a random sample, runs k-medoids on the dense sample
+    block, then scores its medoids on the full data by streaming row blocks
+    from D. The restart with the lowest total cost wins. Restarts are seeded
+    from one SeedSequence, so results do not depend on worker count.
+
+    Parameters
+    ----------
+    D : str | Path | ndarray
+        Condensed distances, e.g. the .npy written by
+        src.ot.distance_matrix.gw_distance_matrix (opened memory-mapped;
+        pass the path when workers > 1 so each process maps it itself).
+    sample_size : int, optional
+        Defaults to 40 + 2k, the classic CLARA choice, but at least 10k.
+
+    Returns
+    -------
+    dict
+        medoids (k,), labels (n,), cost, restart_costs
+
+    Raises
+    ------
+    ValueError
+        If D has NaN / inf entries (see check_finite).
+    """
+    check_finite(_load(D))
+    n = n_from_condensed(len(_load(D)))
+    if sample_size is None:
+        sample_size = max(40 + 2 * k, 10 * k)
+
+    seeds = np.random.SeedSequence(seed).spawn(n_restarts)
+    jobs = [(D, k, sample_size, s, max_iter, block_rows) for s in seeds]
+
+    if workers == 1:
+        results = [_clara_restart(j) for j in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_clara_restart, jobs))
+
+    costs = np.array([c for _, c in results])
+    medoids = results[int(np.argmin(costs))][0]
+    labels, cost = assign(_load(D), n, medoids, block_rows=block_rows)
+    return {"medoids": medoids, "labels": labels, "cost": cost, "restart_costs": costs}
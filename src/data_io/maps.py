@@ -5,36 +5,33 @@ from pathlib import Path
 import numpy as np
 
 
-def save_maps_npz(path, maps):
+def stack_maps(maps):
     """
-    Fastest storage: one compressed NPZ.
+    build_player_maps output -> the arrays stored by save_maps_npz (same
+    dict load_maps_npz returns), without touching disk.
     Assumes all players share xedges/yedges (true if you built with one grid).
     """
-    path = Path(path)
-    path.parent.mkdir(parents=True, exist_ok=True)
-
     any_pid = next(iter(maps))
-    xedges = np.asarray(maps[any_pid]["xedges"], dtype=np.float32)
-    yedges = np.asarray(maps[any_pid]["yedges"], dtype=np.float32)
-
     player_ids = np.asarray(list(maps.keys()), dtype=np.int64)
+    return {
+        "xedges": np.asarray(maps[any_pid]["xedges"], dtype=np.float32),
+        "yedges": np.asarray(maps[any_pid]["yedges"], dtype=np.float32),
+        "player_ids": player_ids,
+        "attempt_count": np.asarray([maps[int(pid)]["attempt_count"] for pid in player_ids], dtype=np.int32),
+        "density": np.stack([np.asarray(maps[int(pid)]["density"]) for pid in player_ids]).astype(np.float32),
+        "quality": np.stack([np.asarray(maps[int(pid)]["quality"]) for pid in player_ids]).astype(np.float32),
+        "impact": np.stack([np.asarray(maps[int(pid)]["impact"]) for pid in player_ids]).astype(np.float32),
+    }
 
-    density = np.stack([np.asarray(maps[int(pid)]["density"]) for pid in player_ids]).astype(np.float32)
-    quality = np.stack([np.asarray(maps[int(pid)]["quality"]) for pid in player_ids]).astype(np.float32)
-    impact  = np.stack([np.asarray(maps[int(pid)]["impact"])  for pid in player_ids]).astype(np.float32)
-
-    attempt_count = np.asarray([maps[int(pid)]["attempt_count"] for pid in player_ids], dtype=np.int32)
 
-    np.savez_compressed(
-        path,
-        xedges=xedges,
-        yedges=yedges,
-        player_ids=player_ids,
-        attempt_count=attempt_count,
-        density=density,
-        quality=quality,
-        impact=impact,
-    )
+def save_maps_npz(path, maps):
+    """
+    Fastest storage: one compressed NPZ.
+    Assumes all players share xedges/yedges (true if you built with one grid).
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(path, **stack_maps(maps))
 
 
 def load_maps_npz(path):
@@ -54,4 +51,36 @@ def load_maps_npz(path):
         "impact": z["impact"],
     }
     pid2row = {int(pid): i for i, pid in enumerate(maps_npz["player_ids"])}
-    return maps_npz, pid2row
\ No newline at end of file
+    return maps_npz, pid2row
+
+
+MAP_ARRAYS = ("xedges", "yedges", "player_ids", "attempt_count", "density", "quality", "impact")
+
+
+def export_maps_mmap(npz_path, out_dir):
+    """
+    Unpack a maps NPZ (save_maps_npz) into one raw .npy per array so it can
+    be memory-mapped; compressed NPZ members cannot be. Skipped when out_dir
+    is already newer than the NPZ.
+    """
+    npz_path, out_dir = Path(npz_path), Path(out_dir)
+    stamp = out_dir / "player_ids.npy"
+    if stamp.exists() and stamp.stat().st_mtime >= npz_path.stat().st_mtime:
+        return out_dir
+    out_dir.mkdir(parents=True, exist_ok=True)
+    with np.load(npz_path, allow_pickle=False) as z:
+        for k in MAP_ARRAYS:
+            np.save(out_dir / f"{k}.npy", z[k])
+    return out_dir
+
+
+def open_maps_mmap(maps_dir):
+    """
+    Memory-mapped counterpart of load_maps_npz over an export_maps_mmap
+    directory: same (maps_npz, pid2row), with read-only memmap arrays so a
+    worker only pages in the rows it touches.
+    """
+    maps_dir = Path(maps_dir)
+    maps_npz = {k: np.load(maps_dir / f"{k}.npy", mmap_mode="r") for k in MAP_ARRAYS}
+    pid2row = {int(pid): i for i, pid in enumerate(maps_npz["player_ids"])}
+    return maps_npz, pid2row
@@ -0,0 +1,25 @@
+# ============================
+# src/data_io/models.py
+# ============================
+from pathlib import Path
+import joblib
+
+
+def save_model(path, model, meta=None):
+    """
+    Persist a fitted estimator (or dict of estimators) with its metadata
+    (feature columns, params, scores) in one joblib file.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    joblib.dump({"model": model, "meta": dict(meta or {})}, path)
+
+
+def load_model(path):
+    """
+    Returns:
+      model: the stored estimator
+      meta: dict saved alongside it
+    """
+    obj = joblib.load(Path(path))
+    return obj["model"], obj["meta"]
@@ -0,0 +1,148 @@
+# ============================
+# src/data_io/season_store.py
+# ============================
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Frame-aligned fields of src.tracking.tensorize.game_to_arrays and the
+# dtype each is stored as (float64 clocks are kept to 0.01 s in float32).
+FIELDS = {
+    "player_xy": np.float32,
+    "player_id": np.int64,
+    "team_id": np.int64,
+    "ball_xyz": np.float32,
+    "game_clock": np.float32,
+    "shot_clock": np.float32,
+    "quarter": np.int16,
+    "frame_id": np.int64,
+    "event_idx": np.int32,
+}
+
+SUMMARY_COLUMNS = [
+    "game_id", "chunk", "start", "stop",
+    "quarter_min", "quarter_max", "clock_min", "clock_max",
+]
+
+
+class SeasonStore:
+    """
+    Chunked on-disk store of season tracking arrays.
+
+    Layout (one directory per game, chunked along time)::
+
+        root/
+          <game_id>/
+            chunks.json         per-chunk summaries (rows, quarter, clock range)
+            events.npy          event_offsets of the game
+            c00000.npz ...      compressed chunk with every field in FIELDS
+
+    The summaries let readers skip chunks by quarter or clock window without
+    opening them; only requested fields of the surviving chunks are
+    decompressed, so season passes run in memory bounded by one chunk.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    # --- writing ---
+    def write_game(self, game_id, arrays, chunk_frames=4096):
+        """Store one game's game_to_arrays output, replacing any old copy."""
+        gdir = self.root / str(game_id)
+        gdir.mkdir(parents=True, exist_ok=True)
+        for old in gdir.glob("c*.npz"):
+            old.unlink()
+
+        F = len(arrays["game_clock"])
+        summaries = []
+        for k, start in enumerate(range(0, F, chunk_frames)):
+            stop = min(start + chunk_frames, F)
+            np.savez_compressed(
+                gdir / f"c{k:05d}.npz",
+                **{f: np.asarray(arrays[f][start:stop], dtype=dt) for f, dt in FIELDS.items()},
+            )
+            q = np.asarray(arrays["quarter"][start:stop])
+            gc = np.asarray(arrays["game_clock"][start:stop], dtype=float)
+            gc = gc[np.isfinite(gc)]
+            summaries.append({
+                "chunk": k,
+                "start": start,
+                "stop": stop,
+                "quarter_min": int(q.min()),
+                "quarter_max": int(q.max()),
+                "clock_min": float(gc.min()) if len(gc) else float("nan"),
+                "clock_max": float(gc.max()) if len(gc) else float("nan"),
+            })
+
+        np.save(gdir / "events.npy", np.asarray(arrays["event_offsets"], dtype=np.int64))
+        with open(gdir / "chunks.json", "w", encoding="utf-8") as f:
+            json.dump({"n_frames": F, "chunk_frames": chunk_frames, "chunks": summaries}, f)
+
+    # --- reading ---
+    def games(self):
+        return sorted(p.name for p in self.root.iterdir() if (p / "chunks.json").exists())
+
+    def summary(self, games=None):
+        """Per-chunk summaries as a DataFrame (SUMMARY_COLUMNS)."""
+        rows = []
+        for g in games if games is not None else self.games():
+            with open(self.root / str(g) / "chunks.json", encoding="utf-8") as f:
+                rows += [{"game_id": str(g), **c} for c in json.load(f)["chunks"]]
+        s = pd.DataFrame(rows, columns=SUMMARY_COLUMNS)
+        # float even when no chunk has a clock (older stores wrote null)
+        s[["clock_min", "clock_max"]] = s[["clock_min", "clock_max"]].astype(float)
+        return s
+
+    def event_offsets(self, game_id):
+        return np.load(self.root / str(game_id) / "events.npy")
+
+    def iter_chunks(self, fields=None, *, games=None, quarter=None, clock_range=None):
+        """
+        Stream chunks lazily, skipping those that cannot match the filters.
+
+        Parameters
+        ----------
+        fields : list of str, optional
+            Subset of FIELDS to load (default all).
+        quarter : int, optional
+            Keep chunks whose quarter range contains it.
+        clock_range : (lo, hi), optional
+            Keep chunks whose game-clock range overlaps [lo, hi]; chunks
+            without a valid clock are skipped.
+
+        Yields
+        ------
+        (game_id, start, arrays)
+            arrays holds the requested fields for rows start:start + n of
+            the game. Filters prune whole chunks only; rows inside a kept
+            chunk are not filtered.
+        """
+        fields = list(FIELDS) if fields is None else list(fields)
+        unknown = set(fields) - set(FIELDS)
+        if unknown:
+            raise ValueError(f"unknown fields: {sorted(unknown)}")
+
+        s = self.summary(games)
+        keep = np.ones(len(s), dtype=bool)
+        if quarter is not None:
+            keep &= (s["quarter_min"] <= quarter) & (s["quarter_max"] >= quarter)
+        if clock_range is not None:
+            lo, hi = clock_range
+            # NaN ranges (no valid clock in the chunk) compare False and are skipped
+            keep &= ((s["clock_max"] >= lo) & (s["clock_min"] <= hi)).to_numpy()
+
+        for row in s[keep].itertuples(index=False):
+            with np.load(self.root / row.game_id / f"c{row.chunk:05d}.npz") as z:
+                yield row.game_id, int(row.start), {f: z[f] for f in fields}
+
+    def read_game(self, game_id, fields=None):
+        """Concatenate a whole game back into game_to_arrays-style arrays."""
+        parts = [a for _, _, a in self.iter_chunks(fields, games=[game_id])]
+        if not parts:
+            raise ValueError(f"game {game_id} not in {self.root}")
+        out = {f: np.concatenate([p[f] for p in parts]) for f in parts[0]}
+        out["event_offsets"] = self.event_offsets(game_id)
+        return out
@@ -1,29 +1,261 @@
 # src/data_sources/nba_api_shots.py
+import hashlib
+import json
+import os
+import random
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
 import pandas as pd
-from nba_api.stats.endpoints import shotchartdetail
 
-# Function to fetch league shot data with retries
-def fetch_league_shots(
+ENDPOINT = "shotchartdetail"
+DEFAULT_CACHE_DIR = "data/raw/nba_api_cache"
+# NBA_API_OFFLINE=1 makes every fetch cache-only (CI, tests, no network)
+OFFLINE_ENV = "NBA_API_OFFLINE"
+
+
+def shot_chart_params(
     season: str,
     season_type: str = "Regular Season",
     context_measure: str = "FGA",
-    retries: int = 3,
-    delay: float = 0.5,
+    team_id: int = 0,
+    player_id: int = 0,
+) -> dict:
+    """Endpoint parameters of one ShotChartDetail request (the cache key)."""
+    return {
+        "team_id": int(team_id),
+        "player_id": int(player_id),
+        "season_nullable": season,
+        "season_type_all_star": season_type,
+        "context_measure_simple": context_measure,
+    }
+
+
+def parquet_available() -> bool:
+    """True if pandas has a parquet engine (pyarrow or fastparquet)."""
+    for engine in ("pyarrow", "fastparquet"):
+        try:
+            __import__(engine)
+            return True
+        except ImportError:
+            pass
+    return False
+
+
+def _api_fetch(params: dict, timeout: float = 30.0) -> pd.DataFrame:
+    # imported lazily so cached / offline runs do not need nba_api
+    from nba_api.stats.endpoints import shotchartdetail
+    return shotchartdetail.ShotChartDetail(**params, timeout=timeout).get_data_frames()[0]
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` requests per second on average with
+    bursts of up to `capacity`.
+    """
+
+    def __init__(self, rate: float = 1.0, capacity: int = 1):
+        if rate <= 0 or capacity < 1:
+            raise ValueError("rate must be > 0 and capacity >= 1")
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class ResponseCache:
+    """
+    On-disk cache of endpoint responses, one file per parameter set::
+
+        cache_dir/<endpoint>/<key>.parquet   response table
+        cache_dir/<endpoint>/<key>.json      params, dtypes, fetched_at
+
+    key is a hash of the endpoint and its sorted parameters. fmt=None picks
+    parquet when a parquet engine (pyarrow / fastparquet) imports and CSV
+    otherwise, before any request is made; with CSV, dtypes are restored
+    from the sidecar so GAME_ID stays a string.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, fmt=None):
+        if fmt is None:
+            fmt = "parquet" if parquet_available() else "csv"
+        if fmt not in ("parquet", "csv"):
+            raise ValueError(f"fmt must be 'parquet' or 'csv', got {fmt!r}")
+        if fmt == "parquet" and not parquet_available():
+            raise ValueError("fmt='parquet' needs pyarrow or fastparquet; use fmt='csv' or None")
+        self.cache_dir = Path(cache_dir)
+        self.fmt = fmt
+
+    @staticmethod
+    def key(endpoint: str, params: dict) -> str:
+        payload = json.dumps({"endpoint": endpoint, **params}, sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+    def _paths(self, endpoint, params):
+        base = self.cache_dir / endpoint / self.key(endpoint, params)
+        return base.with_suffix(f".{self.fmt}"), base.with_suffix(".json")
+
+    def get(self, endpoint: str, params: dict):
+        data, meta = self._paths(endpoint, params)
+        if not (data.exists() and meta.exists()):
+            return None
+        if self.fmt == "parquet":
+            return pd.read_parquet(data)
+        info = json.loads(meta.read_text())
+        text = set(info["text_columns"])
+        df = pd.read_csv(data, dtype={c: str for c in text})
+        return df.astype({c: t for c, t in info["dtypes"].items() if c not in text})
+
+    def put(self, endpoint: str, params: dict, df: pd.DataFrame):
+        data, meta = self._paths(endpoint, params)
+        data.parent.mkdir(parents=True, exist_ok=True)
+        tmp = data.with_suffix(data.suffix + ".tmp")
+        if self.fmt == "parquet":
+            df.to_parquet(tmp, index=False)
+        else:
+            df.to_csv(tmp, index=False)
+        os.replace(tmp, data)
+        meta.write_text(json.dumps({
+            "endpoint": endpoint,
+            "params": params,
+            "dtypes": {c: str(t) for c, t in df.dtypes.items()},
+            "text_columns": [c for c in df.columns if not pd.api.types.is_numeric_dtype(df[c])],
+            "rows": len(df),
+            "fetched_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }, indent=1))
+
+
+def fetch_cached(
+    params: dict,
+    *,
+    cache: ResponseCache | None = None,
+    fetcher=None,
+    limiter: TokenBucket | None = None,
+    retries: int = 5,
+    backoff: float = 1.0,
+    offline: bool | None = None,
+    endpoint: str = ENDPOINT,
 ) -> pd.DataFrame:
+    """
+    One endpoint request served from cache, else fetched and cached.
+
+    fetcher(params) -> DataFrame defaults to the nba_api endpoint; pass a
+    stand-in (local server client, fixture loader) for tests. Failures are
+    retried with exponential backoff plus jitter: backoff * 2**attempt
+    seconds. offline (default: NBA_API_OFFLINE env var) never touches the
+    network and raises FileNotFoundError on a cache miss.
+    """
+    cache = cache or ResponseCache()
+    hit = cache.get(endpoint, params)
+    if hit is not None:
+        return hit
+
+    if offline is None:
+        offline = os.environ.get(OFFLINE_ENV, "") not in ("", "0")
+    if offline:
+        raise FileNotFoundError(f"offline and no cached {endpoint} response for {params}")
+
+    fetcher = fetcher or _api_fetch
     last_err = None
     for attempt in range(retries):
+        if limiter is not None:
+            limiter.acquire()
         try:
-            df = shotchartdetail.ShotChartDetail(
-                team_id=0,
-                player_id=0,
-                season_nullable=season,
-                season_type_all_star=season_type,
-                context_measure_simple=context_measure,
-            ).get_data_frames()[0]
-            time.sleep(delay)  # be polite
-            return df
+            df = fetcher(params)
+            break
         except Exception as e:
             last_err = e
-            time.sleep(delay)
-    raise ConnectionError(f"Failed to fetch shots after {retries} attempts: {last_err}")
+            if attempt < retries - 1:
+                time.sleep(backoff * 2 ** attempt + random.uniform(0, backoff))
+    else:
+        raise ConnectionError(f"Failed to fetch {endpoint} after {retries} attempts: {last_err}")
+    cache.put(endpoint, params, df)
+    return df
+
+
+# Function to fetch league shot data with retries
+def fetch_league_shots(
+    season: str,
+    season_type: str = "Regular Season",
+    context_measure: str = "FGA",
+    retries: int = 3,
+    delay: float = 0.5,
+    *,
+    cache_dir=DEFAULT_CACHE_DIR,
+    cache_fmt: str | None = None,
+    offline: bool | None = None,
+    fetcher=None,
+) -> pd.DataFrame:
+    """League-wide shot chart for one season, cached on disk after the first call."""
+    return fetch_cached(
+        shot_chart_params(season, season_type, context_measure),
+        cache=ResponseCache(cache_dir, cache_fmt),
+        fetcher=fetcher,
+        retries=retries,
+        backoff=delay,
+        offline=offline,
+    )
+
+
+def fetch_shots_many(
+    seasons,
+    season_types=("Regular Season",),
+    team_ids=(0,),
+    context_measure: str = "FGA",
+    *,
+    max_workers: int = 4,
+    rate: float = 1.0,
+    burst: int = 1,
+    retries: int = 5,
+    backoff: float = 1.0,
+    cache_dir=DEFAULT_CACHE_DIR,
+    cache_fmt: str | None = None,
+    offline: bool | None = None,
+    fetcher=None,
+) -> pd.DataFrame:
+    """
+    Shot charts for every (season, season_type, team_id) combination.
+
+    Requests run on a thread pool and share one token bucket, so at most
+    `rate` requests per second reach the API however many workers run;
+    cached combinations cost no request at all.
+
+    Returns
+    -------
+    pd.DataFrame
+        All rows concatenated, with SEASON and SEASON_TYPE columns added.
+    """
+    seasons = [seasons] if isinstance(seasons, str) else list(seasons)
+    season_types = [season_types] if isinstance(season_types, str) else list(season_types)
+    jobs = [(s, st, t) for s in seasons for st in season_types for t in team_ids]
+
+    cache = ResponseCache(cache_dir, cache_fmt)
+    limiter = TokenBucket(rate, burst)
+
+    def run(job):
+        s, st, t = job
+        df = fetch_cached(
+            shot_chart_params(s, st, context_measure, team_id=t),
+            cache=cache, fetcher=fetcher, limiter=limiter,
+            retries=retries, backoff=backoff, offline=offline,
+        )
+        return df.assign(SEASON=s, SEASON_TYPE=st)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        frames = list(pool.map(run, jobs))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
@@ -2,6 +2,7 @@ import numpy as np
 import pandas as pd
 from src.tracking.release import find_release_frame_idx
 from src.processing.indexing import find_event_for_shot_by_clock
+from src.utils import instrumentation as inst
 
 import numpy as np
 import pandas as pd
@@ -186,7 +187,7 @@ def compute_pre_shot_defense_features(
     return feats
 
 
-
+@inst.timed("defense_features")
 def compute_defense_features_for_shots(
     shots_g,
     tracking_events,
@@ -202,6 +203,11 @@ def compute_defense_features_for_shots(
     """
     Compute defense features for all shots in shots_g.
     Returns a DataFrame indexed like shots_g, containing ONLY valid shots.
+
+    With instrumentation enabled every shot is counted once under "shot_match"
+    as "matched" or "dropped:<reason>" (the matcher's reason, the feature
+    error, or "exception:<type>"); matched shots that needed a fallback
+    match are also counted under "shot_fallbacks".
     """
 
     rows = []
@@ -217,7 +223,7 @@ def compute_defense_features_for_shots(
             gameid = int(shot["GAME_ID"])
 
             # --- find tracking event ---
-            ev_idx, _ = find_event_for_shot_by_clock(
+            ev_idx, ev_info = find_event_for_shot_by_clock(
                 event_index,
                 gameid,
                 quarter,
@@ -227,13 +233,14 @@ def compute_defense_features_for_shots(
             )
 
             if ev_idx is None:
+                inst.count("shot_match", f"dropped:{ev_info.get('reason')}")
                 continue
 
             event = tracking_events[int(ev_idx)]
             frames = event["frames"]
 
             # --- find release frame ---
-            release_idx, _ = find_release_frame_idx(
+            release_idx, rel_info = find_release_frame_idx(
                 event_frames=frames,
                 shot_game_clock=shot_gc,
                 match="prev",
@@ -241,6 +248,7 @@ def compute_defense_features_for_shots(
             )
 
             if release_idx is None:
+                inst.count("shot_match", f"dropped:{rel_info.get('reason')}")
                 continue
 
             # --- compute defense features ---
@@ -255,6 +263,7 @@ def compute_defense_features_for_shots(
             )
 
             if "error" in feats:
+                inst.count("shot_match", f"dropped:{feats['error']}")
                 continue
 
             # --- store row ---
@@ -262,8 +271,14 @@ def compute_defense_features_for_shots(
             feats["release_idx"] = release_idx
             rows.append(feats)
 
-        except Exception:
-            # hard fail-safe: skip shot silently
+            inst.count("shot_match", "matched")
+            for info in (ev_info, rel_info):
+                if info.get("reason", "ok") != "ok":
+                    inst.count("shot_fallbacks", info["reason"])
+
+        except Exception as e:
+            # hard fail-safe: skip the shot, but keep track of why
+            inst.count("shot_match", f"dropped:exception:{type(e).__name__}")
             continue
 
     if len(rows) == 0:
@@ -0,0 +1,286 @@
+# ============================
+# src/features/formation.py
+# ============================
+import numpy as np
+
+from src.features.space_control import COURT_LENGTH, COURT_WIDTH, HOOP_LEFT_X, HOOP_RIGHT_X
+
+HOOP_Y = COURT_WIDTH / 2
+# Lengths are divided by half the court length and areas by the half-court
+# area so every block of the embedding is roughly in [0, 1].
+HALF_COURT = COURT_LENGTH / 2
+
+
+def team_formations(arrays, possession_team_id, side="offense", n=5):
+    """
+    Pick one team's players per frame from the fixed 10 player columns.
+
+    Parameters
+    ----------
+    arrays : dict
+        Output of src.tracking.tensorize.game_to_arrays.
+    possession_team_id : (F,) array
+        Offense team per frame (see src.tracking.possession.frame_possession).
+    side : {"offense", "defense", "all"}
+
+    Returns
+    -------
+    (F, n, 2) float32, NaN rows where the team has fewer than n players.
+    With side="all" the player columns are returned unchanged.
+    """
+    pxy = arrays["player_xy"]
+    if side == "all":
+        return pxy
+    if side not in ("offense", "defense"):
+        raise ValueError(f"side must be 'offense', 'defense' or 'all', got {side!r}")
+
+    poss = np.asarray(possession_team_id)
+    team = arrays["team_id"]
+    mine = (team == poss[:, None]) if side == "offense" else ((team != poss[:, None]) & (team >= 0))
+    mine &= (poss >= 0)[:, None]
+
+    # stable sort puts the team's columns first, in column order
+    cols = np.argsort(~mine, axis=1, kind="stable")[:, :n]
+    out = np.take_along_axis(pxy, cols[..., None], axis=1).copy()
+    out[~np.take_along_axis(mine, cols, axis=1)] = np.nan
+    return out
+
+
+def hull_area(P):
+    """
+    Convex hull area of every point set in a batch, fully vectorized.
+
+    Directed pair (i, j) is a counter-clockwise hull edge when every other
+    point is strictly to its left or lies on its line outside the segment;
+    the area is half the sum of cross(p_i, p_j) over hull edges.
+    Coincident points are de-duplicated by index. Degenerate sets (fewer
+    than three distinct points, or all collinear) give 0.
+
+    P : (B, n, 2) finite array. Returns (B,).
+    """
+    P = np.asarray(P, dtype=np.float64)
+    P = P - P.mean(axis=1, keepdims=True)
+    n = P.shape[1]
+    scale = max(float(np.abs(P).max()) if P.size else 0.0, 1.0)
+    tol = 1e-9 * scale ** 2
+
+    e = P[:, None, :, :] - P[:, :, None, :]                    # (B, i, j, 2): p_j - p_i
+    r = P[:, None, None, :, :] - P[:, :, None, None, :]        # (B, i, 1, k, 2): p_k - p_i
+    cross = e[:, :, :, None, 0] * r[..., 1] - e[:, :, :, None, 1] * r[..., 0]   # (B, i, j, k)
+    elen2 = (e ** 2).sum(axis=-1)                               # (B, i, j)
+    t = (e[:, :, :, None, 0] * r[..., 0] + e[:, :, :, None, 1] * r[..., 1])     # |e|^2 * t_k
+
+    idx = np.arange(n)
+    same_i = ((r ** 2).sum(axis=-1) <= tol)                     # p_k == p_i, (B, i, 1, k)
+    d_kj = ((P[:, None, :, :] - P[:, :, None, :]) ** 2).sum(axis=-1) <= tol   # (B, j, k)
+    same_j = d_kj[:, None, :, :]                                # p_k == p_j, (B, 1, j, k)
+    later = idx[None, None, None, :] > idx[None, :, None, None]   # k > i
+    later_j = idx[None, None, None, :] > idx[None, None, :, None]  # k > j
+
+    on_line = np.abs(cross) <= tol * np.maximum(np.sqrt(elen2), 1.0)[..., None]
+    beyond = (t < -tol) | (t > elen2[..., None] + tol)
+    dup_ok = (same_i & later) | (same_j & later_j)
+    ok = (cross > 0) & ~on_line | on_line & (beyond | dup_ok)
+    ok |= (idx[None, None, None, :] == idx[None, :, None, None])   # k == i
+    ok |= (idx[None, None, None, :] == idx[None, None, :, None])   # k == j
+
+    edge = ok.all(axis=-1) & (elen2 > tol)
+    pc = P[:, :, None, 0] * P[:, None, :, 1] - P[:, :, None, 1] * P[:, None, :, 0]
+    return 0.5 * np.where(edge, pc, 0.0).sum(axis=(1, 2))
+
+
+def formation_embedding(xy, rim_x, *, n_radial=8, n_angular=8, max_radius=HALF_COURT,
+                        chunk_frames=4096):
+    """
+    Fixed-length, permutation-invariant embedding of formations.
+
+    Blocks (in order):
+      - sorted pairwise distances, n(n-1)/2 values / HALF_COURT
+      - radial histogram of distance to the attacked rim, n_radial bins on
+        [0, max_radius] (last bin open), as player fractions
+      - angular histogram around the rim, n_angular bins on [-90, 90] deg
+        with 0 pointing to half court, as player fractions
+      - convex hull area / half-court area
+
+    Parameters
+    ----------
+    xy : (F, n, 2) array
+        E.g. team_formations(...) or arrays["player_xy"].
+    rim_x : float or (F,) array
+        x of the basket the offense attacks.
+
+    Returns
+    -------
+    (F, D) float32. Frames with a missing player are all NaN.
+    """
+    xy = np.asarray(xy)
+    F, n = xy.shape[:2]
+    rim_x = np.broadcast_to(np.asarray(rim_x, dtype=float), (F,))
+    iu, ju = np.triu_indices(n, k=1)
+    D = len(iu) + n_radial + n_angular + 1
+    out = np.full((F, D), np.nan, dtype=np.float32)
+
+    r_edges = np.linspace(0.0, max_radius, n_radial + 1)
+    a_edges = np.linspace(-np.pi / 2, np.pi / 2, n_angular + 1)
+
+    for start in range(0, F, chunk_frames):
+        stop = min(start + chunk_frames, F)
+        P = xy[start:stop].astype(np.float64)
+        ok = np.isfinite(P).all(axis=(1, 2))
+        P = P[ok]
+        if not len(P):
+            continue
+        rows = np.arange(start, stop)[ok]
+
+        d = np.sqrt(((P[:, iu] - P[:, ju]) ** 2).sum(axis=-1))
+        d.sort(axis=1)
+
+        # rim frame: +x points from the baseline toward half court
+        rx = rim_x[rows]
+        toward = np.where(rx < COURT_LENGTH / 2, 1.0, -1.0)
+        dx = (P[..., 0] - rx[:, None]) * toward[:, None]
+        dy = P[..., 1] - HOOP_Y
+        radius = np.hypot(dx, dy)
+        angle = np.clip(np.arctan2(dy, dx), a_edges[0], a_edges[-1])
+
+        rb = np.clip(np.searchsorted(r_edges, radius, side="right") - 1, 0, n_radial - 1)
+        ab = np.clip(np.searchsorted(a_edges, angle, side="right") - 1, 0, n_angular - 1)
+        m = len(P)
+        radial = np.zeros((m, n_radial))
+        angular = np.zeros((m, n_angular))
+        np.add.at(radial, (np.arange(m)[:, None], rb), 1.0 / n)
+        np.add.at(angular, (np.arange(m)[:, None], ab), 1.0 / n)
+
+        area = hull_area(P) / (HALF_COURT * COURT_WIDTH)
+        out[rows] = np.hstack([d / HALF_COURT, radial, angular, area[:, None]])
+
+    return out
+
+
+def game_formation_embeddings(arrays, possession_team_id, *, side="offense", rim_x=None, **kwargs):
+    """
+    formation_embedding for every frame of a game.
+
+    rim_x defaults to the hoop on the ball's side of half court, as in
+    src.features.space_control.space_control. Returns (F, D) float32.
+    """
+    xy = team_formations(arrays, possession_team_id, side=side)
+    if rim_x is None:
+        ball_x = arrays["ball_xyz"][:, 0]
+        rim_x = np.where(ball_x < COURT_LENGTH / 2, HOOP_LEFT_X, HOOP_RIGHT_X)
+    return formation_embedding(xy, rim_x, **kwargs)
+
+
+class FormationIndex:
+    """
+    In-memory top-k similarity search over embeddings.
+
+    Vectors are stored as float32 shards of at most shard_size rows; a
+    query block is scored against each shard with one matrix multiply, the
+    per-shard top k are kept with argpartition, and the candidates merged.
+
+    metric="cosine" scores by cosine similarity (higher is closer);
+    metric="l2" by squared Euclidean distance (lower is closer).
+    """
+
+    def __init__(self, metric="cosine", shard_size=262_144):
+        if metric not in ("cosine", "l2"):
+            raise ValueError(f"metric must be 'cosine' or 'l2', got {metric!r}")
+        self.metric = metric
+        self.shard_size = int(shard_size)
+        self.shards = []      # (s, D) float32, unit rows for cosine
+        self.sq_norms = []    # (s,) float32, l2 only
+        self.ids = []         # (s,) int64
+        self.n_added = 0      # rows passed to add(), including skipped ones
+
+    def __len__(self):
+        return sum(len(s) for s in self.ids)
+
+    def _prep(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        if self.metric == "cosine":
+            norm = np.linalg.norm(X, axis=1, keepdims=True)
+            X = X / np.where(norm > 0, norm, 1.0)
+        return X
+
+    def add(self, vectors, ids=None):
+        """
+        Append vectors (rows with NaN are skipped). ids default to running
+        positions, so a season can be added game by game.
+        """
+        X = np.asarray(vectors, dtype=np.float32)
+        if ids is None:
+            ids = np.arange(self.n_added, self.n_added + len(X))
+        ids = np.asarray(ids, dtype=np.int64)
+        if len(ids) != len(X):
+            raise ValueError(f"{len(ids)} ids for {len(X)} vectors")
+        self.n_added += len(X)
+        first = max(len(self.shards) - 1, 0)
+
+        keep = np.isfinite(X).all(axis=1)
+        X, ids = self._prep(X[keep]), ids[keep]
+
+        while len(X):
+            if self.shards and len(self.shards[-1]) < self.shard_size:
+                room = self.shard_size - len(self.shards[-1])
+                self.shards[-1] = np.vstack([self.shards[-1], X[:room]])
+                self.ids[-1] = np.concatenate([self.ids[-1], ids[:room]])
+            else:
+                room = self.shard_size
+                self.shards.append(X[:room].copy())
+                self.ids.append(ids[:room].copy())
+            X, ids = X[room:], ids[room:]
+
+        if self.metric == "l2":
+            self.sq_norms[first:] = [
+                (s.astype(np.float64) ** 2).sum(axis=1).astype(np.float32) for s in self.shards[first:]
+            ]
+        return self
+
+    def search(self, queries, k=10, *, query_block=1024):
+        """
+        Top-k neighbours for each query row.
+
+        Returns
+        -------
+        ids : (Q, k) int64, -1 where fewer than k vectors exist or the
+            query has NaN
+        scores : (Q, k) float32, cosine similarity (descending) or squared
+            L2 distance (ascending)
+        """
+        Q = self._prep(np.atleast_2d(queries))
+        valid = np.isfinite(Q).all(axis=1)
+        Q = np.where(valid[:, None], Q, 0.0).astype(np.float32)
+        nq = len(Q)
+        out_ids = np.full((nq, k), -1, dtype=np.int64)
+        worst = -np.inf if self.metric == "cosine" else np.inf
+        out_scores = np.full((nq, k), worst, dtype=np.float32)
+        if not self.shards:
+            return out_ids, out_scores
+
+        for qs in range(0, nq, query_block):
+            q = Q[qs:qs + query_block]
+            cand_s, cand_i = [], []
+            for si, shard in enumerate(self.shards):
+                s = q @ shard.T
+                if self.metric == "l2":
+                    # -(|q|^2 - 2 q.x + |x|^2); |q|^2 is added back below
+                    s = 2 * s - self.sq_norms[si][None, :]
+                kk = min(k, s.shape[1])
+                top = np.argpartition(-s, kk - 1, axis=1)[:, :kk]
+                cand_s.append(np.take_along_axis(s, top, axis=1))
+                cand_i.append(self.ids[si][top])
+
+            s = np.hstack(cand_s)
+            i = np.hstack(cand_i)
+            kk = min(k, s.shape[1])
+            order = np.argsort(-s, axis=1, kind="stable")[:, :kk]
+            s = np.take_along_axis(s, order, axis=1)
+            if self.metric == "l2":
+                s = np.maximum((q.astype(np.float64) ** 2).sum(axis=1)[:, None] - s, 0.0)
+            out_scores[qs:qs + len(q), :kk] = s
+            out_ids[qs:qs + len(q), :kk] = np.take_along_axis(i, order, axis=1)
+
+        out_ids[~valid] = -1
+        out_scores[~valid] = worst
+        return out_ids, out_scores
@@ -5,6 +5,8 @@ import numpy as np
 import pandas as pd
 from scipy.ndimage import gaussian_filter
 
+from src.tracking.coordinates import shot_chart_to_feet
+
 
 def make_grid(x_min=-25, x_max=25, y_min=-5, y_max=42, bin_size=1.0):
     """
@@ -106,4 +108,98 @@ def build_player_maps(
         rows.append({"PLAYER_ID": int(pid), "PLAYER_NAME": pname, "attempts": pm["attempt_count"]})
 
     meta = pd.DataFrame(rows).sort_values("attempts", ascending=False).reset_index(drop=True)
-    return maps, meta
\ No newline at end of file
+    return maps, meta
+
+
+# Closest-defender distance bands (feet) used by NBA tracking shot splits.
+DEFENDER_BANDS = {
+    "very tight": (0.0, 2.0),
+    "tight": (2.0, 4.0),
+    "open": (4.0, 6.0),
+    "wide open": (6.0, np.inf),
+}
+
+
+def contested_fg_grids(
+    shots: pd.DataFrame,
+    n_bins: int = 10,
+    dist_col: str = "close_def_dist_release",
+    made_col: str = "SHOT_MADE_FLAG",
+    bands: dict | None = None,
+    min_attempts: int = 1,
+    grid_kwargs: dict | None = None,
+    return_counts: bool = False,
+):
+    """
+    FG% per court bin for each closest-defender distance band.
+
+    Shots are binned jointly by band and by an n_bins x n_bins grid over
+    the half court in feet (extent from make_grid defaults, rim at the
+    origin); one flat code band * n_bins**2 + y_bin * n_bins + x_bin feeds
+    a single bincount for attempts and one for makes.
+
+    Parameters
+    ----------
+    shots : DataFrame
+        Season shots with tracking defense features (e.g.
+        data/processed/def_variables.csv): x_ft / y_ft or LOC_X / LOC_Y,
+        made_col and dist_col. Shots without a defender distance or outside
+        the grid are dropped.
+    bands : dict, optional
+        level -> (lo, hi) feet, half-open [lo, hi); default DEFENDER_BANDS.
+    min_attempts : int
+        Bins with fewer attempts are NaN.
+
+    Returns
+    -------
+    grids : dict[str, ndarray]
+        level -> (n_bins, n_bins) FG%, rows = y bins, as save_grids expects.
+    counts : dict[str, ndarray]
+        level -> attempts per bin; only when return_counts=True.
+    """
+    bands = DEFENDER_BANDS if bands is None else bands
+    for c in (dist_col, made_col):
+        if c not in shots.columns:
+            raise ValueError(f"Missing column '{c}' in shots.")
+
+    if "x_ft" in shots.columns and "y_ft" in shots.columns:
+        x = shots["x_ft"].to_numpy(dtype=float)
+        y = shots["y_ft"].to_numpy(dtype=float)
+    elif "LOC_X" in shots.columns and "LOC_Y" in shots.columns:
+        # same conversion as xfg.add_shot_features / the player maps
+        x, y = shot_chart_to_feet(shots["LOC_X"], shots["LOC_Y"])
+    else:
+        raise ValueError("No x/y columns found. Expected (x_ft,y_ft) or (LOC_X,LOC_Y).")
+
+    g = {"x_min": -25, "x_max": 25, "y_min": -5, "y_max": 42, **(grid_kwargs or {})}
+    x_edges = np.linspace(g["x_min"], g["x_max"], n_bins + 1)
+    y_edges = np.linspace(g["y_min"], g["y_max"], n_bins + 1)
+
+    d = shots[dist_col].to_numpy(dtype=float)
+    made = shots[made_col].to_numpy(dtype=float)
+
+    # band index per shot (-1 = no band)
+    levels = list(bands)
+    lo = np.array([bands[k][0] for k in levels], dtype=float)
+    hi = np.array([bands[k][1] for k in levels], dtype=float)
+    in_band = (d[:, None] >= lo) & (d[:, None] < hi)
+    band = np.where(in_band.any(axis=1), in_band.argmax(axis=1), -1)
+
+    ok = (
+        (band >= 0) & np.isfinite(made)
+        & (x >= x_edges[0]) & (x <= x_edges[-1])
+        & (y >= y_edges[0]) & (y <= y_edges[-1])
+    )
+    xb = np.clip(np.digitize(x[ok], x_edges) - 1, 0, n_bins - 1)
+    yb = np.clip(np.digitize(y[ok], y_edges) - 1, 0, n_bins - 1)
+    flat = (band[ok] * n_bins + yb) * n_bins + xb
+
+    size = len(levels) * n_bins * n_bins
+    att = np.bincount(flat, minlength=size).reshape(len(levels), n_bins, n_bins)
+    fgm = np.bincount(flat, weights=made[ok], minlength=size).reshape(len(levels), n_bins, n_bins)
+    fg = np.divide(fgm, att, out=np.full(att.shape, np.nan), where=att >= max(min_attempts, 1))
+
+    grids = {k: fg[i] for i, k in enumerate(levels)}
+    if return_counts:
+        return grids, {k: att[i] for i, k in enumerate(levels)}
+    return grids
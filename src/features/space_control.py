@@ -0,0 +1,191 @@
+# ============================
+# src/features/space_control.py
+# ============================
+import numpy as np
+
+# SportVU full court (feet)
+COURT_LENGTH = 94.0
+COURT_WIDTH = 50.0
+HOOP_LEFT_X = 5.25
+HOOP_RIGHT_X = 88.75
+
+
+def _grid_axes(cell_size=1.0, length=COURT_LENGTH, width=COURT_WIDTH):
+    xs = np.arange(cell_size / 2, length, cell_size, dtype=np.float32)
+    ys = np.arange(cell_size / 2, width, cell_size, dtype=np.float32)
+    return xs, ys
+
+
+def court_grid(cell_size=1.0, length=COURT_LENGTH, width=COURT_WIDTH):
+    """
+    Cell centers of a full-court grid in SportVU feet.
+
+    Returns
+    -------
+    centers : (G, 2) float32, x along the court length, y across
+    shape : (ny, nx)
+    """
+    xs, ys = _grid_axes(cell_size, length, width)
+    gx, gy = np.meshgrid(xs, ys)
+    return np.column_stack([gx.ravel(), gy.ravel()]), gx.shape
+
+
+def player_velocities(arrays, fps=25):
+    """
+    Central-difference player velocities (ft/s), shape (F, N, 2).
+
+    Zero where a slot changes player or event between neighbouring frames,
+    so substitutions and event cuts do not create huge fake speeds.
+    """
+    pxy = arrays["player_xy"]
+    pid = arrays["player_id"]
+    ev = arrays["event_idx"]
+    v = np.zeros_like(pxy)
+    if len(pxy) < 3:
+        return v
+
+    ok = (pid[2:] == pid[:-2]) & (ev[2:] == ev[:-2])[:, None]
+    v[1:-1] = np.where(ok[..., None], (pxy[2:] - pxy[:-2]) * (fps / 2.0), 0.0)
+    return np.nan_to_num(v)
+
+
+def iter_space_control(
+    arrays,
+    possession_team_id,
+    *,
+    cell_size=1.0,
+    chunk_frames=64,
+    velocity_weighted=False,
+    reaction_time=0.7,
+    fps=25,
+):
+    """
+    Stream per-frame control grids in chunks of frames.
+
+    Each cell is owned by the player who reaches it first. Without velocity
+    weighting this is a plain Voronoi partition by distance. With it, each
+    player is first projected reaction_time seconds along their velocity and
+    then runs at a common top speed, so players already moving toward a cell
+    win it earlier.
+
+    Yields
+    ------
+    (start, stop, offense_owns)
+        offense_owns : (stop - start, G) float32, 1 where the possessing
+        team controls the cell and 0 where the defense does; NaN for whole
+        frames without a known possession (possession_team_id < 0).
+        Cells are ordered like court_grid.
+    """
+    xs, ys = _grid_axes(cell_size)
+    pxy = arrays["player_xy"]
+    team = arrays["team_id"]
+    poss = np.asarray(possession_team_id)
+    vel = player_velocities(arrays, fps=fps) if velocity_weighted else None
+
+    for start in range(0, len(pxy), chunk_frames):
+        stop = min(start + chunk_frames, len(pxy))
+        p = pxy[start:stop]
+        if vel is not None:
+            p = p + reaction_time * vel[start:stop]
+        # missing players are parked far off court so they never own a cell
+        p = np.nan_to_num(p, nan=1e4)
+
+        # the grid is separable: d^2 = dy^2 (B, ny, N) + dx^2 (B, nx, N).
+        # Keep a running nearest distance per cell over the N player slots
+        # rather than materializing (B, ny, nx, N) and reducing a tiny axis.
+        dx2 = (xs[None, :, None] - p[:, None, :, 0]) ** 2
+        dy2 = (ys[None, :, None] - p[:, None, :, 1]) ** 2
+        is_off = team[start:stop] == poss[start:stop, None]
+
+        # with a common top speed, reach time is monotone in distance
+        best = np.full((stop - start, len(ys), len(xs)), np.inf, dtype=np.float32)
+        off = np.zeros(best.shape, dtype=bool)
+        for j in range(p.shape[1]):
+            d2 = dy2[:, :, None, j] + dx2[:, None, :, j]
+            closer = d2 < best
+            np.copyto(best, d2, where=closer)
+            np.copyto(off, is_off[:, j, None, None], where=closer)
+
+        owns = off.reshape(stop - start, -1).astype(np.float32)
+        owns[poss[start:stop] < 0] = np.nan
+        yield start, stop, owns
+
+
+def space_control(
+    arrays,
+    possession_team_id,
+    *,
+    focus_slot=None,
+    attack_x=None,
+    focus_radius=6.0,
+    cell_size=1.0,
+    chunk_frames=64,
+    velocity_weighted=False,
+    reaction_time=0.7,
+    fps=25,
+):
+    """
+    Per-frame offensive/defensive space-control fractions.
+
+    Parameters
+    ----------
+    arrays : dict
+        Output of src.tracking.tensorize.game_to_arrays.
+    possession_team_id : (F,) array
+        Offense team per frame, e.g. frame_possession(...)["possession_team_id"].
+        Frames with -1 (no possession) get NaN fractions.
+    focus_slot : (F,) int array, optional
+        Player column of the shooter / ball handler (-1 = none). The focus
+        region is centered on that player, or on the ball when -1 or None.
+    attack_x : (F,) array, optional
+        x of the hoop the offense attacks. Defaults to the hoop on the ball's
+        side of half court.
+    focus_radius : float
+        Radius (feet) of the region around the shooter.
+
+    Returns
+    -------
+    dict of (F,) float arrays
+        off_frac_half, def_frac_half, off_frac_focus, def_frac_focus
+    """
+    centers, _ = court_grid(cell_size)
+    F = len(arrays["player_xy"])
+    ball = arrays["ball_xyz"][:, :2]
+
+    if attack_x is None:
+        attack_x = np.where(ball[:, 0] < COURT_LENGTH / 2, HOOP_LEFT_X, HOOP_RIGHT_X)
+    attack_left = np.asarray(attack_x) < COURT_LENGTH / 2
+
+    center = ball.astype(np.float32)
+    if focus_slot is not None:
+        slot = np.asarray(focus_slot)
+        rows = np.arange(F)
+        held = arrays["player_xy"][rows, np.maximum(slot, 0)]
+        center = np.where((slot >= 0)[:, None], held, center)
+
+    cell_left = centers[:, 0] < COURT_LENGTH / 2
+    out = {k: np.full(F, np.nan) for k in ("off_frac_half", "def_frac_half", "off_frac_focus", "def_frac_focus")}
+
+    for start, stop, off in iter_space_control(
+        arrays,
+        possession_team_id,
+        cell_size=cell_size,
+        chunk_frames=chunk_frames,
+        velocity_weighted=velocity_weighted,
+        reaction_time=reaction_time,
+        fps=fps,
+    ):
+        half = cell_left[None, :] == attack_left[start:stop, None]
+        c = center[start:stop]
+        near = ((centers[None, :, 0] - c[:, None, 0]) ** 2
+                + (centers[None, :, 1] - c[:, None, 1]) ** 2) <= focus_radius ** 2
+
+        for name, region in (("half", half), ("focus", near)):
+            n = region.sum(axis=1)
+            n_off = (off * region).sum(axis=1)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                frac = np.where(n > 0, n_off / n, np.nan)
+            out[f"off_frac_{name}"][start:stop] = frac
+            out[f"def_frac_{name}"][start:stop] = 1.0 - frac
+
+    return out
@@ -0,0 +1,197 @@
+# ============================
+# src/models/guard_tightness.py
+# ============================
+import numpy as np
+import pandas as pd
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import Ridge
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from src.data_io.models import save_model, load_model
+
+DEFENSE_COLUMNS = [
+    "close_def_dist_release",
+    "close_def_closing_speed_mean",
+    "def_speed_mean",
+    "def_accel_mean",
+    "shooter_speed_mean",
+    "shooter_accel_mean",
+]
+BASE_COLUMNS = ["xFG_base"]  # shot prior / shooter+location prior
+FEATURE_COLUMNS = BASE_COLUMNS + DEFENSE_COLUMNS
+
+
+def build_residual_model(alpha=1.0):
+    return Pipeline(steps=[
+        ("impute", SimpleImputer(strategy="median")),
+        ("scale", StandardScaler()),
+        ("ridge", Ridge(alpha=alpha)),
+    ])
+
+
+def fit_residual_model(
+    shots_df,
+    feature_columns=FEATURE_COLUMNS,
+    *,
+    alpha=1.0,
+    test_size=0.2,
+    random_state=42,
+    path=None,
+):
+    """
+    Fit the residual model: SHOT_MADE_FLAG - xFG_base ~ features.
+
+    Returns:
+      model: fitted impute/scale/ridge Pipeline
+      meta: dict with feature_columns, alpha, n_train, r2_test
+    If path is given, model + meta are saved there (see load_residual_model).
+    """
+    shots = shots_df.dropna(subset=["SHOT_MADE_FLAG", "xFG_base"])
+    X = shots[list(feature_columns)]
+    y = shots["SHOT_MADE_FLAG"].astype(float) - shots["xFG_base"].astype(float)
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=test_size, random_state=random_state
+    )
+
+    model = build_residual_model(alpha=alpha)
+    model.fit(X_train, y_train)
+
+    meta = {
+        "feature_columns": list(feature_columns),
+        "alpha": float(alpha),
+        "n_train": int(len(X_train)),
+        "r2_test": float(model.score(X_test, y_test)) if len(X_test) else np.nan,
+    }
+    if path is not None:
+        save_model(path, model, meta)
+    return model, meta
+
+
+def load_residual_model(path):
+    return load_model(path)
+
+
+def linear_gradient(model, n_features):
+    """
+    Closed-form d(prediction)/d(feature) for linear models, or None.
+
+    Supports a bare linear estimator with coef_ and Pipelines made of
+    SimpleImputer / StandardScaler steps followed by one. The gradient is
+    constant in x except that imputed (missing) inputs have zero gradient,
+    which callers apply per row.
+    """
+    steps = model.steps if isinstance(model, Pipeline) else [("model", model)]
+    *prep, (_, last) = steps
+
+    coef = getattr(last, "coef_", None)
+    if coef is None or np.ndim(coef) != 1 or len(coef) != n_features:
+        return None
+
+    grad = np.asarray(coef, dtype=float).copy()
+    for _, step in reversed(prep):
+        if isinstance(step, StandardScaler):
+            if step.scale_ is not None:
+                grad = grad / step.scale_
+        elif isinstance(step, SimpleImputer):
+            # all-NaN training columns are dropped by the imputer
+            if np.isnan(step.statistics_).any():
+                return None
+        else:
+            return None
+    return grad
+
+
+def local_sensitivities(
+    model,
+    df,
+    feature_columns=FEATURE_COLUMNS,
+    *,
+    features=("close_def_dist_release",),
+    eps=(0.5,),
+    chunk_size=200_000,
+    closed_form="auto",
+):
+    """
+    Local sensitivities (pred(x + eps * e_f) - pred(x)) / eps for every
+    row, feature f in features and step size in eps.
+
+    Linear models use their closed-form gradient (identical for every eps)
+    unless closed_form=False. Otherwise each chunk of rows is perturbed for
+    all (feature, eps) pairs at once and scored with a single stacked
+    model.predict call, so memory is O(chunk_size * (1 + len(features) * len(eps))).
+
+    Returns a DataFrame indexed like df with one column per pair:
+      sens_<feature>_eps<eps>
+    """
+    feature_columns = list(feature_columns)
+    features = list(features)
+    eps = [float(e) for e in np.atleast_1d(eps)]
+    pairs = [(f, e) for f in features for e in eps]
+    cols = [f"sens_{f}_eps{e:g}" for f, e in pairs]
+    fidx = [feature_columns.index(f) for f in features]
+
+    grad = None
+    if closed_form in ("auto", True):
+        grad = linear_gradient(model, len(feature_columns))
+        if grad is None and closed_form is True:
+            raise ValueError("closed_form=True but model is not a supported linear model")
+
+    out = np.empty((len(df), len(pairs)), dtype=float)
+
+    for start in range(0, len(df), chunk_size):
+        X = df[feature_columns].iloc[start:start + chunk_size].to_numpy(dtype=float)
+        n = len(X)
+
+        if grad is not None:
+            g = grad[fidx][None, :] * ~np.isnan(X[:, fidx])      # (n, F)
+            out[start:start + n] = np.repeat(g, len(eps), axis=1)
+            continue
+
+        # stacked block: [X, X + e_f * eps for every pair] -> one predict call
+        block = np.tile(X, (1 + len(pairs), 1))
+        for k, (f, e) in enumerate(pairs, start=1):
+            block[k * n:(k + 1) * n, feature_columns.index(f)] += e
+
+        pred = model.predict(pd.DataFrame(block, columns=feature_columns)).reshape(1 + len(pairs), n)
+        out[start:start + n] = ((pred[1:] - pred[0]) / np.asarray([e for _, e in pairs])[:, None]).T
+
+    return pd.DataFrame(out, index=df.index, columns=cols)
+
+
+def add_guard_tightness_feature(
+    df,
+    model,
+    feature_columns=FEATURE_COLUMNS,
+    dist_col="close_def_dist_release",
+    eps=0.5,        # small distance perturbation
+    scale=True,
+    chunk_size=200_000,
+):
+    """
+    Guard tightness = xFG_base * d(residual)/d(dist_col).
+
+    Positive sensitivity => giving space increases offensive advantage.
+    Adds guard_tightness, guard_tightness_rank and guard_sensitivity_raw.
+    """
+    sens = local_sensitivities(
+        model, df, feature_columns, features=[dist_col], eps=[eps], chunk_size=chunk_size
+    ).iloc[:, 0].to_numpy()
+
+    # weight by shot danger
+    guard_tightness = df["xFG_base"].to_numpy(dtype=float) * sens
+
+    # optional rescale to something usable
+    if scale:
+        # robust scaling: map to roughly [0, 1]
+        q1, q99 = np.nanpercentile(guard_tightness, [1, 99])
+        if q99 > q1:
+            guard_tightness = np.clip((guard_tightness - q1) / (q99 - q1), 0.0, 1.0)
+
+    out = df.copy()
+    out["guard_tightness"] = guard_tightness
+    out["guard_tightness_rank"] = out["guard_tightness"].rank(method="average", pct=True)
+    out["guard_sensitivity_raw"] = sens
+    return out
@@ -0,0 +1,132 @@
+# ============================
+# src/models/player_priors.py
+# ============================
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+SHOT_ZONES = [
+    "Restricted Area",
+    "In The Paint (Non-RA)",
+    "Mid-Range",
+    "Left Corner 3",
+    "Right Corner 3",
+    "Above the Break 3",
+    "Backcourt",
+]
+
+
+class PlayerPriors:
+    """
+    Empirical-Bayes shooting priors per (PLAYER_ID, SHOT_ZONE_BASIC, is_three).
+
+    Makes/attempts live in dense (players, zones, 2) int64 arrays indexed by
+    integer codes: players by position in a sorted id array, zones by
+    position in self.zones. update() adds new games with one bincount and
+    attach() looks up priors for any number of shots with one gather.
+
+        player_prior = (makes + alpha * league_rate) / (atts + alpha)
+
+    with league_rate used when atts < min_atts or the group is unseen.
+    """
+
+    def __init__(self, zones=SHOT_ZONES):
+        self.zones = list(zones)
+        self.player_ids = np.empty(0, dtype=np.int64)
+        self.makes = np.zeros((0, len(self.zones), 2), dtype=np.int64)
+        self.atts = np.zeros((0, len(self.zones), 2), dtype=np.int64)
+
+    # --- codes ---
+    def _grow(self, player_ids, zones):
+        new_zones = [z for z in pd.unique(zones) if z not in self.zones]
+        if new_zones:
+            pad = ((0, 0), (0, len(new_zones)), (0, 0))
+            self.makes = np.pad(self.makes, pad)
+            self.atts = np.pad(self.atts, pad)
+            self.zones += list(new_zones)
+
+        ids = np.union1d(self.player_ids, player_ids)
+        if len(ids) != len(self.player_ids):
+            rows = np.searchsorted(ids, self.player_ids)
+            makes = np.zeros((len(ids),) + self.makes.shape[1:], dtype=np.int64)
+            atts = np.zeros_like(makes)
+            makes[rows] = self.makes
+            atts[rows] = self.atts
+            self.player_ids, self.makes, self.atts = ids, makes, atts
+
+    def _codes(self, shots):
+        """(player_code, zone_code, is_three); -1 where unknown."""
+        pid = shots["PLAYER_ID"].to_numpy(dtype=np.int64)
+        if len(self.player_ids):
+            p = np.minimum(np.searchsorted(self.player_ids, pid), len(self.player_ids) - 1)
+            p = np.where(self.player_ids[p] == pid, p, -1)
+        else:
+            p = np.full(len(pid), -1, dtype=np.int64)
+
+        z = pd.Categorical(shots["SHOT_ZONE_BASIC"].astype(str), categories=self.zones).codes.astype(np.int64)
+        t = shots["is_three"].to_numpy(dtype=np.int64).clip(0, 1)
+        return p, z, t
+
+    # --- counters ---
+    def update(self, shots: pd.DataFrame) -> "PlayerPriors":
+        """
+        Add makes/attempts from new shots (needs PLAYER_ID, SHOT_ZONE_BASIC,
+        is_three, SHOT_MADE_FLAG). Rows without a made flag are skipped.
+        """
+        shots = shots[shots["SHOT_MADE_FLAG"].notna()]
+        self._grow(shots["PLAYER_ID"].to_numpy(dtype=np.int64), shots["SHOT_ZONE_BASIC"].astype(str))
+
+        p, z, t = self._codes(shots)
+        Z = len(self.zones)
+        flat = (p * Z + z) * 2 + t
+        size = self.atts.size
+
+        self.atts += np.bincount(flat, minlength=size).reshape(self.atts.shape)
+        made = shots["SHOT_MADE_FLAG"].to_numpy(dtype=float)
+        self.makes += np.bincount(flat, weights=made, minlength=size).astype(np.int64).reshape(self.makes.shape)
+        return self
+
+    def league_rate(self) -> float:
+        total = self.atts.sum()
+        return float(self.makes.sum() / total) if total else np.nan
+
+    def table(self, alpha=300, min_atts=30, league_rate=None) -> np.ndarray:
+        """Prior for every (player, zone, is_three) cell, shape like self.atts."""
+        rate = self.league_rate() if league_rate is None else float(league_rate)
+        prior = (self.makes + alpha * rate) / (self.atts + alpha)
+        return np.where(self.atts < min_atts, rate, prior)
+
+    def attach(self, shots: pd.DataFrame, alpha=300, min_atts=30, league_rate=None) -> np.ndarray:
+        """
+        player_prior for each shot (a single vectorized gather).
+        Unseen players or zones get the league rate.
+        """
+        rate = self.league_rate() if league_rate is None else float(league_rate)
+        table = self.table(alpha=alpha, min_atts=min_atts, league_rate=rate)
+
+        p, z, t = self._codes(shots)
+        ok = (p >= 0) & (z >= 0)
+        out = np.full(len(shots), rate, dtype=float)
+        out[ok] = table[p[ok], z[ok], t[ok]]
+        return out
+
+    # --- persistence ---
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(
+            path,
+            zones=np.asarray(self.zones),
+            player_ids=self.player_ids,
+            makes=self.makes,
+            atts=self.atts,
+        )
+
+    @classmethod
+    def load(cls, path):
+        z = np.load(path, allow_pickle=False)
+        obj = cls(zones=[str(s) for s in z["zones"]])
+        obj.player_ids = z["player_ids"]
+        obj.makes = z["makes"]
+        obj.atts = z["atts"]
+        return obj
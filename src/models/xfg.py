@@ -0,0 +1,232 @@
+# ============================
+# src/models/xfg.py
+# ============================
+import hashlib
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.isotonic import IsotonicRegression
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import log_loss, brier_score_loss
+from sklearn.preprocessing import StandardScaler
+
+from src.data_io.models import save_model, load_model
+from src.tracking.coordinates import shot_chart_to_feet
+
+NUM_COLS = ["shot_dist", "angle", "is_three", "is_corner"]
+CAT_COLS = ["SHOT_ZONE_BASIC"]
+
+# date-based split used throughout the 2015-16 season work
+VAL_START = "2016-01-01"
+TEST_START = "2016-02-15"
+
+
+def add_shot_features(shots: pd.DataFrame) -> pd.DataFrame:
+    """
+    Notebook 03 shot-chart feature engineering (feet coords, distance,
+    angle, three/corner flags). Drops shots beyond half court.
+    """
+    shots = shots.copy()
+    shots["x_ft"], shots["y_ft"] = shot_chart_to_feet(shots["LOC_X"], shots["LOC_Y"])
+
+    shots["shot_dist"] = np.sqrt(shots.x_ft**2 + shots.y_ft**2)
+    shots["angle"] = np.arctan2(shots.x_ft, shots.y_ft)
+
+    shots["is_three"] = shots["SHOT_TYPE"].astype(str).str.contains("3PT").astype(int)
+    shots["is_corner"] = ((np.abs(shots.x_ft) > 22) & (shots.y_ft < 14)).astype(int)
+
+    shots["SHOT_ZONE_BASIC"] = shots["SHOT_ZONE_BASIC"].astype(str)
+    shots["GAME_ID"] = shots["GAME_ID"].astype(int)
+
+    shots = shots[(shots["y_ft"] >= -5) & (shots["y_ft"] <= 42)]
+    return shots.reset_index(drop=True)
+
+
+def split_by_date(game_date, val_start=VAL_START, test_start=TEST_START) -> np.ndarray:
+    """
+    'train' before val_start, 'val' before test_start, 'test' after.
+    game_date may be datetimes or GAME_DATE values like 20151027.
+    Unparseable dates get '' and fall in no split.
+    """
+    d = pd.Series(game_date)
+    if not pd.api.types.is_datetime64_any_dtype(d):
+        d = pd.to_datetime(d.astype(str), format="%Y%m%d", errors="coerce")
+
+    return np.select(
+        [d < pd.Timestamp(val_start), d < pd.Timestamp(test_start), d >= pd.Timestamp(test_start)],
+        ["train", "val", "test"],
+        default="",
+    )
+
+
+def iter_shot_chunks(path, chunksize=100_000, columns=None):
+    """
+    Stream a shot table from disk in DataFrame chunks (.csv or .parquet).
+    """
+    path = Path(path)
+    if path.suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize, usecols=columns)
+
+
+def transform_features(artifacts: dict, df: pd.DataFrame) -> np.ndarray:
+    """
+    Scaled numeric + one-hot categorical design matrix. Unknown categories
+    encode as all zeros (OneHotEncoder(handle_unknown='ignore') behavior).
+    """
+    num = df[artifacts["num_cols"]].fillna(0).to_numpy(dtype=float)
+    parts = [artifacts["scaler"].transform(num)]
+
+    for col in artifacts["cat_cols"]:
+        cats = artifacts["categories"][col]
+        codes = pd.Categorical(df[col].astype(str), categories=cats).codes
+        onehot = np.zeros((len(df), len(cats)))
+        known = codes >= 0
+        onehot[np.flatnonzero(known), codes[known]] = 1.0
+        parts.append(onehot)
+
+    return np.hstack(parts)
+
+
+def _cache_key(path, params):
+    st = Path(path).stat()
+    payload = json.dumps({"path": str(Path(path).resolve()), "size": st.st_size,
+                          "mtime": st.st_mtime, **params}, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+
+def fit_xfg_streaming(
+    path,
+    *,
+    num_cols=NUM_COLS,
+    cat_cols=CAT_COLS,
+    chunksize=100_000,
+    n_epochs=5,
+    alpha=1e-5,
+    val_start=VAL_START,
+    test_start=TEST_START,
+    random_state=0,
+    cache_dir="data/processed/models",
+    verbose=False,
+):
+    """
+    Train the xFG baseline out of core from a raw shot-chart file.
+
+    Pass 1 fits the StandardScaler incrementally and collects categories on
+    training rows. The next n_epochs passes train a logistic model with
+    SGD partial_fit. A last pass fits an isotonic calibrator on the
+    validation rows and scores the test rows. Only one chunk is in memory
+    at a time.
+
+    Artifacts are cached under cache_dir keyed by the file identity and
+    all params, chunksize included (SGD depends on the chunking); a second
+    call with the same inputs just loads them. cache_dir=None disables the
+    cache. verbose prints val / test metrics.
+
+    Returns
+    -------
+    artifacts : dict
+        scaler, categories, model, calibrator, num_cols, cat_cols
+    meta : dict
+        params, row counts and val/test log loss / brier
+    """
+    params = {
+        "num_cols": list(num_cols), "cat_cols": list(cat_cols), "n_epochs": n_epochs,
+        "alpha": alpha, "val_start": val_start, "test_start": test_start,
+        "random_state": random_state, "chunksize": chunksize,
+    }
+    cache_path = None if cache_dir is None else Path(cache_dir) / f"xfg_{_cache_key(path, params)}.joblib"
+    if cache_path is not None and cache_path.exists():
+        return load_model(cache_path)
+
+    def chunks():
+        for raw in iter_shot_chunks(path, chunksize=chunksize):
+            df = add_shot_features(raw)
+            df = df[df["SHOT_MADE_FLAG"].notna()]
+            yield df, split_by_date(df["GAME_DATE"], val_start, test_start)
+
+    # pass 1: scaler + categories
+    scaler = StandardScaler()
+    categories = {c: set() for c in cat_cols}
+    n_rows = {"train": 0, "val": 0, "test": 0}
+    for df, split in chunks():
+        for k in n_rows:
+            n_rows[k] += int((split == k).sum())
+        tr = df[split == "train"]
+        if len(tr):
+            scaler.partial_fit(tr[list(num_cols)].fillna(0).to_numpy(dtype=float))
+            for c in cat_cols:
+                categories[c].update(tr[c].astype(str).unique())
+
+    artifacts = {
+        "num_cols": list(num_cols),
+        "cat_cols": list(cat_cols),
+        "scaler": scaler,
+        "categories": {c: sorted(v) for c, v in categories.items()},
+    }
+
+    # passes 2..: incremental logistic regression
+    rng = np.random.default_rng(random_state)
+    model = SGDClassifier(loss="log_loss", alpha=alpha, random_state=random_state)
+    for _ in range(n_epochs):
+        for df, split in chunks():
+            tr = df[split == "train"]
+            if not len(tr):
+                continue
+            order = rng.permutation(len(tr))
+            X = transform_features(artifacts, tr)[order]
+            y = tr["SHOT_MADE_FLAG"].to_numpy(dtype=int)[order]
+            model.partial_fit(X, y, classes=np.array([0, 1]))
+    artifacts["model"] = model
+
+    # last pass: calibrate on val, evaluate on test
+    p_raw = {"val": [], "test": []}
+    y_true = {"val": [], "test": []}
+    for df, split in chunks():
+        for k in ("val", "test"):
+            part = df[split == k]
+            if len(part):
+                p_raw[k].append(model.predict_proba(transform_features(artifacts, part))[:, 1])
+                y_true[k].append(part["SHOT_MADE_FLAG"].to_numpy(dtype=int))
+    p_raw = {k: np.concatenate(v) if v else np.empty(0) for k, v in p_raw.items()}
+    y_true = {k: np.concatenate(v) if v else np.empty(0, dtype=int) for k, v in y_true.items()}
+
+    calibrator = IsotonicRegression(out_of_bounds="clip", y_min=0.0, y_max=1.0)
+    calibrator.fit(p_raw["val"], y_true["val"])
+    artifacts["calibrator"] = calibrator
+
+    meta = {"params": params, "n_rows": n_rows}
+    for k in ("val", "test"):
+        if len(y_true[k]) and len(np.unique(y_true[k])) == 2:
+            p = np.clip(calibrator.predict(p_raw[k]), 1e-6, 1 - 1e-6)
+            meta[f"{k}_log_loss"] = float(log_loss(y_true[k], p))
+            meta[f"{k}_brier"] = float(brier_score_loss(y_true[k], p))
+            if verbose:
+                print(f"{k}: log loss {meta[f'{k}_log_loss']:.4f} | brier {meta[f'{k}_brier']:.4f}")
+
+    if cache_path is not None:
+        save_model(cache_path, artifacts, meta)
+    return artifacts, meta
+
+
+def score_xfg(artifacts: dict, shots: pd.DataFrame, batch_size=500_000) -> pd.DataFrame:
+    """
+    Score shots with features from add_shot_features in vectorized batches.
+    Returns a copy with xFG_base and xPPS_base columns.
+    """
+    xfg = np.empty(len(shots), dtype=float)
+    for start in range(0, len(shots), batch_size):
+        part = shots.iloc[start:start + batch_size]
+        p = artifacts["model"].predict_proba(transform_features(artifacts, part))[:, 1]
+        xfg[start:start + len(part)] = artifacts["calibrator"].predict(p)
+
+    out = shots.copy()
+    out["xFG_base"] = xfg
+    out["xPPS_base"] = xfg * np.where(out["is_three"], 3, 2)
+    return out
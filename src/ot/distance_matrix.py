@@ -0,0 +1,193 @@
+# ============================
+# src/ot/distance_matrix.py
+# ============================
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+import ot
+from ot.gromov import fused_gromov_wasserstein2
+
+from src.ot.gw import structure_matrix
+
+# FGW trade-off used by DistanceProfile.compute_W_matrix
+ALPHA = 1e-3
+
+
+def n_pairs(n):
+    return n * (n - 1) // 2
+
+
+def condensed_index(i, j, n):
+    """
+    Position of pair (i, j), i < j, in a scipy-style condensed distance
+    vector (upper triangle, row major). Works on arrays.
+    """
+    i = np.asarray(i, dtype=np.int64)
+    j = np.asarray(j, dtype=np.int64)
+    return n * i - i * (i + 1) // 2 + (j - i - 1)
+
+
+def condensed_to_pairs(k, n):
+    """Inverse of condensed_index: flat positions -> (i, j) arrays."""
+    k = np.asarray(k, dtype=np.int64)
+    i = (n - 2 - np.floor(np.sqrt(-8 * k + 4 * n * (n - 1) - 7) / 2.0 - 0.5)).astype(np.int64)
+    j = k + i + 1 - n * (n - 1) // 2 + (n - i) * ((n - i) - 1) // 2
+    return i, j
+
+
+def clouds_fingerprint(clouds, **params):
+    """Hash of every cloud's shape and coordinates plus keyword params."""
+    h = hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode())
+    for c in clouds:
+        c = np.ascontiguousarray(c, dtype=np.float64)
+        h.update(str(c.shape).encode())
+        h.update(c.tobytes())
+    return h.hexdigest()[:16]
+
+
+def fgw_distance(X, Y, CX, CY, alpha=ALPHA):
+    """
+    Fused GW distance between two clouds given their structure matrices
+    (structure_matrix, square loss and uniform weights, as in
+    DistanceProfile.compute_W_matrix).
+    """
+    M = ot.dist(X, Y)
+    p = ot.unif(len(X))
+    q = ot.unif(len(Y))
+    return float(fused_gromov_wasserstein2(M, CX, CY, p, q, loss_fun="square_loss", alpha=alpha))
+
+
+# --- worker state (set once per process by the pool initializer) ---
+_CLOUDS = None
+_STRUCTS = None
+
+
+def _init_worker(clouds, structs):
+    global _CLOUDS, _STRUCTS
+    _CLOUDS, _STRUCTS = clouds, structs
+
+
+def _run_chunk(args):
+    chunk_id, start, stop, n, alpha = args
+    i, j = condensed_to_pairs(np.arange(start, stop), n)
+    vals = np.array([
+        fgw_distance(_CLOUDS[a], _CLOUDS[b], _STRUCTS[a], _STRUCTS[b], alpha=alpha)
+        for a, b in zip(i, j)
+    ])
+    return chunk_id, start, stop, vals
+
+
+def _open_store(out_path, n, chunk_size, resume, fingerprint):
+    """
+    Condensed result + per-chunk done flags, both memory-mapped .npy files,
+    plus a .fingerprint.json identifying the clouds and FGW params they
+    belong to.
+    """
+    out_path = Path(out_path)
+    done_path = out_path.with_suffix(".done.npy")
+    fp_path = out_path.with_suffix(".fingerprint.json")
+    n_chunks = -(-n_pairs(n) // chunk_size)
+
+    if resume and out_path.exists() and done_path.exists():
+        stored = json.loads(fp_path.read_text())["fingerprint"] if fp_path.exists() else None
+        if stored != fingerprint:
+            raise ValueError(
+                f"{out_path} was computed for other clouds or parameters "
+                f"(fingerprint {stored} != {fingerprint}); use another out_path or resume=False to overwrite"
+            )
+        D = np.load(out_path, mmap_mode="r+")
+        done = np.load(done_path, mmap_mode="r+")
+        if D.shape == (n_pairs(n),) and done.shape == (n_chunks,):
+            return D, done
+        raise ValueError(
+            f"{out_path} holds {D.shape[0]} pairs / {done.shape[0]} chunks, "
+            f"expected {n_pairs(n)} / {n_chunks}; use resume=False to overwrite"
+        )
+
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    fp_path.write_text(json.dumps({"fingerprint": fingerprint, "n": n, "chunk_size": chunk_size}))
+    D = np.lib.format.open_memmap(out_path, mode="w+", dtype=np.float64, shape=(n_pairs(n),))
+    D[:] = np.nan
+    done = np.lib.format.open_memmap(done_path, mode="w+", dtype=np.uint8, shape=(n_chunks,))
+    done[:] = 0
+    D.flush()
+    done.flush()
+    return D, done
+
+
+def gw_distance_matrix(
+    clouds,
+    out_path,
+    *,
+    alpha=ALPHA,
+    workers=None,
+    chunk_size=512,
+    resume=True,
+    structs=None,
+):
+    """
+    Condensed N x N fused-GW distance matrix over a list of point clouds.
+
+    Each cloud's structure matrix is computed once up front. Only the upper
+    triangle is solved; pairs are split into chunks of chunk_size and
+    spread over a process pool. Finished chunks are written to a
+    memory-mapped .npy at out_path and flagged in a sibling .done.npy, so
+    an interrupted run picks up where it stopped when called again. A
+    sibling .fingerprint.json hashes the clouds, structure matrices, alpha
+    and chunk_size; resuming with anything different raises ValueError
+    instead of returning the old distances. Unfinished pairs are NaN.
+
+    Parameters
+    ----------
+    clouds : list of (n_i, d) arrays
+        E.g. one offense formation per event.
+    out_path : str | Path
+        Result file (condensed vector, scipy.spatial.distance.squareform order).
+    workers : int | None
+        Process count; 1 runs inline. None uses os.cpu_count().
+    structs : list of (n_i, n_i) arrays, optional
+        Precomputed structure matrices (defaults to structure_matrix, the
+        one DistanceProfile.compute_W_matrix uses).
+
+    Returns
+    -------
+    np.memmap
+        Condensed distances, read-only view of out_path.
+    """
+    clouds = [np.asarray(c, dtype=float) for c in clouds]
+    n = len(clouds)
+    if structs is None:
+        structs = [structure_matrix(c) for c in clouds]
+
+    fingerprint = clouds_fingerprint(clouds + [np.asarray(c, dtype=float) for c in structs],
+                                     alpha=alpha, chunk_size=chunk_size, n=n)
+    D, done = _open_store(out_path, n, chunk_size, resume, fingerprint)
+    todo = [
+        (c, c * chunk_size, min((c + 1) * chunk_size, n_pairs(n)), n, alpha)
+        for c in np.flatnonzero(done == 0)
+    ]
+
+    def write(chunk_id, start, stop, vals):
+        D[start:stop] = vals
+        D.flush()
+        done[chunk_id] = 1
+        done.flush()
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        _init_worker(clouds, structs)
+        for args in todo:
+            write(*_run_chunk(args))
+    elif todo:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(clouds, structs)) as pool:
+            futures = [pool.submit(_run_chunk, args) for args in todo]
+            for fut in as_completed(futures):
+                write(*fut.result())
+
+    del D, done
+    return np.load(out_path, mmap_mode="r")
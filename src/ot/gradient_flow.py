@@ -0,0 +1,222 @@
+# ============================
+# src/ot/gradient_flow.py
+# ============================
+import numpy as np
+from scipy.optimize import minimize
+from ot.batch import dist_batch, solve_batch
+
+# Default potential parameters (feet, seconds).
+#   rim        : strength of |x - rim| attraction
+#   repulsion  : strength of the Gaussian spacing kernel between teammates
+#   spacing    : length scale (ft) of that kernel
+#   ball       : strength of |x - ball| attraction (negative repels)
+DEFAULT_PARAMS = {"rim": 1.0, "repulsion": 20.0, "spacing": 8.0, "ball": 0.5}
+FIT_KEYS = ("rim", "repulsion", "spacing", "ball")
+# Fitted on a log scale so they stay positive.
+_LOG_KEYS = ("repulsion", "spacing")
+
+
+def _unit(d):
+    # d / |d| with zero where |d| == 0
+    r = np.sqrt((d ** 2).sum(axis=-1, keepdims=True))
+    return np.divide(d, r, out=np.zeros_like(d), where=r > 1e-9)
+
+
+def potential_gradient(Y, rim, ball=None, params=None):
+    """
+    Per-particle gradient of the formation energy
+
+        F(Y) = mean_i [ rim*|y_i - r| + ball*|y_i - b| ]
+             + repulsion/(2n^2) * sum_{i != j} exp(-|y_i - y_j|^2 / (2 spacing^2))
+
+    scaled by n (each player carries mass 1/n), so it is the velocity field
+    acting on each player.
+
+    Parameters
+    ----------
+    Y : (B, n, 2) array
+    rim : (B, 2) or (2,) array
+        Basket each possession attacks.
+    ball : (B, 2) array, optional
+        Ball position; the ball term is dropped when None.
+    """
+    p = {**DEFAULT_PARAMS, **(params or {})}
+    rim = np.broadcast_to(np.asarray(rim, dtype=float), (Y.shape[0], 2))
+    n = Y.shape[1]
+
+    grad = p["rim"] * _unit(Y - rim[:, None, :])
+    if ball is not None and p["ball"] != 0:
+        grad = grad + p["ball"] * _unit(Y - np.asarray(ball, dtype=float)[:, None, :])
+
+    diff = Y[:, :, None, :] - Y[:, None, :, :]                 # (B, n, n, 2)
+    s2 = p["spacing"] ** 2
+    k = np.exp(-(diff ** 2).sum(axis=-1) / (2 * s2))             # diagonal: diff = 0
+    grad = grad - p["repulsion"] / (n * s2) * (k[..., None] * diff).sum(axis=2)
+    return grad
+
+
+def jko_step(X, rim, ball=None, params=None, *, tau=0.2, epsilon=1.0,
+             inner_iter=3, sinkhorn_iter=50, tol=1e-4):
+    """
+    One entropic JKO step for a batch of uniform particle measures:
+
+        Y = argmin_Y  W_eps(X, Y) / (2 tau) + F(Y)
+
+    solved by the fixed point Y <- T(Y) - tau * grad F(Y), where T is the
+    barycentric projection of the entropic plan from X onto Y (one batched
+    log-domain Sinkhorn over all possessions per inner iteration). Small
+    epsilon keeps players from being blurred toward the team centroid.
+
+    Parameters
+    ----------
+    X : (B, n, 2) array
+        Current formations.
+    tau : float
+        Time step in seconds.
+    epsilon : float
+        Entropic regularization in feet^2.
+
+    Returns
+    -------
+    (B, n, 2) array
+    """
+    X = np.asarray(X, dtype=float)
+    n = X.shape[1]
+    Y = X - tau * potential_gradient(X, rim, ball, params)  # explicit predictor
+    for _ in range(inner_iter):
+        plan = solve_batch(
+            dist_batch(X, Y), reg=epsilon, max_iter=sinkhorn_iter,
+            tol=tol, method="log_sinkhorn",
+        ).plan
+        T = n * np.einsum("bij,bid->bjd", plan, X)
+        Y = T - tau * potential_gradient(Y, rim, ball, params)
+    return Y
+
+
+def sinkhorn_divergence(X, Y, epsilon=1.0, *, sinkhorn_iter=100, tol=1e-4):
+    """
+    Debiased entropic OT cost between batches of uniform point clouds:
+
+        S(X, Y) = W_eps(X, Y) - (W_eps(X, X) + W_eps(Y, Y)) / 2
+
+    using the transport part of each entropic plan, so S(X, X) = 0 and the
+    entropic blur does not hide small displacements. The three problems
+    are solved as one stacked batch. Returns (B,) in feet^2.
+    """
+    X = np.asarray(X, dtype=float)
+    Y = np.asarray(Y, dtype=float)
+    B = X.shape[0]
+    res = solve_batch(
+        dist_batch(np.concatenate([X, X, Y]), np.concatenate([Y, X, Y])),
+        reg=epsilon, max_iter=sinkhorn_iter, tol=tol, method="log_sinkhorn",
+    )
+    v = np.asarray(res.value_linear)
+    return v[:B] - (v[B:2 * B] + v[2 * B:]) / 2
+
+
+def simulate_flow(X0, rim, n_steps, *, ball_seq=None, params=None, tau=0.2, **kwargs):
+    """
+    Roll the JKO flow forward from a batch of starting formations.
+
+    Parameters
+    ----------
+    X0 : (B, n, 2) array
+    rim : (B, 2) or (2,) array
+    n_steps : int
+    ball_seq : (B, n_steps, 2) array, optional
+        Ball position at the start of each step (observed or scripted).
+    kwargs
+        Passed to jko_step (epsilon, inner_iter, ...).
+
+    Returns
+    -------
+    (B, n_steps + 1, n, 2) array, including X0.
+    """
+    X = np.asarray(X0, dtype=float)
+    out = np.empty((X.shape[0], n_steps + 1) + X.shape[1:])
+    out[:, 0] = X
+    for t in range(n_steps):
+        ball = None if ball_seq is None else ball_seq[:, t]
+        X = jko_step(X, rim, ball, params, tau=tau, **kwargs)
+        out[:, t + 1] = X
+    return out
+
+
+def flow_loss(X_seq, rim, *, ball_seq=None, params=None, horizon=1, tau=0.2,
+              epsilon=1.0, **kwargs):
+    """
+    Mean Sinkhorn divergence (feet^2) between simulated and observed
+    formations, starting the flow from every observed frame t and comparing
+    its horizon-step prediction with frame t + horizon. All (possession,
+    start frame) pairs form one batch.
+
+    X_seq : (B, T, n, 2) observed formations sampled every tau seconds.
+    ball_seq : (B, T, 2), optional.
+    """
+    X_seq = np.asarray(X_seq, dtype=float)
+    B, T, n, d = X_seq.shape
+    if T <= horizon:
+        raise ValueError(f"need more than horizon={horizon} frames, got {T}")
+
+    S = T - horizon
+    starts = X_seq[:, :S].reshape(B * S, n, d)
+    target = X_seq[:, horizon:].reshape(B * S, n, d)
+    rim = np.broadcast_to(np.asarray(rim, dtype=float), (B, 2))
+    rim_b = np.repeat(rim, S, axis=0)
+
+    ball_b = None
+    if ball_seq is not None:
+        # ball for the window starting at t: frames t .. t + horizon - 1
+        ball_seq = np.asarray(ball_seq, dtype=float)
+        win = np.stack([ball_seq[:, h:h + S] for h in range(horizon)], axis=2)
+        ball_b = win.reshape(B * S, horizon, 2)
+
+    pred = simulate_flow(starts, rim_b, horizon, ball_seq=ball_b, params=params,
+                         tau=tau, epsilon=epsilon, **kwargs)[:, -1]
+    return float(np.mean(sinkhorn_divergence(pred, target, epsilon=epsilon)))
+
+
+def fit_potentials(X_seq, rim, *, ball_seq=None, init=None, keys=FIT_KEYS,
+                   horizon=1, tau=0.2, epsilon=1.0, max_iter=400, **kwargs):
+    """
+    Fit potential parameters to observed tracking with Nelder-Mead on
+    flow_loss (repulsion and spacing on a log scale). Parameters not in
+    keys stay at their init / default value; ball is fixed at 0 when no
+    ball_seq is given.
+
+    Returns
+    -------
+    params : dict
+    info : dict
+        loss, initial_loss, n_evals, success
+    """
+    base = {**DEFAULT_PARAMS, **(init or {})}
+    keys = list(keys)
+    if ball_seq is None:
+        keys = [k for k in keys if k != "ball"]
+        base["ball"] = 0.0
+
+    logs = np.array([k in _LOG_KEYS for k in keys])
+
+    def unpack(theta):
+        p = dict(base)
+        p.update(zip(keys, np.where(logs, np.exp(theta), theta)))
+        return p
+
+    def objective(theta):
+        return flow_loss(X_seq, rim, ball_seq=ball_seq, params=unpack(theta),
+                         horizon=horizon, tau=tau, epsilon=epsilon, **kwargs)
+
+    x0 = np.array([base[k] for k in keys], dtype=float)
+    x0[logs] = np.log(x0[logs])
+    initial = objective(x0)
+    res = minimize(objective, x0, method="Nelder-Mead",
+                   options={"maxiter": max_iter, "xatol": 1e-3, "fatol": 1e-4})
+
+    info = {
+        "loss": float(res.fun),
+        "initial_loss": initial,
+        "n_evals": int(res.nfev),
+        "success": bool(res.success),
+    }
+    return unpack(res.x), info
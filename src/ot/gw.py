@@ -2,6 +2,26 @@ from ot.gromov import gromov_wasserstein, entropic_gromov_wasserstein, fused_gro
 import numpy as np
 import ot
 
+def pairwise_dist(cloud, ord=2):
+    """
+    Intra-set distance (structure) matrix of a point cloud.
+    cloud shape: (N, D) -> (N, N)
+    """
+    # Using broadcasting: (N, 1, D) - (1, N, D) -> (N, N, D)
+    diff = cloud[:, np.newaxis, :] - cloud[np.newaxis, :, :]
+    # Calculate norm along the last axis (the coordinates)
+    return np.linalg.norm(diff, ord=ord, axis=-1)
+
+
+def structure_matrix(cloud):
+    """
+    Structure matrix used by fused GW here: squared Euclidean distances
+    between the rows of the cloud's pairwise_dist matrix, i.e. between the
+    players' distance profiles. cloud shape: (N, D) -> (N, N)
+    """
+    return ot.dist(pairwise_dist(cloud))
+
+
 # Distance Profile Class
 class DistanceProfile:
     def __init__(self, source, target):
@@ -9,11 +29,7 @@ class DistanceProfile:
         self.target = target
 
     def get_pairwise_dist(self, cloud, ord):
-            # cloud shape: (N, D)
-            # Using broadcasting: (N, 1, D) - (1, N, D) -> (N, N, D)
-            diff = cloud[:, np.newaxis, :] - cloud[np.newaxis, :, :]
-            # Calculate norm along the last axis (the coordinates)
-            return np.linalg.norm(diff, ord=ord, axis=-1)
+        return pairwise_dist(cloud, ord)
 
     def compute_LN_matrix(self,source,target,ord):
         """
@@ -36,14 +52,10 @@ class DistanceProfile:
         n, _ = X.shape
         m, _ = Y.shape
 
-        # Precompute all intra-set distances ||X_i - X_ℓ|| and ||Y_j - Y_ℓ||
-        X_dists = np.linalg.norm(X[:, None, :] - X[None, :, :], axis=2)  # shape (n, n)
-        Y_dists = np.linalg.norm(Y[:, None, :] - Y[None, :, :], axis=2)  # shape (m, m)
-
         # Calculate D(i, j) which is the Gromov-Wasserstein distance between the distributions of distances
         # Gromov-Wasserstein between the two empirical distributions
-        C1 = ot.dist(X_dists)
-        C2 = ot.dist(Y_dists)
+        C1 = structure_matrix(X)
+        C2 = structure_matrix(Y)
         M = ot.dist(X, Y)
         p = ot.unif(n)
         q = ot.unif(m)
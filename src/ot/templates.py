@@ -0,0 +1,247 @@
+# ============================
+# src/ot/templates.py
+# ============================
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import ot
+import pandas as pd
+from ot.gromov import gromov_barycenters, gromov_wasserstein2
+
+from src.ot.distance_matrix import clouds_fingerprint
+from src.ot.gw import structure_matrix
+from src.tracking.possession import frame_possession
+from src.tracking.tensorize import game_slot_tensors, game_to_arrays
+
+# Above this size scoring falls back to one GW solve per (possession,
+# template) pair instead of enumerating node permutations.
+MAX_PERM_SIZE = 6
+
+
+def aligned_formations(tracking_events, frame=0, *, arrays=None, possession_team_id=None):
+    """
+    Offense formation at a fixed frame offset of every event.
+
+    The offense is the team in possession at that frame: possession_team_id
+    (per frame, e.g. the kinematics stage's) when given, else each event's
+    possession_team_id when every event has one, else frame_possession of
+    the game. Labeled events (build_labeled_tracking_events, the season
+    label stage) carry start_type but no possession_team_id.
+
+    Returns
+    -------
+    clouds : list of (n, 2) arrays
+    meta : pd.DataFrame
+        event_idx and start_type ("normal_play" when unlabeled), one row
+        per cloud. Events shorter than frame + 1 or without offense
+        players are skipped.
+    """
+    if arrays is None:
+        arrays = game_to_arrays(tracking_events)
+    if possession_team_id is None and not all(
+        e.get("possession_team_id") is not None for e in tracking_events
+    ):
+        possession_team_id = frame_possession(arrays)["possession_team_id"]
+    slots = game_slot_tensors(tracking_events, arrays=arrays, possession_team_id=possession_team_id)
+    off = slots["event_offsets"]
+
+    clouds, rows = [], []
+    for k, event in enumerate(tracking_events):
+        if off[k + 1] - off[k] <= frame:
+            continue
+        f = off[k] + frame
+        valid = slots["mask"][f, :5]
+        if not valid.any():
+            continue
+        clouds.append(slots["xy"][f, :5][valid].astype(float))
+        rows.append((k, event.get("start_type", "normal_play")))
+    return clouds, pd.DataFrame(rows, columns=["event_idx", "start_type"])
+
+
+def structure_matrices(clouds, cache_path=None):
+    """
+    structure_matrix of every cloud, optionally cached as an .npz (clouds
+    must be equal sized to share one array). The cache stores a
+    fingerprint of the clouds and is recomputed when they differ.
+    """
+    fp = clouds_fingerprint(clouds) if cache_path is not None else None
+    if cache_path is not None and Path(cache_path).exists():
+        z = np.load(cache_path)
+        if "fingerprint" in z and str(z["fingerprint"]) == fp:
+            return z["Cs"]
+    Cs = np.stack([structure_matrix(np.asarray(c, dtype=float)) for c in clouds])
+    if cache_path is not None:
+        Path(cache_path).parent.mkdir(parents=True, exist_ok=True)
+        np.savez(cache_path, Cs=Cs, fingerprint=np.array(fp))
+    return Cs
+
+
+def _group_barycenter(args):
+    """Mini-batch GW barycenter of one group's structure matrices."""
+    Cs, N, batch_size, max_batches, max_iter, seed = args
+    rng = np.random.default_rng(seed)
+    m = len(Cs)
+    order = rng.permutation(m)
+    n_batches = min(max_batches, -(-m // batch_size))
+
+    C, seen = None, 0
+    for b in range(n_batches):
+        idx = order[b * batch_size:(b + 1) * batch_size]
+        batch = [Cs[i] for i in idx]
+        # warm start from the running template so node order stays aligned
+        Cb = gromov_barycenters(
+            N, batch,
+            ps=[ot.unif(len(c)) for c in batch],
+            p=ot.unif(N),
+            lambdas=[1.0 / len(batch)] * len(batch),
+            loss_fun="square_loss",
+            max_iter=max_iter,
+            tol=1e-6,
+            init_C=C,
+            random_state=int(rng.integers(2 ** 31)),
+        )
+        w = len(idx) / (seen + len(idx))
+        C = Cb if C is None else (1 - w) * C + w * Cb
+        seen += len(idx)
+    return C, seen
+
+
+def build_templates(
+    clouds,
+    start_types,
+    clusters=None,
+    *,
+    N=5,
+    min_members=10,
+    batch_size=64,
+    max_batches=8,
+    max_iter=100,
+    workers=None,
+    seed=0,
+    structs=None,
+):
+    """
+    GW barycenter template per start type (and per cluster within it).
+
+    Groups larger than batch_size are processed in up to max_batches random
+    mini-batches; each batch barycenter starts from the running template and
+    is folded into it with weight proportional to batch size. Groups are
+    spread over a process pool.
+
+    Parameters
+    ----------
+    clouds : list of (n_i, 2) arrays
+        Aligned formations (see aligned_formations).
+    start_types : array-like
+        classify_play_start label per cloud.
+    clusters : array-like of int, optional
+        Extra grouping level, e.g. clara(...)["labels"]; -1 when omitted.
+    N : int
+        Template size (nodes).
+    structs : list / array of (n_i, n_i), optional
+        Precomputed structure matrices (see structure_matrices).
+
+    Returns
+    -------
+    dict
+        keys : pd.DataFrame of start_type, cluster, n_members, n_used
+        C    : (T, N, N) template structure matrices
+    """
+    if structs is None:
+        structs = [structure_matrix(np.asarray(c, dtype=float)) for c in clouds]
+    groups = pd.DataFrame({
+        "start_type": np.asarray(start_types),
+        "cluster": -1 if clusters is None else np.asarray(clusters),
+    })
+
+    keys, jobs = [], []
+    grouped = groups.groupby(["start_type", "cluster"], sort=True).indices
+    seeds = np.random.SeedSequence(seed).spawn(len(grouped))
+    for ((st, cl), idx), s in zip(grouped.items(), seeds):
+        if len(idx) < min_members:
+            continue
+        keys.append((st, cl, len(idx)))
+        jobs.append(([structs[i] for i in idx], N, batch_size, max_batches, max_iter, s))
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) <= 1:
+        results = [_group_barycenter(j) for j in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            results = list(pool.map(_group_barycenter, jobs))
+
+    table = pd.DataFrame(keys, columns=["start_type", "cluster", "n_members"])
+    table["n_used"] = [used for _, used in results]
+    C = np.stack([c for c, _ in results]) if results else np.empty((0, N, N))
+    return {"keys": table, "C": C}
+
+
+def save_templates(path, library):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    keys = library["keys"]
+    np.savez_compressed(
+        path,
+        start_type=np.asarray(keys["start_type"], dtype=str),
+        cluster=keys["cluster"].to_numpy(dtype=np.int64),
+        n_members=keys["n_members"].to_numpy(dtype=np.int64),
+        n_used=keys["n_used"].to_numpy(dtype=np.int64),
+        C=library["C"],
+    )
+
+
+def load_templates(path):
+    z = np.load(path, allow_pickle=False)
+    keys = pd.DataFrame({k: z[k] for k in ("start_type", "cluster", "n_members", "n_used")})
+    return {"keys": keys, "C": z["C"]}
+
+
+def score_against_templates(Cs, library, *, block=4096):
+    """
+    Distance from every possession to every template.
+
+    For sizes up to MAX_PERM_SIZE the score is the GW objective restricted
+    to permutation couplings, min_pi mean (C_ij - T_pi(i)pi(j))^2, computed
+    for all possessions at once: the cross term for every (template,
+    permutation) is one matrix multiply. Larger formations fall back to a
+    square-loss GW solve per pair.
+
+    Parameters
+    ----------
+    Cs : (B, n, n) array
+        Structure matrices of the possessions (same n as the templates).
+    library : dict
+        Output of build_templates / load_templates.
+
+    Returns
+    -------
+    scores : (B, T) float array
+    best : (B,) index of the closest template (row of library["keys"])
+    """
+    Cs = np.asarray(Cs, dtype=float)
+    T = np.asarray(library["C"], dtype=float)
+    B, n = Cs.shape[:2]
+    if T.shape[1] != n:
+        raise ValueError(f"templates have {T.shape[1]} nodes, possessions have {n}")
+
+    if n > MAX_PERM_SIZE:
+        p = ot.unif(n)
+        scores = np.array([[gromov_wasserstein2(c, t, p, p, "square_loss") for t in T] for c in Cs])
+        return scores, np.argmin(scores, axis=1)
+
+    perms = np.array(list(itertools.permutations(range(n))))
+    # every template under every node relabeling: (T, P, n*n)
+    Tp = T[:, perms[:, :, None], perms[:, None, :]].reshape(len(T), len(perms), n * n)
+    t_sq = (Tp[:, 0] ** 2).sum(axis=1)                     # permutation invariant
+    Tp = Tp.reshape(-1, n * n).T                            # (n*n, T*P)
+
+    scores = np.empty((B, len(T)))
+    for start in range(0, B, block):
+        X = Cs[start:start + block].reshape(-1, n * n)
+        cross = (X @ Tp).reshape(len(X), len(T), len(perms)).max(axis=2)
+        sq = (X ** 2).sum(axis=1)[:, None] + t_sq[None, :] - 2 * cross
+        scores[start:start + block] = np.maximum(sq, 0.0) / n ** 2
+    return scores, np.argmin(scores, axis=1)
@@ -0,0 +1,111 @@
+# ============================
+# src/ot/temporal.py
+# ============================
+import numpy as np
+import ot
+from ot.gromov import init_matrix, gwggrad, gwloss
+
+from src.ot.gw import pairwise_dist
+
+# Structure matrices are divided by this (feet) before solving so one
+# epsilon works for any formation size; distances are reported in feet^2.
+COURT_SCALE = 47.0
+
+
+def _entropic_gw_step(CX, CY, p, q, G, duals, *, epsilon, max_iter, sinkhorn_iter, tol):
+    """
+    Projected-gradient entropic GW (square loss) from coupling G and
+    Sinkhorn log-potentials duals, as in ot.gromov.entropic_gromov_wasserstein
+    but with both warm starts exposed so they carry across frames.
+    """
+    constC, hC1, hC2 = init_matrix(CX, CY, p, q, "square_loss")
+    n_iter = 0
+    for n_iter in range(1, max_iter + 1):
+        tens = gwggrad(constC, hC1, hC2, G)
+        G_new, log = ot.sinkhorn(
+            p, q, tens, epsilon,
+            method="sinkhorn_log",
+            numItermax=sinkhorn_iter,
+            stopThr=tol,
+            warmstart=duals,
+            log=True,
+            warn=False,
+        )
+        duals = (log["log_u"], log["log_v"])
+        err = np.linalg.norm(G_new - G)
+        G = G_new
+        if err < tol:
+            break
+    return G, duals, float(gwloss(constC, hC1, hC2, G)), n_iter
+
+
+def temporal_gw(
+    X_seq,
+    Y_seq,
+    *,
+    epsilon=5e-3,
+    max_iter=5,
+    sinkhorn_iter=20,
+    tol=1e-5,
+    warm_start=True,
+    scale=COURT_SCALE,
+):
+    """
+    Entropic GW between two formations at every frame, warm started.
+
+    Consecutive 25 Hz frames are nearly identical, so frame t's solve starts
+    from frame t-1's coupling and Sinkhorn potentials and usually converges
+    in one or two projected-gradient steps. max_iter caps the outer steps
+    and sinkhorn_iter the inner ones; the first frame (or every frame when
+    warm_start=False) gets ten times both budgets.
+
+    Parameters
+    ----------
+    X_seq : (T, n, d) array
+        E.g. offense positions per frame.
+    Y_seq : (T, m, d) or (m, d) array
+        Defense positions per frame, or a fixed template formation.
+    epsilon : float
+        Entropic regularization on the scaled structure matrices.
+
+    Returns
+    -------
+    dict
+        couplings : (T, n, m)
+        distances : (T,) entropic GW cost in feet^2
+        n_iter    : (T,) outer iterations used per frame
+    """
+    X_seq = np.asarray(X_seq, dtype=float)
+    Y_seq = np.asarray(Y_seq, dtype=float)
+    T, n = X_seq.shape[:2]
+    fixed_y = Y_seq.ndim == 2
+
+    p = ot.unif(n)
+    q = ot.unif(Y_seq.shape[-2])
+    CY = pairwise_dist(Y_seq) / scale if fixed_y else None
+
+    couplings = np.empty((T, n, len(q)))
+    distances = np.empty(T)
+    n_iter = np.zeros(T, dtype=int)
+    G, duals = None, None
+
+    for t in range(T):
+        CX = pairwise_dist(X_seq[t]) / scale
+        C2 = CY if fixed_y else pairwise_dist(Y_seq[t]) / scale
+
+        cold = G is None or not warm_start
+        if cold:
+            G, duals = np.outer(p, q), None
+        budget = 10 if cold else 1
+
+        G, duals, d, n_iter[t] = _entropic_gw_step(
+            CX, C2, p, q, G, duals,
+            epsilon=epsilon,
+            max_iter=max_iter * budget,
+            sinkhorn_iter=sinkhorn_iter * budget,
+            tol=tol,
+        )
+        couplings[t] = G
+        distances[t] = d * scale ** 2
+
+    return {"couplings": couplings, "distances": distances, "n_iter": n_iter}
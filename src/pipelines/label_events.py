@@ -9,30 +9,78 @@ from src.processing.indexing import build_tracking_time_index
 from src.processing.pbp.restart_detection import detect_restart_triggers
 from src.processing.pbp.alignment import align_pbp_to_tracking_by_clock
 from src.processing.play_start_classifier import classify_play_start
+from src.tracking.tensorize import game_to_arrays
+from src.tracking.possession import frame_possession
+from src.tracking.coordinates import cached_attack_table, event_attack_x
 from src.utils.casting import timestring_to_seconds
 
 
+def prepare_game_pbp(pbp: pd.DataFrame, game_id: int) -> pd.DataFrame:
+    """One game's PBP with game_clock (seconds) and restart triggers."""
+    pbp_g = pbp.loc[pbp["GAME_ID"].astype(int) == int(game_id)].copy()
+    pbp_g = pbp_g.reset_index(drop=True)  # avoid EVENTNUM index/column ambiguity
+    pbp_g["game_clock"] = pbp_g["PCTIMESTRING"].apply(timestring_to_seconds)
+
+    # drop admin/junk if you want
+    pbp_g = pbp_g[pbp_g["EVENTMSGTYPE"] != 18].copy()
+    return detect_restart_triggers(pbp_g)
+
+
+def attach_attack_x(tracking_events: list[dict], arrays: dict, possession_team_id, attack: pd.DataFrame) -> None:
+    """Set ev["attack_x"] (basket attacked at the event's first frame) in place."""
+    for ev, ax in zip(tracking_events, event_attack_x(arrays, possession_team_id, attack)):
+        ev["attack_x"] = None if pd.isna(ax) else float(ax)
+
+
+def assign_start_types(tracking_events: list[dict], pbp_aligned: pd.DataFrame) -> list[dict]:
+    """
+    Set 'start_type' on tracking events from the aligned PBP (in place).
+    """
+    # Choose ONE representative pbp row per event_list_idx: smallest align_center_diff
+    pbp_ev = pbp_aligned.dropna(subset=["event_list_idx"]).copy()
+    pbp_ev["event_list_idx"] = pbp_ev["event_list_idx"].astype(int)
+    pbp_ev["align_center_diff"] = (
+    pd.to_numeric(pbp_ev["align_center_diff"], errors="coerce")
+      .fillna(1e9))
+
+
+    rep = (
+        pbp_ev.sort_values(["event_list_idx", "align_center_diff"])
+              .groupby("event_list_idx", as_index=False)
+              .head(1)
+    )
+
+    for _, row in rep.iterrows():
+        ev_idx = int(row["event_list_idx"])
+        st = classify_play_start(
+            tracking_events[ev_idx],
+            restart_trigger=row.get("restart_trigger"),
+        )
+        tracking_events[ev_idx]["start_type"] = st
+
+    return tracking_events
+
+
 def build_labeled_tracking_events(
     game: dict,
     pbp: pd.DataFrame,
     *,
     span_pad: float = 2.0,
     max_center_diff: float = 10.0,
+    coords_cache_dir: str | None = None,
 ) -> Tuple[list[dict], pd.DataFrame]:
     """
     End-to-end:
       raw SportVU + raw PBP -> tracking_events with 'start_type' and aligned pbp table.
+
+    coords_cache_dir (e.g. "data/processed/coords") shares the inferred
+    attacking-basket table with other consumers; None infers it in place.
     """
 
     game_id = int(game["gameid"])
 
-    # ---- PBP for this game (keep as DataFrame!) ----
-    pbp_g = pbp.loc[pbp["GAME_ID"].astype(int) == game_id].copy()
-    pbp_g = pbp_g.reset_index(drop=True)  # avoid EVENTNUM index/column ambiguity
-    pbp_g["game_clock"] = pbp_g["PCTIMESTRING"].apply(timestring_to_seconds)
-
-    # drop admin/junk if you want
-    pbp_g = pbp_g[pbp_g["EVENTMSGTYPE"] != 18].copy()
+    # ---- PBP for this game (keep as DataFrame!), with restart triggers ----
+    pbp_g = prepare_game_pbp(pbp, game_id)
 
     # ---- Tracking events from raw ----
     tracking_events = raw_sportvu_to_tracking_events(game)
@@ -40,9 +88,13 @@ def build_labeled_tracking_events(
 
     tracking_time_index = build_tracking_time_index(tracking_events)
 
-    # ---- Restart triggers + alignment ----
-    pbp_g = detect_restart_triggers(pbp_g)
+    # ---- Attacking basket per (period, team), optionally shared through the coords cache ----
+    arrays = game_to_arrays(tracking_events)
+    poss = frame_possession(arrays)["possession_team_id"]
+    attack = cached_attack_table(game_id, arrays, poss, cache_dir=coords_cache_dir)
+    attach_attack_x(tracking_events, arrays, poss, attack)
 
+    # ---- Alignment ----
     pbp_aligned = align_pbp_to_tracking_by_clock(
         pbp_g,
         tracking_time_index,
@@ -52,26 +104,6 @@ def build_labeled_tracking_events(
     )
 
     # ---- Assign start_type onto tracking events ----
-    # Choose ONE representative pbp row per event_list_idx: smallest align_center_diff
-    pbp_ev = pbp_aligned.dropna(subset=["event_list_idx"]).copy()
-    pbp_ev["event_list_idx"] = pbp_ev["event_list_idx"].astype(int)
-    pbp_ev["align_center_diff"] = (
-    pd.to_numeric(pbp_ev["align_center_diff"], errors="coerce")
-      .fillna(1e9))
-
-
-    rep = (
-        pbp_ev.sort_values(["event_list_idx", "align_center_diff"])
-              .groupby("event_list_idx", as_index=False)
-              .head(1)
-    )
-
-    for _, row in rep.iterrows():
-        ev_idx = int(row["event_list_idx"])
-        st = classify_play_start(
-            tracking_events[ev_idx],
-            restart_trigger=row.get("restart_trigger"),
-        )
-        tracking_events[ev_idx]["start_type"] = st
+    assign_start_types(tracking_events, pbp_aligned)
 
     return tracking_events, pbp_aligned
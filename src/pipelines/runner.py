@@ -0,0 +1,542 @@
+# ============================
+# src/pipelines/runner.py
+# ============================
+import hashlib
+import inspect
+import json
+import os
+import time
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import joblib
+import pandas as pd
+
+from src.utils import instrumentation as inst
+
+REPORT_COLUMNS = ["stage", "game_id", "key", "status", "seconds", "counts", "error"]
+
+
+class Stage:
+    """
+    One pipeline step with explicit inputs.
+
+    Parameters
+    ----------
+    name : str
+    fn : module-level callable (picklable for worker processes)
+        per_game: fn(game_id, **inputs, **params), plus source=<raw path>
+        when uses_source. Otherwise fn(**inputs, **params), where a
+        per-game input arrives as a lazy {game_id: value} mapping.
+    inputs : tuple of str
+        Upstream stage names; their values are passed under those names.
+    params : dict
+        Keyword arguments; pathlib.Path values are hashed by file identity
+        (path, size, mtime) so an edited input file invalidates the stage.
+    per_game : bool
+        Run once per game (in parallel) instead of once per season.
+    partitioned : bool
+        Season stage returning {game_id: value}; each partition is stored
+        separately and per-game consumers load only their own.
+    version : str
+        Bump to invalidate artifacts when helpers called by fn change (fn's
+        own source is already part of the key).
+    count : callable, optional
+        value -> {unit: n} (e.g. {"frames": 51234}), reported per run for
+        throughput; module-level like fn.
+    """
+
+    def __init__(self, name, fn, inputs=(), *, params=None, per_game=False, partitioned=False,
+                 uses_source=False, version="1", count=None):
+        if per_game and partitioned:
+            raise ValueError(f"stage {name!r}: per_game and partitioned are exclusive")
+        self.name = name
+        self.fn = fn
+        self.inputs = tuple(inputs)
+        self.params = dict(params or {})
+        self.per_game = per_game
+        self.partitioned = partitioned
+        self.uses_source = uses_source
+        self.version = str(version)
+        self.count = count
+
+    def code_hash(self):
+        try:
+            src = inspect.getsource(self.fn)
+        except (OSError, TypeError):
+            src = f"{self.fn.__module__}.{self.fn.__qualname__}"
+        return hashlib.sha1(f"{src}\n{self.version}".encode()).hexdigest()[:16]
+
+
+def _file_identity(path):
+    p = Path(path)
+    if not p.exists():
+        return {"path": str(p), "missing": True}
+    st = p.stat()
+    return {"path": str(p.resolve()), "size": st.st_size, "mtime": st.st_mtime}
+
+
+def _jsonable(v):
+    if isinstance(v, Path):
+        return _file_identity(v)
+    if isinstance(v, dict):
+        return {str(k): _jsonable(x) for k, x in v.items()}
+    if isinstance(v, (list, tuple)):
+        return [_jsonable(x) for x in v]
+    return v
+
+
+class ArtifactStore:
+    """
+    Content-addressed artifacts: root/<stage>/<key>.joblib (partitions in
+    root/<stage>/<key>/<game_id>.joblib) with a .json sidecar. Writes go to
+    a temp file first and are renamed, so a crash never leaves a partial
+    artifact that looks fresh.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def path(self, stage, key, game_id=None):
+        base = self.root / stage / key
+        return base / f"{game_id}.joblib" if game_id is not None else base.with_suffix(".joblib")
+
+    def exists(self, stage, key, game_id=None):
+        return self.path(stage, key, game_id).exists()
+
+    def load(self, stage, key, game_id=None):
+        return joblib.load(self.path(stage, key, game_id))
+
+    def save(self, stage, key, value, game_id=None, meta=None):
+        path = self.path(stage, key, game_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + f".tmp{os.getpid()}")
+        joblib.dump(value, tmp)
+        os.replace(tmp, path)
+        if meta is not None:
+            path.with_suffix(".json").write_text(json.dumps(meta, indent=1, default=str))
+
+
+class GameArtifacts(Mapping):
+    """Read-only {game_id: artifact} view that loads each value on access."""
+
+    def __init__(self, store, stage, keys, partitioned_key=None):
+        self._store, self._stage = store, stage
+        self._keys = keys                      # game_id -> key (per-game stage)
+        self._pkey = partitioned_key           # single key (partitioned stage)
+
+    def __getitem__(self, game_id):
+        if game_id not in self._keys:
+            raise KeyError(game_id)
+        if self._pkey is not None:
+            return self._store.load(self._stage, self._pkey, game_id)
+        return self._store.load(self._stage, self._keys[game_id])
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+
+def _run_game_task(store_root, stage, game_id, key, input_refs, source, instrument=False):
+    """
+    Worker: load one game's inputs, run the stage, store the result.
+
+    Returns (seconds, counts, metrics snapshot or None, error or None).
+    With instrument the game is recorded into a fresh registry (counters
+    raised inside stage.fn, wall time, peak memory) for the parent to
+    merge. A failing game returns its error instead of raising, so the
+    counters it raised before failing reach the parent too.
+    """
+    if not instrument:
+        try:
+            return (*_game_task(store_root, stage, game_id, key, input_refs, source), None, None)
+        except Exception as e:
+            return 0.0, {}, None, repr(e)
+    seconds, counts, error = 0.0, {}, None
+    with inst.recording(trace_memory=instrument == "trace") as m:
+        with inst.track_game(game_id, stage=stage.name):
+            try:
+                seconds, counts = _game_task(store_root, stage, game_id, key, input_refs, source)
+            except Exception as e:
+                error = repr(e)
+    return seconds, counts, m.snapshot(), error
+
+
+def _game_task(store_root, stage, game_id, key, input_refs, source):
+    store = ArtifactStore(store_root)
+    kwargs = {}
+    for name, (stage_name, in_key, part) in input_refs.items():
+        if part and not store.exists(stage_name, in_key, game_id):
+            kwargs[name] = None                # game absent from a partitioned input
+        else:
+            kwargs[name] = store.load(stage_name, in_key, game_id if part else None)
+    if stage.uses_source:
+        kwargs["source"] = source
+    t0 = time.perf_counter()
+    value = stage.fn(game_id, **kwargs, **stage.params)
+    seconds = time.perf_counter() - t0
+    counts = stage.count(value) if stage.count is not None else {}
+    store.save(stage.name, key, value, meta={"stage": stage.name, "game_id": game_id, "seconds": seconds,
+                                             "counts": counts, "created": time.time()})
+    return seconds, counts
+
+
+def _limit_worker_memory(nbytes):
+    """Pool initializer: cap the worker's address space so one huge game fails alone."""
+    import resource
+    resource.setrlimit(resource.RLIMIT_AS, (nbytes, nbytes))
+
+
+class PipelineRunner:
+    """
+    Resumable runner for a DAG of Stages over a set of games.
+
+    Every artifact is addressed by a hash of the stage code (fn source and
+    version), its params (file identity for Path params) and the keys of
+    its inputs, so:
+
+    - a stage whose artifact exists is fresh and skipped;
+    - changing code, params or an upstream artifact re-runs exactly the
+      stages downstream of the change;
+    - after a crash, re-running resumes from the stored artifacts
+      (per-game work finished before the crash is kept).
+
+    Per-game stages run across games on a process pool. A game that fails
+    in a stage is skipped by that stage's dependents ("skipped_upstream_failed")
+    while every other game carries on; season stages fed by per-game stages
+    aggregate the games that succeeded, and the excluded games are part of
+    their key, so fixing the game re-runs the aggregate.
+
+    Parameters
+    ----------
+    stages : list of Stage
+    games : dict
+        game_id -> raw source path, passed to stages with uses_source.
+    root : str or Path
+        Artifact store directory.
+    worker_memory : int, optional
+        Address-space limit (bytes) per worker process (POSIX only); a game
+        exceeding it fails with MemoryError instead of exhausting the host.
+    metrics : instrumentation.Metrics, optional
+        Registry receiving the wall time of each stage that ran
+        ("stage:<name>"; timer <name> sums its per-game seconds), stage.count
+        units (counter <unit>, key <stage>), per-game time and peak memory
+        and the counters raised inside stage functions, including those in
+        worker processes. Metrics(trace_memory=True) measures per-game peak
+        allocations with tracemalloc instead of the process peak RSS.
+    """
+
+    def __init__(self, stages, games, root="data/pipeline", workers=None, worker_memory=None,
+                 metrics=None):
+        self.stages = {s.name: s for s in stages}
+        if len(self.stages) != len(stages):
+            raise ValueError("duplicate stage names")
+        for s in stages:
+            missing = [i for i in s.inputs if i not in self.stages]
+            if missing:
+                raise ValueError(f"stage {s.name!r} has unknown inputs {missing}")
+        self.games = {int(g): p for g, p in games.items()}
+        self.store = ArtifactStore(root)
+        self.workers = workers or os.cpu_count() or 1
+        self.worker_memory = worker_memory
+        self.metrics = metrics
+        self.order = self._toposort()
+        self._keys = {}
+        self._bad = {}          # stage -> game ids failed / skipped in the last run
+        self.failures = []      # (stage, game_id, error) of the last run
+        self.stage_seconds = {}  # stage -> wall seconds in the last run
+
+    def _toposort(self):
+        order, state = [], {}
+
+        def visit(name, path):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "active":
+                raise ValueError(f"cycle in pipeline: {' -> '.join(path + [name])}")
+            state[name] = "active"
+            for i in self.stages[name].inputs:
+                visit(i, path + [name])
+            state[name] = "done"
+            order.append(name)
+
+        for name in self.stages:
+            visit(name, [])
+        return order
+
+    def plan(self, targets=None):
+        """Stages needed for targets (with upstream), in run order."""
+        if targets is None:
+            return list(self.order)
+        targets = [targets] if isinstance(targets, str) else list(targets)
+        unknown = [t for t in targets if t not in self.stages]
+        if unknown:
+            raise ValueError(f"unknown targets {unknown}")
+        need, stack = set(), list(targets)
+        while stack:
+            n = stack.pop()
+            if n not in need:
+                need.add(n)
+                stack.extend(self.stages[n].inputs)
+        return [n for n in self.order if n in need]
+
+    # --- keys ---
+    def key(self, name, game_id=None):
+        """Artifact key of a stage (per game for per-game stages)."""
+        s = self.stages[name]
+        cache_key = (name, game_id if s.per_game else None)
+        if cache_key in self._keys:
+            return self._keys[cache_key]
+
+        inputs = {}
+        for i in s.inputs:
+            up = self.stages[i]
+            if up.per_game and s.per_game:
+                inputs[i] = self.key(i, game_id)
+            elif up.per_game:
+                inputs[i] = {str(g): self.key(i, g) for g in self._ok_games(i)}
+            else:
+                inputs[i] = self.key(i)
+        payload = {
+            "stage": name,
+            "code": s.code_hash(),
+            "params": _jsonable(s.params),
+            "inputs": inputs,
+        }
+        if s.per_game:
+            payload["game_id"] = game_id
+            if s.uses_source:
+                payload["source"] = _file_identity(self.games[game_id])
+        key = hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()[:16]
+        self._keys[cache_key] = key
+        return key
+
+    def _ok_games(self, name):
+        """Games of a per-game stage that did not fail / get skipped in the last run."""
+        bad = self._bad.get(name, ())
+        return [g for g in sorted(self.games) if g not in bad]
+
+    # --- loading ---
+    def load(self, name, game_id=None):
+        """Stored value of a stage (one game's value for per-game / partitioned stages)."""
+        s = self.stages[name]
+        if s.per_game:
+            if game_id is None:
+                return GameArtifacts(self.store, name, {g: self.key(name, g) for g in self._ok_games(name)})
+            return self.store.load(name, self.key(name, int(game_id)))
+        if s.partitioned:
+            if game_id is None:
+                return GameArtifacts(self.store, name, self._partitions(name), self.key(name))
+            return self.store.load(name, self.key(name), int(game_id))
+        return self.store.load(name, self.key(name))
+
+    def _partitions(self, name):
+        d = self.store.root / name / self.key(name)
+        return {int(p.stem): None for p in d.glob("*.joblib")} if d.exists() else {}
+
+    def _season_inputs(self, s):
+        kwargs = {}
+        for i in s.inputs:
+            up = self.stages[i]
+            if up.per_game:
+                kwargs[i] = GameArtifacts(self.store, i, {g: self.key(i, g) for g in self._ok_games(i)})
+            elif up.partitioned:
+                kwargs[i] = GameArtifacts(self.store, i, self._partitions(i), self.key(i))
+            else:
+                kwargs[i] = self.store.load(i, self.key(i))
+        return kwargs
+
+    # --- running ---
+    def _run_season(self, s):
+        key = self.key(s.name)
+        done = (self.store.root / s.name / key / "_complete").exists() if s.partitioned \
+            else self.store.exists(s.name, key)
+        if done:
+            return "cached", 0.0, {}
+
+        t0 = time.perf_counter()
+        if self.metrics is None:
+            value = s.fn(**self._season_inputs(s), **s.params)
+        else:
+            with inst.recording(self.metrics.trace_memory) as m:
+                try:
+                    value = s.fn(**self._season_inputs(s), **s.params)
+                finally:
+                    self.metrics.merge(m.snapshot())
+        seconds = time.perf_counter() - t0
+        counts = s.count(value) if s.count is not None else {}
+        meta = {"stage": s.name, "seconds": seconds, "counts": counts, "created": time.time()}
+        if s.partitioned:
+            for g, part in value.items():
+                self.store.save(s.name, key, part, game_id=int(g))
+            # marker written last: a crash mid-way re-runs the split
+            (self.store.root / s.name / key / "_complete").write_text(json.dumps(meta))
+        else:
+            self.store.save(s.name, key, value, meta=meta)
+        return "ran", seconds, counts
+
+    def _game_jobs(self, s, skip=()):
+        jobs = []
+        for g in sorted(self.games):
+            if g in skip:
+                continue
+            key = self.key(s.name, g)
+            if self.store.exists(s.name, key):
+                continue
+            refs = {}
+            for i in s.inputs:
+                up = self.stages[i]
+                if up.per_game:
+                    refs[i] = (i, self.key(i, g), False)
+                elif up.partitioned:
+                    refs[i] = (i, self.key(i), True)
+                else:
+                    refs[i] = (i, self.key(i), False)
+            jobs.append((g, key, refs))
+        return jobs
+
+    # --- metrics ---
+    def _game_result(self, g, key, sec, counts, snapshot, error, failed):
+        """Merge a game's metrics (failed games included) and build its result tuple."""
+        if self.metrics is not None and snapshot is not None:
+            self.metrics.merge(snapshot)
+        if error is not None:
+            failed.append(g)
+            return g, key, "failed", 0.0, {}, error
+        return g, key, "ran", sec, counts, None
+
+    def _record(self, name, t_start, counts, failed=0):
+        """Stage wall time, stage.count units and failed games into self.metrics."""
+        if self.metrics is None:
+            return
+        self.metrics.add_time(f"stage:{name}", time.perf_counter() - t_start)
+        for c in counts:
+            for unit, n in c.items():
+                self.metrics.add_count(unit, name, n)
+        if failed:
+            self.metrics.add_count("failed_games", name, failed)
+
+    @property
+    def n_failed(self):
+        """Failed stages / games in the last run (skipped dependents not included)."""
+        return len(self.failures)
+
+    def run(self, targets=None, *, verbose=True, raise_on_failure=False):
+        """
+        Bring targets (default: every stage) and their upstream stages up
+        to date.
+
+        A failing game (or season stage) does not stop the run: it is
+        recorded as "failed", its dependents as "skipped_upstream_failed",
+        and everything else runs. Artifacts of what succeeded are kept, so
+        a re-run only retries the failures.
+
+        Returns
+        -------
+        pd.DataFrame
+            REPORT_COLUMNS, one row per stage run (per game for per-game
+            stages); status is "ran", "cached", "failed" or
+            "skipped_upstream_failed". self.failures / self.n_failed
+            summarize the failures.
+
+        Raises
+        ------
+        RuntimeError
+            With raise_on_failure, after the whole run if anything failed.
+        """
+        self._keys = {}        # file identities may have changed since the last call
+        self._bad = {}
+        self.failures = []
+        self.stage_seconds = {}
+        dead = set()           # season stages failed / skipped in this run
+        rows = []
+        names = self.plan(targets)
+        pool = None
+        try:
+            for name in names:
+                s = self.stages[name]
+                t_stage = time.perf_counter()
+                # games whose inputs failed; a failed season input takes out every game
+                skip = set()
+                for i in s.inputs:
+                    skip |= self._bad.get(i, set())
+                upstream_dead = any(i in dead for i in s.inputs)
+                if upstream_dead:
+                    skip = set(self.games)
+                if not s.per_game:
+                    if upstream_dead:
+                        dead.add(name)
+                        self._bad[name] = skip
+                        rows.append({"stage": name, "game_id": None, "key": None,
+                                     "status": "skipped_upstream_failed", "seconds": 0.0, "counts": {},
+                                     "error": None})
+                        if verbose:
+                            print(f"[{name}] skipped_upstream_failed")
+                        continue
+                    self._bad[name] = skip
+                    try:
+                        status, sec, counts = self._run_season(s)
+                        error = None
+                    except Exception as e:
+                        status, sec, counts, error = "failed", 0.0, {}, repr(e)
+                        dead.add(name)
+                        self._bad[name] = set(self.games)
+                        self.failures.append((name, None, error))
+                    if status == "ran":
+                        self._record(name, t_stage, [counts])
+                    rows.append({"stage": name, "game_id": None, "key": self.key(name),
+                                 "status": status, "seconds": sec, "counts": counts, "error": error})
+                    self.stage_seconds[name] = time.perf_counter() - t_stage
+                    if verbose:
+                        print(f"[{name}] {status} ({sec:.1f}s)" + (f": {error}" if error else ""))
+                    continue
+
+                jobs = self._game_jobs(s, skip)
+                fresh = {g for g, _, _ in jobs}
+                stage_rows = [{"stage": name, "game_id": g, "key": None, "status": "skipped_upstream_failed",
+                               "seconds": 0.0, "counts": {}, "error": None} for g in skip]
+                stage_rows += [{"stage": name, "game_id": g, "key": self.key(name, g), "status": "cached",
+                                "seconds": 0.0, "counts": {}, "error": None}
+                               for g in self.games if g not in fresh and g not in skip]
+                failed = []
+                instrument = False if self.metrics is None else ("trace" if self.metrics.trace_memory else True)
+                if jobs and self.workers > 1 and len(jobs) > 1:
+                    if pool is None:
+                        limit = (_limit_worker_memory, (self.worker_memory,)) if self.worker_memory else (None, ())
+                        pool = ProcessPoolExecutor(max_workers=self.workers, initializer=limit[0],
+                                                   initargs=limit[1])
+                    futs = {pool.submit(_run_game_task, str(self.store.root), s, g, key, refs,
+                                        self.games[g], instrument): (g, key) for g, key, refs in jobs}
+                    results = []
+                    for f in as_completed(futs):
+                        g, key = futs[f]
+                        try:
+                            sec, counts, snap, err = f.result()
+                        except Exception as e:         # worker died (e.g. BrokenProcessPool)
+                            sec, counts, snap, err = 0.0, {}, None, repr(e)
+                        results.append(self._game_result(g, key, sec, counts, snap, err, failed))
+                else:
+                    results = []
+                    for g, key, refs in jobs:
+                        res = _run_game_task(str(self.store.root), s, g, key, refs, self.games[g], instrument)
+                        results.append(self._game_result(g, key, *res, failed))
+                stage_rows += [{"stage": name, "game_id": g, "key": key, "status": st, "seconds": sec,
+                                "counts": c, "error": err} for g, key, st, sec, c, err in results]
+                rows += sorted(stage_rows, key=lambda r: r["game_id"])
+                self.failures += [(name, g, err) for g, _, st, _, _, err in results if st == "failed"]
+                self._bad[name] = skip | set(failed)
+                if jobs:
+                    self._record(name, t_stage, [r[4] for r in results], failed=len(failed))
+                self.stage_seconds[name] = time.perf_counter() - t_stage
+                if verbose:
+                    print(f"[{name}] ran {len(jobs) - len(failed)}, cached {len(self.games) - len(jobs) - len(skip)}, "
+                          f"failed {len(failed)}, skipped {len(skip)}")
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        if raise_on_failure and self.failures:
+            raise RuntimeError(f"{len(self.failures)} failures, e.g. {self.failures[:3]}")
+        return pd.DataFrame(rows, columns=REPORT_COLUMNS)
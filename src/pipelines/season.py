@@ -0,0 +1,202 @@
+# ============================
+# src/pipelines/season.py
+# ============================
+from pathlib import Path
+
+import pandas as pd
+
+from src.data_io.maps import stack_maps
+from src.data_io.save_load import load_json
+from src.features.defense_features import compute_defense_features_for_shots
+from src.features.ist import add_ist_column
+from src.features.shot_maps import build_player_maps
+from src.features.space_control import player_velocities
+from src.models.xfg import add_shot_features, fit_xfg_streaming, iter_shot_chunks, score_xfg
+from src.pipelines.label_events import assign_start_types, attach_attack_x, prepare_game_pbp
+from src.pipelines.runner import PipelineRunner, Stage
+from src.processing.indexing import build_tracking_time_index
+from src.processing.pbp.alignment import align_pbp_to_tracking_by_clock
+from src.processing.sportvu_to_events import raw_sportvu_to_tracking_events
+from src.processing.tracking_cleaning import dedupe_tracking_events
+from src.tracking.coordinates import game_half_court
+from src.tracking.possession import frame_possession
+from src.tracking.tensorize import game_to_arrays
+
+
+# --- throughput counters (Stage.count) ---
+def count_frames(events):
+    return {"frames": sum(len(ev["frames"]) for ev in events)}
+
+
+def count_kinematics_frames(kin):
+    return {"frames": len(kin["arrays"]["game_clock"])}
+
+
+def count_shots(df):
+    return {"shots": len(df)}
+
+
+# --- per-game stages ---
+def parse_stage(game_id, source):
+    """Raw SportVU game (.json or .7z) -> tracking events."""
+    source = Path(source)
+    if source.suffix == ".7z":
+        from src.data_io.archives import extract_and_load_json  # needs py7zr
+        game = extract_and_load_json(source)
+    else:
+        game = load_json(source)
+    if game is None:
+        raise ValueError(f"could not load tracking for game {game_id} from {source}")
+    return raw_sportvu_to_tracking_events(game)
+
+
+def dedupe_stage(game_id, parse):
+    return dedupe_tracking_events(parse)
+
+
+def index_stage(game_id, dedupe):
+    return build_tracking_time_index(dedupe)
+
+
+def align_stage(game_id, index, pbp, span_pad=2.0, max_center_diff=10.0):
+    if pbp is None or pbp.empty:
+        return pd.DataFrame()
+    return align_pbp_to_tracking_by_clock(
+        pbp, index, span_pad=span_pad, max_center_diff=max_center_diff, keep_debug=True,
+    )
+
+
+def kinematics_stage(game_id, dedupe, fps=25):
+    """
+    Frame arrays, possession, attacking baskets, positions in the
+    canonical half-court frame of the possessing team, and player
+    velocities.
+    """
+    arrays = game_to_arrays(dedupe)
+    poss = frame_possession(arrays)["possession_team_id"]
+    hc = game_half_court(arrays, poss, game_id=str(game_id))
+    return {
+        "arrays": arrays,
+        "possession_team_id": poss,
+        "attack": hc["table"],
+        "half_court": {k: hc[k] for k in ("attack_x", "player_xy", "ball_xy")},
+        "velocity": player_velocities(arrays, fps=fps),
+    }
+
+
+def label_stage(game_id, dedupe, align, kinematics):
+    """Tracking events with attack_x and start_type."""
+    attach_attack_x(dedupe, kinematics["arrays"], kinematics["possession_team_id"], kinematics["attack"])
+    if not align.empty:
+        assign_start_types(dedupe, align)
+    return dedupe
+
+
+def defense_stage(game_id, dedupe, index, shots, window_seconds=1.0):
+    """One game's shots joined with pre-shot defense features (def_variables rows)."""
+    if shots is None or shots.empty:
+        return pd.DataFrame()
+    feats = compute_defense_features_for_shots(shots, dedupe, index, window_seconds=window_seconds)
+    return shots.join(feats, how="inner") if not feats.empty else pd.DataFrame()
+
+
+# --- season stages ---
+def split_pbp_stage(pbp_path):
+    """Season PBP CSV -> {game_id: prepared game PBP}."""
+    pbp = pd.read_csv(pbp_path)
+    return {int(g): prepare_game_pbp(df, g) for g, df in pbp.groupby(pbp["GAME_ID"].astype(int))}
+
+
+def xfg_stage(shots_path, chunksize=100_000):
+    """
+    Fit the baseline xFG out of core and score every shot chunk by chunk.
+    The stage artifact is the cache (no separate model directory), so the
+    runner tracks and invalidates it.
+    """
+    artifacts, _ = fit_xfg_streaming(shots_path, chunksize=chunksize, cache_dir=None)
+    parts = []
+    for raw in iter_shot_chunks(shots_path, chunksize=chunksize):
+        shots = score_xfg(artifacts, add_shot_features(raw))
+        shots["game_clock"] = shots["MINUTES_REMAINING"] * 60 + shots["SECONDS_REMAINING"]
+        parts.append(shots)
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+
+
+def split_shots_stage(xfg):
+    return {int(g): df.reset_index(drop=True) for g, df in xfg.groupby("GAME_ID")}
+
+
+def def_variables_stage(defense):
+    frames = [df for df in defense.values() if not df.empty]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def maps_stage(xfg, value_col="xPPS_base", min_attempts=200, smooth_sigma=1.25):
+    """Per-player maps in the save_maps_npz layout, plus the player table."""
+    maps, meta = build_player_maps(xfg, min_attempts=min_attempts, value_col=value_col,
+                                   smooth_sigma=smooth_sigma)
+    maps_npz = stack_maps(maps)
+    pid2row = {int(pid): i for i, pid in enumerate(maps_npz["player_ids"])}
+    return {"maps_npz": maps_npz, "pid2row": pid2row, "meta": meta}
+
+
+def ist_stage(def_variables, maps, use="quality"):
+    known = def_variables["PLAYER_ID"].astype(int).isin(maps["pid2row"])
+    return add_ist_column(def_variables[known], maps["maps_npz"], maps["pid2row"], use=use)
+
+
+def season_stages(pbp_path, shots_path, *, span_pad=2.0, max_center_diff=10.0,
+                  maps_value_col="xPPS_base", min_map_attempts=200):
+    """
+    The notebook chain 02 label -> 03 xFG / defense features -> 04 / 05 as
+    runner stages:
+
+        parse -> dedupe -> index -> align -> label
+                        -> kinematics ----------^
+        pbp (split by game) ----^
+        xfg -> shots (split by game) -> defense -> def_variables -> ist
+            -> maps ------------------------------------------------^
+    """
+    return [
+        Stage("parse", parse_stage, per_game=True, uses_source=True, count=count_frames),
+        Stage("dedupe", dedupe_stage, ("parse",), per_game=True, count=count_frames),
+        Stage("index", index_stage, ("dedupe",), per_game=True),
+        Stage("pbp", split_pbp_stage, params={"pbp_path": Path(pbp_path)}, partitioned=True),
+        Stage("align", align_stage, ("index", "pbp"), per_game=True,
+              params={"span_pad": span_pad, "max_center_diff": max_center_diff}),
+        Stage("kinematics", kinematics_stage, ("dedupe",), per_game=True, count=count_kinematics_frames),
+        Stage("label", label_stage, ("dedupe", "align", "kinematics"), per_game=True, count=count_frames),
+        Stage("xfg", xfg_stage, params={"shots_path": Path(shots_path)}, count=count_shots),
+        Stage("shots", split_shots_stage, ("xfg",), partitioned=True),
+        Stage("defense", defense_stage, ("dedupe", "index", "shots"), per_game=True, count=count_shots),
+        Stage("def_variables", def_variables_stage, ("defense",), count=count_shots),
+        Stage("maps", maps_stage, ("xfg",),
+              params={"value_col": maps_value_col, "min_attempts": min_map_attempts}),
+        Stage("ist", ist_stage, ("def_variables", "maps"), count=count_shots),
+    ]
+
+
+def run_season_pipeline(games, pbp_path, shots_path, *, root="data/pipeline", targets=None,
+                        workers=None, worker_memory=None, metrics=None, verbose=True, **stage_kwargs):
+    """
+    Build (or resume) the season pipeline.
+
+    Parameters
+    ----------
+    games : dict
+        game_id -> raw SportVU file (.json or .7z).
+    pbp_path, shots_path : str or Path
+        Season play-by-play CSV and nba_api shot-chart CSV.
+    targets : str or list, optional
+        Stages to bring up to date (with their upstream); default all.
+    metrics : instrumentation.Metrics, optional
+        Filled with stage timers, drop-reason counters and per-game memory.
+
+    Returns
+    -------
+    (PipelineRunner, pd.DataFrame run report); runner.load(stage, game_id)
+    returns artifacts.
+    """
+    runner = PipelineRunner(season_stages(pbp_path, shots_path, **stage_kwargs), games,
+                            root=root, workers=workers, worker_memory=worker_memory, metrics=metrics)
+    return runner, runner.run(targets, verbose=verbose)
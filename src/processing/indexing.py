@@ -15,7 +15,7 @@ def build_tracking_time_index(tracking_events: list[dict]) -> pd.DataFrame:
             continue
 
         gc_raw = [fr.get("game_clock", np.nan) for fr in frames]
-        gc = pd.to_numeric(gc_raw, errors="coerce").to_numpy()
+        gc = np.asarray(pd.to_numeric(gc_raw, errors="coerce"), dtype=float)
         valid = ~np.isnan(gc)
         if valid.sum() < 2:
             continue
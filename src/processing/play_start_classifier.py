@@ -1,17 +1,26 @@
 from __future__ import annotations
+import numpy as np
+
 from src.tracking.event_summaries import first_ball_xy
+from src.tracking.coordinates import RIM_TO_BASELINE, to_half_court
 
 # Court constants (feet)
 BASELINE_Y = 0.0
 BASKET_X = 0.0
 
-def classify_play_start(event: dict, restart_trigger: str | None) -> str:
+def classify_play_start(event: dict, restart_trigger: str | None, attack_x: float | None = None) -> str:
     """
     Assigns one of:
       - missed_free_throw
       - turnover_start
       - baseline_inbound
       - normal_play
+
+    attack_x is the SportVU x of the basket the team in possession attacks
+    (falls back to event["attack_x"]). When known, the ball is first moved
+    into the canonical half-court frame (rim at origin, baseline at
+    y = -RIM_TO_BASELINE), so the baseline test refers to the attacked
+    baseline; otherwise the raw coordinates are compared as before.
     """
 
     x0, y0 = first_ball_xy(event)
@@ -20,6 +29,14 @@ def classify_play_start(event: dict, restart_trigger: str | None) -> str:
     if x0 is None or y0 is None:
         return "normal_play"
 
+    if attack_x is None:
+        attack_x = event.get("attack_x")
+    if attack_x is not None and np.isfinite(attack_x):
+        x0, y0 = to_half_court(np.array([x0, y0]), attack_x)
+        baseline_y = -RIM_TO_BASELINE
+    else:
+        baseline_y = BASELINE_Y
+
     # --- Rule-based logic ---
 
     # 1) Missed FT → live rebound or inbound
@@ -32,7 +49,7 @@ def classify_play_start(event: dict, restart_trigger: str | None) -> str:
 
     # 3) Baseline inbound (under basket)
     # Ball starts very close to baseline and near basket horizontally
-    if abs(y0 - BASELINE_Y) < 3.0 and abs(x0 - BASKET_X) < 8.0:
+    if abs(y0 - baseline_y) < 3.0 and abs(x0 - BASKET_X) < 8.0:
         return "baseline_inbound"
 
     # 4) Everything else
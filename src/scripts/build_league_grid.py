@@ -1,12 +1,15 @@
-from src.data_sources.nba_api_shots import fetch_league_shots
+import pandas as pd
+
 from src.features.shot_maps import contested_fg_grids
 from src.data_io.grids import save_grids
 
 def main():
     season = "2015-16"
-    shots = fetch_league_shots(season)
-    grids = contested_fg_grids(shots, n_bins=10)
+    # season shots joined with tracking defense features (notebook 03)
+    shots = pd.read_csv("data/processed/def_variables.csv")
+    grids, counts = contested_fg_grids(shots, n_bins=10, return_counts=True)
     save_grids(grids, season=season, out_dir="data/processed/grids")
+    save_grids(counts, season=season, out_dir="data/processed/grids", kind="attempts")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
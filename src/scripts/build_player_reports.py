@@ -0,0 +1,28 @@
+import argparse
+
+import pandas as pd
+
+from src.viz.reports import build_player_reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render per-player map figures and an index page.")
+    parser.add_argument("maps", help="maps NPZ from save_maps_npz")
+    parser.add_argument("--out", default="reports/player_maps")
+    parser.add_argument("--meta", help="CSV with PLAYER_ID, PLAYER_NAME")
+    parser.add_argument("--min-attempts", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--force", action="store_true", help="re-render unchanged players")
+    args = parser.parse_args()
+
+    meta = pd.read_csv(args.meta) if args.meta else None
+    table = build_player_reports(
+        args.maps, args.out, meta=meta, min_attempts=args.min_attempts,
+        workers=args.workers, force=args.force,
+    )
+    n_new = int((table["status"] == "rendered").sum())
+    print(f"Rendered {n_new} players, skipped {len(table) - n_new}; index at {args.out}/index.html")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+# ============================
+# src/tracking/coordinates.py
+# ============================
+import hashlib
+import inspect
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.features.space_control import COURT_LENGTH, COURT_WIDTH, HOOP_LEFT_X, HOOP_RIGHT_X
+
+HOOP_Y = COURT_WIDTH / 2
+# Rim center to baseline, feet. In the canonical frame the baseline is y = -RIM_TO_BASELINE.
+RIM_TO_BASELINE = HOOP_LEFT_X
+# nba_api shot charts (LOC_X / LOC_Y) have the rim at (0, 0); the repo's shot work
+# (notebook 03, xFG features, player maps, contested grids) converts with / 12.
+SHOT_CHART_UNITS_PER_FT = 12.0
+
+ATTACK_COLUMNS = ["game_id", "quarter", "team_id", "attack_x", "n_frames", "share"]
+
+
+def infer_attacking_basket(arrays, possession_team_id, game_id=None, *, min_frames=25):
+    """
+    Basket each team attacks in each period, inferred from tracking.
+
+    Over the frames where a team has possession, the ball spends most of
+    its time in the offensive half; the majority half decides the basket.
+    Within a period the two teams are forced onto opposite baskets, the
+    team with the clearer majority winning ties.
+
+    Parameters
+    ----------
+    arrays : dict
+        Output of src.tracking.tensorize.game_to_arrays.
+    possession_team_id : (F,) array
+        From src.tracking.possession.frame_possession.
+
+    Returns
+    -------
+    pd.DataFrame
+        game_id, quarter, team_id, attack_x (HOOP_LEFT_X / HOOP_RIGHT_X),
+        n_frames (possession frames used), share (fraction of them in the
+        attacked half).
+    """
+    poss = np.asarray(possession_team_id)
+    ball_x = np.asarray(arrays["ball_xyz"][:, 0], dtype=float)
+    ok = (poss >= 0) & np.isfinite(ball_x)
+    df = pd.DataFrame({
+        "quarter": np.asarray(arrays["quarter"])[ok].astype(int),
+        "team_id": poss[ok],
+        "right": ball_x[ok] > COURT_LENGTH / 2,
+    })
+    if df.empty:
+        return pd.DataFrame(columns=ATTACK_COLUMNS)
+
+    g = df.groupby(["quarter", "team_id"], sort=True)["right"].agg(["mean", "size"]).reset_index()
+    g = g[g["size"] >= min_frames]
+    right = g["mean"].to_numpy() > 0.5
+    share = np.where(right, g["mean"], 1 - g["mean"])
+
+    # two teams on the same basket in one period: the weaker vote flips
+    g = g.assign(right=right, share=share)
+    for _, grp in g.groupby("quarter"):
+        if len(grp) == 2 and grp["right"].nunique() == 1:
+            weak = grp["share"].idxmin()
+            g.loc[weak, "right"] = not g.loc[weak, "right"]
+            g.loc[weak, "share"] = 1 - g.loc[weak, "share"]
+
+    return pd.DataFrame({
+        "game_id": game_id,
+        "quarter": g["quarter"].to_numpy(),
+        "team_id": g["team_id"].to_numpy(),
+        "attack_x": np.where(g["right"], HOOP_RIGHT_X, HOOP_LEFT_X),
+        "n_frames": g["size"].to_numpy(),
+        "share": g["share"].to_numpy(),
+    }, columns=ATTACK_COLUMNS)
+
+
+def lookup_attack_x(table, quarter, team_id):
+    """
+    Vectorized (quarter, team_id) -> attack_x lookup; NaN where unknown.
+    quarter and team_id are same-shape arrays (e.g. per frame).
+    """
+    quarter = np.asarray(quarter)
+    team_id = np.asarray(team_id)
+    index = pd.MultiIndex.from_arrays([table["quarter"].astype(int), table["team_id"].astype(np.int64)])
+    pos = index.get_indexer(pd.MultiIndex.from_arrays([quarter.ravel().astype(int), team_id.ravel().astype(np.int64)]))
+    vals = table["attack_x"].to_numpy(dtype=float)
+    out = np.where(pos >= 0, vals[np.maximum(pos, 0)] if len(vals) else np.nan, np.nan)
+    return out.reshape(quarter.shape)
+
+
+def _attack_sign(attack_x, xy):
+    # +1 right basket, -1 left, NaN unknown; shaped to broadcast with xy[..., 0]
+    ax = np.asarray(attack_x, dtype=float)
+    ax = ax.reshape(ax.shape + (1,) * (xy.ndim - 1 - ax.ndim))
+    s = np.sign(ax - COURT_LENGTH / 2)
+    return ax, np.where(s == 0, np.nan, s)
+
+
+def to_half_court(xy, attack_x):
+    """
+    SportVU full-court feet -> canonical half-court feet.
+
+    The attacked rim goes to (0, 0), +y points from the baseline toward half
+    court and x runs across the court; both baskets map by a proper rotation
+    (no reflection):
+
+        right basket: (x', y') = ( (Y - 25), 88.75 - X)
+        left basket:  (x', y') = (-(Y - 25), X - 5.25)
+
+    Drawn with the rim at the bottom, +x is to the right, as on the
+    shot-chart grid (src.features.shot_maps.make_grid) in feet. NaN
+    attack_x gives NaN output.
+
+    xy : (..., 2) array
+    attack_x : scalar or array matching the leading axes of xy (e.g. (F,)
+        for (F, N, 2) positions).
+    """
+    xy = np.asarray(xy, dtype=float)
+    ax, s = _attack_sign(attack_x, xy)
+    return np.stack([s * (xy[..., 1] - HOOP_Y), s * (ax - xy[..., 0])], axis=-1)
+
+
+def from_half_court(xy, attack_x):
+    """Inverse of to_half_court."""
+    xy = np.asarray(xy, dtype=float)
+    ax, s = _attack_sign(attack_x, xy)
+    return np.stack([ax - s * xy[..., 1], HOOP_Y + s * xy[..., 0]], axis=-1)
+
+
+def shot_chart_to_feet(loc_x, loc_y, units_per_ft=SHOT_CHART_UNITS_PER_FT):
+    """nba_api LOC_X / LOC_Y -> canonical half-court feet (rim at origin)."""
+    return np.asarray(loc_x, dtype=float) / units_per_ft, np.asarray(loc_y, dtype=float) / units_per_ft
+
+
+def game_half_court(arrays, possession_team_id, table=None, game_id=None):
+    """
+    Whole-game arrays in the canonical frame of the team in possession.
+
+    Returns
+    -------
+    dict
+        attack_x  : (F,) basket attacked by the possessing team (NaN unknown)
+        player_xy : (F, N, 2) float32 canonical player positions
+        ball_xy   : (F, 2) float32 canonical ball position
+        table     : the attacking-basket table used
+    """
+    if table is None:
+        table = infer_attacking_basket(arrays, possession_team_id, game_id)
+    ax = lookup_attack_x(table, arrays["quarter"], possession_team_id)
+    return {
+        "attack_x": ax,
+        "player_xy": to_half_court(arrays["player_xy"], ax).astype(np.float32),
+        "ball_xy": to_half_court(arrays["ball_xyz"][:, :2], ax).astype(np.float32),
+        "table": table,
+    }
+
+
+def attack_table_key(min_frames=25):
+    """Hash of the inference code and its parameters; part of the cache file name."""
+    src = inspect.getsource(infer_attacking_basket)
+    return hashlib.sha1(f"{src}\nmin_frames={min_frames}".encode()).hexdigest()[:10]
+
+
+def cached_attack_table(game_id, arrays=None, possession_team_id=None, cache_dir="data/processed/coords",
+                        *, min_frames=25):
+    """
+    Attacking-basket table for a game, read from
+    cache_dir/<game_id>_<attack_table_key>.csv when present, otherwise
+    inferred (arrays and possession_team_id needed) and written there, so
+    features, maps and IST share one orientation. Changing the inference
+    code or min_frames changes the key, so stale tables are not reused.
+    cache_dir=None just infers.
+    """
+    if cache_dir is None:
+        if arrays is None or possession_team_id is None:
+            raise ValueError("cache_dir=None needs arrays and possession_team_id")
+        return infer_attacking_basket(arrays, possession_team_id, str(game_id), min_frames=min_frames)
+    path = Path(cache_dir) / f"{game_id}_{attack_table_key(min_frames)}.csv"
+    if path.exists():
+        return pd.read_csv(path, dtype={"game_id": str})
+    if arrays is None or possession_team_id is None:
+        raise ValueError(f"no cached table at {path}; pass arrays and possession_team_id")
+    table = infer_attacking_basket(arrays, possession_team_id, str(game_id), min_frames=min_frames)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    table.to_csv(path, index=False)
+    return table
+
+
+def event_attack_x(arrays, possession_team_id, table):
+    """
+    Basket attacked by the team in possession at each event's first frame,
+    (E,) float with NaN for empty events or unknown teams.
+    """
+    off = np.asarray(arrays["event_offsets"])
+    first = off[:-1]
+    has = off[1:] > first
+    out = np.full(len(first), np.nan)
+    f = first[has]
+    out[has] = lookup_attack_x(table, np.asarray(arrays["quarter"])[f], np.asarray(possession_team_id)[f])
+    return out
@@ -1,6 +1,9 @@
+from pathlib import Path
+
 import numpy as np
 import xarray as xr
-from .tensorize import event_to_tensor_offense
+from .tensorize import event_to_tensor_offense, game_slot_tensors
+from src.utils import instrumentation as inst
 
 # Dataset with offensive players + ball
 def build_offensive_dataset(game, max_frames=150):
@@ -39,4 +42,144 @@ def build_offensive_dataset(game, max_frames=150):
         }
     )
 
-    return dataset
\ No newline at end of file
+    return dataset
+
+# ---------------------------------------------------------------------------
+# Ragged on-disk dataset: one float32 frame buffer + per-play offsets/masks
+# ---------------------------------------------------------------------------
+
+
+def build_ragged_dataset(game, out_dir, max_frames=150, *, side="offense", include_ball=True):
+    """
+    Write a game's plays as a ragged, memory-mappable dataset.
+
+    Plays are concatenated without padding into frames.npy (total_frames,
+    N, 2) float32, with mask.npy marking valid entries (missing players are
+    NaN, never (0, 0)) and offsets.npy giving play p the rows
+    offsets[p]:offsets[p + 1]. event_idx.npy maps plays back to events.
+
+    Like build_offensive_dataset, events without a possession_team_id (no
+    side players in any frame) are dropped; with instrumentation enabled
+    they are counted as ("ragged_plays", "dropped:no_possession").
+
+    Returns
+    -------
+    RaggedDataset opened on out_dir, or None if no play is left.
+    """
+    keep = np.array([k for k, e in enumerate(game) if e.get("frames")], dtype=np.int64)
+    if not len(keep):
+        return None
+    events = [game[k] for k in keep]
+
+    out = game_slot_tensors(events, side=side, include_ball=include_ball)
+    off = out["event_offsets"]
+    n_slots = out["slot_player_id"].shape[1]
+    has_side = np.logical_or.reduceat(out["mask"][:, :n_slots].any(axis=1), off[:-1])
+    inst.count("ragged_plays", "dropped:no_possession", int((~has_side).sum()))
+    inst.count("ragged_plays", "kept", int(has_side.sum()))
+    if not has_side.any():
+        return None
+    keep = keep[has_side]
+    off = np.stack([off[:-1], off[1:]], axis=1)[has_side]
+    lengths = off[:, 1] - off[:, 0]
+    if max_frames is not None:
+        lengths = np.minimum(lengths, max_frames)
+
+    # rows of the first `length` frames of every play
+    new_off = np.concatenate([[0], np.cumsum(lengths)])
+    rows = np.repeat(off[:, 0] - new_off[:-1], lengths) + np.arange(new_off[-1])
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    np.save(out_dir / "frames.npy", out["xy"][rows].astype(np.float32))
+    np.save(out_dir / "mask.npy", out["mask"][rows])
+    np.save(out_dir / "offsets.npy", new_off.astype(np.int64))
+    np.save(out_dir / "event_idx.npy", keep)
+    return RaggedDataset(out_dir)
+
+
+class RaggedDataset:
+    """
+    Memory-mapped ragged plays written by build_ragged_dataset.
+
+    Nothing is read until a play or batch is requested; play(i) is a view
+    into the frame buffer.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.frames = np.load(self.path / "frames.npy", mmap_mode="r")
+        self.mask = np.load(self.path / "mask.npy", mmap_mode="r")
+        self.offsets = np.load(self.path / "offsets.npy")
+        self.event_idx = np.load(self.path / "event_idx.npy")
+        self.lengths = np.diff(self.offsets)
+
+    def __len__(self):
+        return len(self.lengths)
+
+    @property
+    def n_players(self):
+        return self.frames.shape[1]
+
+    def play(self, i):
+        """(T_i, N, 2) float32 view, NaN where mask is False."""
+        return self.frames[self.offsets[i]:self.offsets[i + 1]]
+
+    def play_mask(self, i):
+        return self.mask[self.offsets[i]:self.offsets[i + 1]]
+
+    def play_xarray(self, i):
+        """One play as an xarray.Dataset backed by the memory map."""
+        T, N = self.lengths[i], self.n_players
+        return xr.Dataset(
+            data_vars={
+                "positions": (["time", "player", "coord"], self.play(i)),
+                "mask": (["time", "player"], self.play_mask(i)),
+            },
+            coords={
+                "time": np.arange(T),
+                "player": np.arange(N),
+                "coord": ["x", "y"],
+            },
+            attrs={"play": int(i), "event_idx": int(self.event_idx[i])},
+        )
+
+    def batches(self, batch_size=32, buckets=(25, 50, 100, 150), *, shuffle=True, seed=0, pad_value=0.0):
+        """
+        Yield padded training batches of plays with similar lengths.
+
+        Each play goes to the smallest bucket length >= its length (plays
+        longer than the last bucket are truncated to it), so padding is
+        bounded by the bucket width instead of the longest play.
+
+        Yields
+        ------
+        dict
+            positions : (B, L, N, 2) float32, pad_value where invalid
+            mask      : (B, L, N) bool
+            lengths   : (B,) int64, frames used per play
+            play      : (B,) int64 play indices
+        """
+        buckets = np.sort(np.asarray(buckets, dtype=np.int64))
+        b = np.minimum(np.searchsorted(buckets, self.lengths), len(buckets) - 1)
+        rng = np.random.default_rng(seed)
+
+        chunks = []
+        for k in np.unique(b):
+            plays = np.flatnonzero(b == k)
+            if shuffle:
+                plays = rng.permutation(plays)
+            chunks += [(buckets[k], plays[s:s + batch_size]) for s in range(0, len(plays), batch_size)]
+        if shuffle:
+            chunks = [chunks[i] for i in rng.permutation(len(chunks))]
+
+        N = self.n_players
+        for L, plays in chunks:
+            lengths = np.minimum(self.lengths[plays], L)
+            pos = np.full((len(plays), L, N, 2), pad_value, dtype=np.float32)
+            mask = np.zeros((len(plays), L, N), dtype=bool)
+            for j, (p, n) in enumerate(zip(plays, lengths)):
+                s = self.offsets[p]
+                mask[j, :n] = self.mask[s:s + n]
+                pos[j, :n] = np.where(mask[j, :n, :, None], self.frames[s:s + n], pad_value)
+            yield {"positions": pos, "mask": mask, "lengths": lengths, "play": plays}
@@ -1,4 +1,6 @@
 import numpy as np
+import pandas as pd
+
 # For data with possession info
 def identify_possession(row):
     """
@@ -34,16 +36,150 @@ def assign_event_possession(event):
         event["possession_team_id"] = None
         return
 
-    ball_pos = np.array([ball["x"], ball["y"]])
+    ball_pos = np.array([ball["x"], ball["y"]], dtype=float)
+    player_pos = np.array([[p["x"], p["y"]] for p in players], dtype=float)
 
     # Find the player closest to the ball
-    min_dist = float("inf")
-    possession_team = None
-    for p in players:
-        player_pos = np.array([p["x"], p["y"]])
-        dist = np.linalg.norm(ball_pos - player_pos)
-        if dist < min_dist:
-            min_dist = dist
-            possession_team = p["teamid"]
-
-    event["possession_team_id"] = possession_team
+    dist = np.hypot(*(player_pos - ball_pos).T)
+    event["possession_team_id"] = players[int(np.argmin(dist))]["teamid"]
+
+
+# Frame-level ball control over whole-game arrays (see tensorize.game_to_arrays)
+def frame_ball_control(arrays, *, control_radius=4.0, max_ball_z=9.0):
+    """
+    Raw per-frame ball handler: the player closest to the ball, if the ball
+    is within control_radius feet (xy) and below max_ball_z feet.
+
+    Parameters
+    ----------
+    arrays : dict
+        Output of src.tracking.tensorize.game_to_arrays.
+    control_radius : float
+        Max ball-player xy distance (feet) to count as controlled.
+    max_ball_z : float
+        Ball height (feet) above which the ball is treated as in the air
+        (shot, lob, long pass) and nobody controls it.
+
+    Returns
+    -------
+    dict
+        handler_slot : (F,) int, column into player_xy or -1
+        handler_id   : (F,) int64 or -1
+        handler_team : (F,) int64 or -1
+        ball_dist    : (F,) float, distance to the closest player
+    """
+    pxy = arrays["player_xy"]
+    ball = arrays["ball_xyz"]
+
+    d = np.hypot(pxy[..., 0] - ball[:, None, 0], pxy[..., 1] - ball[:, None, 1])
+    d = np.where(np.isnan(d), np.inf, d)
+
+    slot = np.argmin(d, axis=1) if d.shape[1] else np.zeros(len(d), dtype=int)
+    rows = np.arange(len(d))
+    best = d[rows, slot] if d.shape[1] else np.full(len(d), np.inf)
+
+    z = ball[:, 2]
+    controlled = (best <= control_radius) & ~(z > max_ball_z)
+
+    slot = np.where(controlled, slot, -1)
+    safe = np.maximum(slot, 0)
+    return {
+        "handler_slot": slot,
+        "handler_id": np.where(controlled, arrays["player_id"][rows, safe], -1),
+        "handler_team": np.where(controlled, arrays["team_id"][rows, safe], -1),
+        "ball_dist": best,
+    }
+
+
+def _run_starts(labels, groups):
+    # start index of every run of equal (label, group)
+    change = np.ones(len(labels), dtype=bool)
+    change[1:] = (labels[1:] != labels[:-1]) | (groups[1:] != groups[:-1])
+    return np.flatnonzero(change)
+
+
+def _block_bounds(groups):
+    # per-frame first/last index of the contiguous block each frame belongs to
+    starts = _run_starts(groups, groups)
+    lengths = np.diff(np.append(starts, len(groups)))
+    return np.repeat(starts, lengths), np.repeat(starts + lengths - 1, lengths)
+
+
+def frame_possession(
+    arrays,
+    *,
+    control_radius=4.0,
+    max_ball_z=9.0,
+    min_hold_frames=5,
+):
+    """
+    Per-frame possession labels with hysteresis.
+
+    A team only takes possession after controlling the ball for at least
+    min_hold_frames consecutive frames; shorter touches (deflections, the
+    ball passing a defender) are ignored. Frames without control (passes,
+    shots in flight, loose balls) keep the last possessing team, and leading
+    frames of a quarter take the first team to gain control. Labels never
+    carry across quarters.
+
+    Returns
+    -------
+    dict
+        Everything from frame_ball_control plus
+        possession_team_id : (F,) int64, -1 only if a quarter never has control
+        handler_id         : (F,) int64, handler on the possessing team or -1
+    """
+    ctrl = frame_ball_control(arrays, control_radius=control_radius, max_ball_z=max_ball_z)
+    raw = ctrl["handler_team"]
+    quarter = np.asarray(arrays["quarter"])
+    F = len(raw)
+    if F == 0:
+        return {**ctrl, "possession_team_id": raw.copy()}
+
+    # Hysteresis: drop control runs shorter than min_hold_frames
+    starts = _run_starts(raw, quarter)
+    lengths = np.diff(np.append(starts, F))
+    keep = (raw[starts] != -1) & (lengths >= min_hold_frames)
+    accepted = np.repeat(np.where(keep, raw[starts], -1), lengths)
+
+    # Forward fill within quarter, then back fill the quarter's leading frames
+    idx = np.arange(F)
+    q_start, q_end = _block_bounds(quarter)
+    last = np.maximum.accumulate(np.where(accepted != -1, idx, -1))
+    nxt = np.minimum.accumulate(np.where(accepted != -1, idx, F)[::-1])[::-1]
+
+    src = np.where(last >= q_start, last, np.where(nxt <= q_end, nxt, -1))
+    team = np.where(src >= 0, accepted[np.maximum(src, 0)], -1)
+
+    handler = np.where(ctrl["handler_team"] == team, ctrl["handler_id"], -1)
+    return {**ctrl, "possession_team_id": team, "handler_id": handler}
+
+
+def possession_segments(possession_team_id, quarter=None, frame_id=None):
+    """
+    Collapse per-frame possession labels into segments.
+
+    Returns a DataFrame with one row per segment:
+      team_id, quarter, start_frame, end_frame (inclusive, row indices),
+      n_frames and, if frame_id is given, start_frame_id / end_frame_id.
+    """
+    team = np.asarray(possession_team_id)
+    q = np.zeros(len(team), dtype=int) if quarter is None else np.asarray(quarter)
+    if len(team) == 0:
+        return pd.DataFrame(columns=["team_id", "quarter", "start_frame", "end_frame", "n_frames"])
+
+    starts = _run_starts(team, q)
+    ends = np.append(starts[1:], len(team)) - 1
+
+    seg = pd.DataFrame({
+        "team_id": team[starts],
+        "quarter": q[starts],
+        "start_frame": starts,
+        "end_frame": ends,
+        "n_frames": ends - starts + 1,
+    })
+    if frame_id is not None:
+        frame_id = np.asarray(frame_id)
+        seg["start_frame_id"] = frame_id[starts]
+        seg["end_frame_id"] = frame_id[ends]
+    return seg
@@ -0,0 +1,200 @@
+# ============================
+# src/tracking/resample.py
+# ============================
+import numpy as np
+
+FPS = 25
+
+# id / label fields are carried from a neighbouring frame, never interpolated
+_CARRY_FIELDS = ("player_id", "team_id", "quarter", "frame_id", "event_idx")
+
+
+def _segments(arrays, fps, max_gap_frames):
+    """
+    Split the frame timeline into continuous segments and time each frame.
+
+    A segment breaks at an event or quarter change, when the game clock
+    jumps backwards (clock reset / replayed frames) or when more than
+    max_gap_frames are missing. Within a segment each step advances by the
+    game-clock difference, or by 1 / fps while the clock is stopped.
+
+    Returns
+    -------
+    seg : (F,) segment id
+    t : (F,) seconds since the segment start
+    step : (F,) seconds since the previous frame (0 at segment starts)
+    """
+    gc = np.asarray(arrays["game_clock"], dtype=float)
+    F = len(gc)
+    nominal = 1.0 / fps
+
+    dt = np.zeros(F)
+    dt[1:] = gc[:-1] - gc[1:]          # clock counts down
+    dt = np.nan_to_num(dt, nan=nominal)
+    step = np.where(dt > 0.5 * nominal, dt, nominal)
+
+    new = np.ones(F, dtype=bool)
+    new[1:] = (
+        (arrays["event_idx"][1:] != arrays["event_idx"][:-1])
+        | (arrays["quarter"][1:] != arrays["quarter"][:-1])
+        | (dt[1:] < -0.5 * nominal)
+        | (dt[1:] > (max_gap_frames + 1.5) * nominal)
+    )
+    step[new] = 0.0
+    seg = np.cumsum(new) - 1
+
+    c = np.cumsum(step)
+    t = c - c[np.flatnonzero(new)][seg]
+    return seg, t, step
+
+
+def _interp_index(src, dst):
+    """Left neighbour, right neighbour and weight of dst in sorted src."""
+    if len(src) == 1:
+        z = np.zeros(len(dst), dtype=np.int64)
+        return z, z, np.zeros(len(dst))
+    i1 = np.clip(np.searchsorted(src, dst, side="left"), 1, len(src) - 1)
+    i0 = i1 - 1
+    span = src[i1] - src[i0]
+    w = np.clip(np.divide(dst - src[i0], span, out=np.zeros_like(dst), where=span > 0), 0.0, 1.0)
+    exact = np.abs(src[i1] - dst) < 1e-6
+    i0 = np.where(exact, i1, i0)
+    w = np.where(exact, 0.0, w)
+    return i0, i1, w
+
+
+def _lerp(a, i0, i1, w):
+    w = w.reshape((-1,) + (1,) * (a.ndim - 1))
+    return a[i0] * (1 - w) + a[i1] * w
+
+
+def _boxcar(a, seg_start, seg_stop, half):
+    """
+    Centered moving average of width 2 * half + 1 along axis 0, clipped to
+    each row's segment [seg_start, seg_stop) and ignoring NaNs.
+    """
+    if half <= 0:
+        return a
+    n = len(a)
+    idx = np.arange(n)
+    lo = np.maximum(idx - half, seg_start)
+    hi = np.minimum(idx + half + 1, seg_stop)
+
+    finite = np.isfinite(a)
+    zeros = np.zeros((1,) + a.shape[1:])
+    S = np.concatenate([zeros, np.cumsum(np.where(finite, a, 0.0), axis=0)])
+    N = np.concatenate([zeros, np.cumsum(finite, axis=0)])
+    total = S[hi] - S[lo]
+    count = N[hi] - N[lo]
+    return np.divide(total, count, out=np.full(a.shape, np.nan), where=count > 0)
+
+
+def resample_game(arrays, target_fps=5, *, fps=FPS, max_gap_frames=5):
+    """
+    Resample a game's frame arrays onto a uniform clock.
+
+    1. The timeline is split into continuous segments (see _segments);
+       dropped frames are detected from game-clock steps longer than one
+       frame.
+    2. Each segment is put on a uniform fps grid; frames inside gaps of up
+       to max_gap_frames are linearly interpolated and flagged. Player
+       positions are only interpolated when the slot holds the same player
+       on both sides of the gap.
+    3. When target_fps < fps, coordinates are low-passed with a centered
+       boxcar of about fps / target_fps frames (within segments, not across
+       a slot's substitution) and then sampled every 1 / target_fps seconds.
+
+    Parameters
+    ----------
+    arrays : dict
+        Output of src.tracking.tensorize.game_to_arrays.
+
+    Returns
+    -------
+    dict
+        Same keys as game_to_arrays at the new rate, plus
+        interpolated : (F',) bool, frame falls inside a filled gap
+        segment      : (F',) int64, continuous-segment id
+        time         : (F',) float64, seconds since the segment start,
+                       multiples of 1 / target_fps
+    """
+    if target_fps <= 0 or target_fps > fps:
+        raise ValueError(f"target_fps must be in (0, {fps}], got {target_fps}")
+
+    F = len(arrays["game_clock"])
+    if F == 0:
+        raise ValueError("game has no frames")
+    seg, t, step = _segments(arrays, fps, max_gap_frames)
+    n_seg = int(seg[-1]) + 1
+    starts = np.searchsorted(seg, np.arange(n_seg))
+    stops = np.append(starts[1:], F)
+    duration = t[stops - 1]
+
+    # one increasing global timeline: segment k lives in [k * big, k * big + duration]
+    big = float(duration.max() + 10.0)
+    src = seg * big + t
+
+    def grid(rate):
+        n = np.floor(duration * rate + 1e-6).astype(np.int64) + 1
+        g_seg = np.repeat(np.arange(n_seg), n)
+        first = np.concatenate([[0], np.cumsum(n)[:-1]])
+        g_t = (np.arange(n.sum()) - np.repeat(first, n)) / rate
+        return g_seg, g_t
+
+    # --- 1-2: uniform native-rate grid with gap filling ---
+    u_seg, u_t = grid(fps)
+    i0, i1, w = _interp_index(src, u_seg * big + u_t)
+
+    out = {}
+    same_player = arrays["player_id"][i0] == arrays["player_id"][i1]
+    xy = _lerp(arrays["player_xy"].astype(float), i0, i1, w)
+    out["player_xy"] = np.where(same_player[..., None], xy, arrays["player_xy"][i0])
+    for f in ("ball_xyz", "game_clock", "shot_clock"):
+        out[f] = _lerp(np.asarray(arrays[f], dtype=float), i0, i1, w)
+    for f in _CARRY_FIELDS:
+        out[f] = np.asarray(arrays[f])[i0]
+    # inside a gap when the bracketing source frames are > 1.5 frames apart
+    interpolated = (step[i1] > 1.5 / fps) & (w > 0)
+
+    # --- 3: anti-alias and decimate ---
+    if target_fps < fps:
+        half = int(round(fps / target_fps)) // 2
+        u_starts = np.searchsorted(u_seg, np.arange(n_seg))
+        u_stops = np.append(u_starts[1:], len(u_seg))
+        lo, hi = u_starts[u_seg], u_stops[u_seg]
+
+        pid = out["player_id"]
+        changes = np.concatenate([np.zeros((1, pid.shape[1]), dtype=np.int64),
+                                  np.cumsum(pid[1:] != pid[:-1], axis=0)])
+        idx = np.arange(len(u_seg))
+        a = np.maximum(idx - half, lo)
+        b = np.minimum(idx + half, hi - 1)
+        stable = changes[b] == changes[a]
+
+        smooth = _boxcar(out["player_xy"], lo, hi, half)
+        out["player_xy"] = np.where(stable[..., None], smooth, out["player_xy"])
+        out["ball_xyz"] = _boxcar(out["ball_xyz"], lo, hi, half)
+
+        d_seg, d_t = grid(target_fps)
+        j0, j1, wj = _interp_index(u_seg * big + u_t, d_seg * big + d_t)
+        near = np.where(wj <= 0.5, j0, j1)
+        xy = _lerp(out["player_xy"], j0, j1, wj)
+        same = out["player_id"][j0] == out["player_id"][j1]
+        out["player_xy"] = np.where(same[..., None], xy, out["player_xy"][near])
+        for f in ("ball_xyz", "game_clock", "shot_clock"):
+            out[f] = _lerp(out[f], j0, j1, wj)
+        for f in _CARRY_FIELDS:
+            out[f] = out[f][near]
+        interpolated = interpolated[near]
+        u_seg, u_t = d_seg, d_t
+
+    out["player_xy"] = out["player_xy"].astype(np.float32)
+    out["ball_xyz"] = out["ball_xyz"].astype(np.float32)
+    out["quarter"] = out["quarter"].astype(np.int16)
+    out["event_idx"] = out["event_idx"].astype(np.int32)
+    E = len(arrays["event_offsets"]) - 1
+    out["event_offsets"] = np.searchsorted(out["event_idx"], np.arange(E + 1)).astype(np.int64)
+    out["interpolated"] = interpolated
+    out["segment"] = u_seg.astype(np.int64)
+    out["time"] = u_t
+    return out
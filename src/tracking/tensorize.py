@@ -46,38 +46,22 @@ def event_to_tensor(event, include_ball=False, max_frames=None):
 
 # Tensor with only offensive players and ball
 def event_to_tensor_offense(event, include_ball=False, max_frames=None):
+    """
+    (T, N, 2) offense positions of one event, N = offense players in the
+    first frame. Slots follow game_slot_tensors, so a substitute continues
+    the slot of the player they replaced; empty slots are zeros.
+    """
     frames = event.get("frames", [])
     if max_frames is not None:
         frames = frames[:max_frames]
+    if not frames:
+        return np.zeros((0, 1 if include_ball else 0, 2))
 
-    # Determine offensive players
-    possession_team_id = event.get("possession_team_id")
-    offensive_players = [
-        p for p in frames[0]["players"] if p["teamid"] == possession_team_id
-    ]
-
-    T = len(frames)
-    N = len(offensive_players) + (1 if include_ball else 0)
-    traj = np.zeros((T, N, 2))
-
-    for t, frame in enumerate(frames):
-        # offense
-        for i, p in enumerate(frame["players"]):
-            if p["teamid"] == possession_team_id:
-                matching_indices = [j for j, op in enumerate(offensive_players) if op["playerid"] == p["playerid"]]
-                if matching_indices:  # only update if player found
-                    idx = matching_indices[0]
-                    traj[t, idx, 0] = p["x"]
-                    traj[t, idx, 1] = p["y"]
-
-        # ball
-        if include_ball:
-            ball = frame.get("ball")
-            if ball:
-                traj[t, -1, 0] = ball["x"]
-                traj[t, -1, 1] = ball["y"]
-
-    return traj
+    event = {**event, "frames": frames}
+    out = game_slot_tensors([event], include_ball=include_ball)
+    n = int(out["mask"][0, :5].sum())
+    cols = list(range(n)) + ([5] if include_ball else [])
+    return np.nan_to_num(out["xy"][:, cols].astype(float), nan=0.0)
 
 
 def split_offense_defense(event, traj):
@@ -103,4 +87,206 @@ def split_offense_defense(event, traj):
     offense = traj[:, offense_idx, :]
     defense = traj[:, defense_idx, :]
     
-    return offense, defense
\ No newline at end of file
+    return offense, defense
+
+def _id_array(ids):
+    # ids may contain None/NaN (safe_int of NaN); map those to -1
+    a = np.array(ids, dtype=float)
+    a[np.isnan(a)] = -1
+    return a.astype(np.int64)
+
+
+# Whole-game arrays (one row per frame, fixed 10 player columns)
+def game_to_arrays(tracking_events, n_players=10):
+    """
+    Flatten a game's tracking events into frame-aligned NumPy arrays.
+
+    Frames of every event are concatenated in order, so event k owns the
+    rows event_offsets[k]:event_offsets[k + 1]. Missing players are padded
+    with NaN coordinates and id -1.
+
+    Returns
+    -------
+    dict
+        player_xy    : (F, n_players, 2) float32
+        player_id    : (F, n_players) int64
+        team_id      : (F, n_players) int64
+        ball_xyz     : (F, 3) float32
+        game_clock   : (F,) float64
+        shot_clock   : (F,) float64
+        quarter      : (F,) int16
+        frame_id     : (F,) int64
+        event_idx    : (F,) int32, index into tracking_events
+        event_offsets: (E + 1,) int64
+    """
+    rows, ball, gc, sc, fid, quarter, ev_idx = [], [], [], [], [], [], []
+    offsets = [0]
+    pad = [(np.nan, np.nan, np.nan, np.nan)]
+
+    for k, event in enumerate(tracking_events):
+        frames = event.get("frames", [])
+        q = event.get("quarter")
+        q = int(q) if q is not None else -1
+
+        for fr in frames:
+            players = fr.get("players", [])[:n_players]
+            rows.extend([(p.get("x"), p.get("y"), p.get("playerid"), p.get("teamid")) for p in players])
+            rows.extend(pad * (n_players - len(players)))
+
+            b = fr.get("ball") or {}
+            ball.append((b.get("x"), b.get("y"), b.get("z")))
+            gc.append(fr.get("game_clock"))
+            sc.append(fr.get("shot_clock"))
+            fid.append(fr.get("frame_id", -1))
+
+        quarter.extend([q] * len(frames))
+        ev_idx.extend([k] * len(frames))
+        offsets.append(offsets[-1] + len(frames))
+
+    # one float conversion for all player columns (None -> NaN)
+    flat = np.array(rows, dtype=float).reshape(-1, 4)
+    F = len(gc)
+    return {
+        "player_xy": flat[:, :2].astype(np.float32).reshape(F, n_players, 2),
+        "player_id": _id_array(flat[:, 2]).reshape(F, n_players),
+        "team_id": _id_array(flat[:, 3]).reshape(F, n_players),
+        "ball_xyz": np.array(ball, dtype=np.float32).reshape(F, 3),
+        "game_clock": np.array(gc, dtype=float),
+        "shot_clock": np.array(sc, dtype=float),
+        "quarter": np.array(quarter, dtype=np.int16),
+        "frame_id": np.array(fid, dtype=np.int64),
+        "event_idx": np.array(ev_idx, dtype=np.int32),
+        "event_offsets": np.array(offsets, dtype=np.int64),
+    }
+
+
+def _side_ids(player_id, team_id, poss, side, n_slots):
+    """(F, n_slots) ids of one side's players per frame in column order, -1 padded."""
+    if side == "offense":
+        mine = team_id == poss[:, None]
+    elif side == "defense":
+        mine = (team_id != poss[:, None]) & (team_id >= 0)
+    else:
+        raise ValueError(f"side must be 'offense' or 'defense', got {side!r}")
+    mine &= (poss >= 0)[:, None] & (player_id >= 0)
+    cols = np.argsort(~mine, axis=1, kind="stable")[:, :n_slots]
+    ids = np.take_along_axis(player_id, cols, axis=1)
+    return np.where(np.take_along_axis(mine, cols, axis=1), ids, -1)
+
+
+def _assign_slots(present, starts):
+    """
+    Stable slot ids at each change point.
+
+    present : (K, n) ids on the court at each change point (-1 padded)
+    starts  : (K,) bool, True where a new event begins (slots reset)
+
+    Players keep their slot while on the court. A newcomer takes the first
+    slot whose player is absent, so a substitute inherits the slot of the
+    player they replaced and a player who briefly drops out gets its slot
+    back.
+    """
+    slots = np.full(present.shape, -1, dtype=np.int64)
+    cur = slots[0].copy()
+    for k in range(len(present)):
+        ids = present[k][present[k] >= 0]
+        if starts[k]:
+            cur[:] = -1
+            cur[:len(ids)] = ids
+        else:
+            on = np.isin(cur, ids)
+            free = np.flatnonzero(~on)
+            new = ids[~np.isin(ids, cur)]
+            cur[free[:len(new)]] = new
+        slots[k] = cur
+    return slots
+
+
+def game_slot_tensors(
+    tracking_events,
+    *,
+    arrays=None,
+    possession_team_id=None,
+    side="offense",
+    n_slots=5,
+    include_ball=False,
+):
+    """
+    Stable-slot player tensors for every event of a game in one call.
+
+    Each side player keeps one slot (column) for the whole event; on a
+    substitution the incoming player takes over the slot of the outgoing
+    one. Slots are resolved only at frames where the set of players
+    changes, and positions are then gathered for all frames with a single
+    id comparison against the 10 player columns.
+
+    Parameters
+    ----------
+    tracking_events : list of dict
+        Events with "frames" and "possession_team_id".
+    arrays : dict, optional
+        game_to_arrays(tracking_events), if already built.
+    possession_team_id : (F,) array, optional
+        Per-frame offense team (e.g. from frame_possession); defaults to
+        each event's possession_team_id.
+    side : {"offense", "defense"}
+
+    Returns
+    -------
+    dict
+        xy            : (F, n_slots [+1], 2) float32, NaN where the slot is empty;
+                        the ball is the last slot when include_ball
+        mask          : (F, n_slots [+1]) bool, True where xy is valid
+        slot_player_id: (F, n_slots) int64, -1 for an empty slot
+        event_offsets : (E + 1,) event k owns rows offsets[k]:offsets[k + 1]
+    """
+    if arrays is None:
+        arrays = game_to_arrays(tracking_events)
+    pid = arrays["player_id"]
+    ev = arrays["event_idx"]
+    F = len(pid)
+
+    if possession_team_id is None:
+        ev_poss = _id_array([e.get("possession_team_id") for e in tracking_events])
+        poss = ev_poss[ev] if F else np.empty(0, dtype=np.int64)
+    else:
+        poss = np.asarray(possession_team_id, dtype=np.int64)
+
+    present = _side_ids(pid, arrays["team_id"], poss, side, n_slots)
+
+    # change points: event starts and frames where the set of players differs
+    key = np.sort(present, axis=1)
+    start = np.ones(F, dtype=bool)
+    start[1:] = ev[1:] != ev[:-1]
+    change = start.copy()
+    change[1:] |= (key[1:] != key[:-1]).any(axis=1)
+    cp = np.flatnonzero(change)
+
+    slots_cp = _assign_slots(present[cp], start[cp]) if len(cp) else np.empty((0, n_slots), dtype=np.int64)
+    lengths = np.diff(np.append(cp, F))
+    slot_id = np.repeat(slots_cp, lengths, axis=0)
+
+    # one lookup: slot id vs the 10 player columns of the same frame
+    hit = (slot_id[:, :, None] == pid[:, None, :]) & (slot_id >= 0)[:, :, None]
+    col = hit.argmax(axis=2)
+    mask = hit.any(axis=2)
+    xy = np.take_along_axis(arrays["player_xy"], col[..., None], axis=1)
+    mask &= np.isfinite(xy).all(axis=2)
+    xy = np.where(mask[..., None], xy, np.nan).astype(np.float32)
+
+    if include_ball:
+        ball = arrays["ball_xyz"][:, None, :2]
+        xy = np.concatenate([xy, ball], axis=1)
+        mask = np.concatenate([mask, np.isfinite(ball).all(axis=2)], axis=1)
+
+    return {
+        "xy": xy,
+        "mask": mask,
+        "slot_player_id": slot_id,
+        "event_offsets": arrays["event_offsets"],
+    }
+
+
+def split_events(values, event_offsets):
+    """Per-event views of a frame-aligned array (no copies)."""
+    return [values[a:b] for a, b in zip(event_offsets[:-1], event_offsets[1:])]
@@ -0,0 +1,247 @@
+# ============================
+# src/utils/instrumentation.py
+# ============================
+"""
+Stage timers, counters and per-game memory for pipeline runs.
+
+Instrumentation is off by default and every entry point then returns
+immediately (one global lookup), so the hooks can stay in hot loops:
+
+    from src.utils import instrumentation as inst
+
+    metrics = inst.enable()
+    with inst.timer("align"):
+        ...
+    inst.count("shot_match", "dropped:no_valid_game_clock_frames")
+
+    @inst.timed("defense_features")
+    def f(...): ...
+
+    with inst.track_game(game_id):     # wall time + peak memory
+        ...
+    metrics.export("runs/metrics.json")  # or .csv
+"""
+import functools
+import json
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+
+METRIC_COLUMNS = ["kind", "name", "key", "value", "calls"]
+
+_ACTIVE = None
+
+
+def _rss_peak_mb():
+    """Process peak resident set size (MB) so far; NaN where unavailable."""
+    try:
+        import resource
+    except ImportError:                  # Windows
+        return float("nan")
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+class Metrics:
+    """
+    Registry of one run's measurements.
+
+    timers   : name -> [total seconds, calls]
+    counters : (name, key) -> n, e.g. ("shot_match", "matched"),
+               ("shot_match", "dropped:shooter_not_found") from the
+               defense features; ("frames", "parse"), ("shots", "xfg")
+               from PipelineRunner (stage.count units keyed by stage)
+    games    : one row per tracked game (seconds, peak memory MB)
+
+    trace_memory=True measures per-game peak Python/numpy allocations
+    with tracemalloc (exact but slows allocation-heavy code); otherwise
+    games report the process peak RSS, which only grows over a run.
+    """
+
+    def __init__(self, run_name=None, trace_memory=False):
+        self.run_name = run_name or time.strftime("%Y%m%d-%H%M%S")
+        self.trace_memory = trace_memory
+        self.timers = defaultdict(lambda: [0.0, 0])
+        self.counters = defaultdict(int)
+        self.games = []
+
+    # --- recording ---
+    def add_time(self, name, seconds, calls=1):
+        t = self.timers[name]
+        t[0] += seconds
+        t[1] += calls
+
+    def add_count(self, name, key="", n=1):
+        self.counters[(name, key)] += n
+
+    def merge(self, snapshot):
+        """Fold in another registry's snapshot() (e.g. from a worker process)."""
+        for name, (sec, calls) in snapshot["timers"].items():
+            self.add_time(name, sec, calls)
+        for name, key, n in snapshot["counters"]:
+            self.add_count(name, key, n)
+        self.games += snapshot["games"]
+
+    def snapshot(self):
+        """Picklable / JSON-able copy of the measurements."""
+        return {
+            "run": self.run_name,
+            "timers": {k: list(v) for k, v in self.timers.items()},
+            "counters": [[name, key, n] for (name, key), n in self.counters.items()],
+            "games": list(self.games),
+        }
+
+    # --- reporting ---
+    def throughput(self, counter, timer, key=None):
+        """
+        Units per second: a counter over a timer's total. key=None sums all
+        keys (e.g. every "shot_match" outcome); runner counters are keyed
+        by stage, so pass the stage, e.g. throughput("frames", "stage:parse", "parse").
+        """
+        n = sum(v for (name, k), v in self.counters.items()
+                if name == counter and (key is None or k == key))
+        sec = self.timers[timer][0] if timer in self.timers else 0.0
+        return n / sec if sec > 0 else float("nan")
+
+    def to_frame(self):
+        rows = [{"kind": "timer", "name": k, "key": "", "value": v[0], "calls": v[1]}
+                for k, v in self.timers.items()]
+        rows += [{"kind": "counter", "name": name, "key": key, "value": n, "calls": None}
+                 for (name, key), n in sorted(self.counters.items())]
+        for g in self.games:
+            rows.append({"kind": "game_seconds", "name": g["stage"], "key": str(g["game_id"]),
+                         "value": g["seconds"], "calls": None})
+            rows.append({"kind": "game_peak_mb", "name": g["stage"], "key": str(g["game_id"]),
+                         "value": g["peak_mb"], "calls": None})
+        return pd.DataFrame(rows, columns=METRIC_COLUMNS)
+
+    def export(self, path):
+        """Write the run's metrics as JSON (nested) or CSV (METRIC_COLUMNS rows)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.suffix == ".json":
+            path.write_text(json.dumps(self.snapshot(), indent=1, default=str))
+        elif path.suffix == ".csv":
+            self.to_frame().to_csv(path, index=False)
+        else:
+            raise ValueError(f"unsupported metrics format {path.suffix!r}; use .json or .csv")
+        return path
+
+
+# --- module-level switch ---
+def enable(run_name=None, trace_memory=False):
+    """Start recording into a fresh Metrics registry and return it."""
+    global _ACTIVE
+    _ACTIVE = Metrics(run_name, trace_memory)
+    return _ACTIVE
+
+
+def disable():
+    """Stop recording; returns the registry that was active (or None)."""
+    global _ACTIVE
+    m, _ACTIVE = _ACTIVE, None
+    if m is not None and m.trace_memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    return m
+
+
+def active():
+    return _ACTIVE
+
+
+@contextmanager
+def recording(trace_memory=False):
+    """
+    Record into a fresh registry for the duration of the block, then
+    restore whatever was active before (used per task in worker processes,
+    whose snapshot() is merged by the parent). tracemalloc started inside
+    the block (by track_game) is stopped on exit.
+    """
+    global _ACTIVE
+    was_tracing = tracemalloc.is_tracing()
+    prev, _ACTIVE = _ACTIVE, Metrics(trace_memory=trace_memory)
+    try:
+        yield _ACTIVE
+    finally:
+        _ACTIVE = prev
+        if not was_tracing and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+def count(name, key="", n=1):
+    if _ACTIVE is not None:
+        _ACTIVE.add_count(name, key, n)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ("metrics", "name", "t0")
+
+    def __init__(self, metrics, name):
+        self.metrics, self.name = metrics, name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.add_time(self.name, time.perf_counter() - self.t0)
+        return False
+
+
+def timer(name):
+    """Context manager adding the block's wall time to timer `name`."""
+    return _NULL_TIMER if _ACTIVE is None else _Timer(_ACTIVE, name)
+
+
+def timed(name=None):
+    """Decorator form of timer(); defaults to the function's qualified name."""
+    def wrap(fn):
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if _ACTIVE is None:
+                return fn(*args, **kwargs)
+            with _Timer(_ACTIVE, label):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+@contextmanager
+def track_game(game_id, stage=""):
+    """Record one game's wall time and peak memory (see Metrics)."""
+    m = _ACTIVE
+    if m is None:
+        yield
+        return
+    if m.trace_memory:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - t0
+        peak = tracemalloc.get_traced_memory()[1] / 1024 ** 2 if m.trace_memory else _rss_peak_mb()
+        m.add_time(stage or "game", seconds)
+        m.games.append({"stage": stage, "game_id": game_id, "seconds": seconds, "peak_mb": peak})
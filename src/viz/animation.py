@@ -0,0 +1,196 @@
+# ============================
+# src/viz/animation.py
+# ============================
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib import animation
+
+from src.viz.court import draw_full_court_ft
+
+DEFAULT_COLORS = ("tab:blue", "tab:red")
+BALL_COLOR = "orange"
+
+
+def play_from_arrays(arrays, event_k):
+    """
+    One event's frames from game_to_arrays output as a play dict for
+    animate_play / render_plays.
+    """
+    a, b = arrays["event_offsets"][event_k], arrays["event_offsets"][event_k + 1]
+    return {
+        "player_xy": arrays["player_xy"][a:b],
+        "ball_xyz": arrays["ball_xyz"][a:b],
+        "team_id": arrays["team_id"][a:b],
+        "game_clock": arrays["game_clock"][a:b],
+        "shot_clock": arrays["shot_clock"][a:b],
+        "quarter": int(arrays["quarter"][a]) if b > a else None,
+    }
+
+
+def _team_colors(team_id, team_colors):
+    # (T, N) team ids -> (T, N, 4) RGBA, home/away defaults by sorted id
+    from matplotlib.colors import to_rgba
+
+    team_id = np.asarray(team_id)
+    ids, inv = np.unique(team_id, return_inverse=True)
+    team_colors = team_colors or {}
+    lut, k = [], 0
+    for t in ids:
+        if t < 0:
+            lut.append(to_rgba("lightgray"))
+        else:
+            lut.append(to_rgba(team_colors.get(int(t), DEFAULT_COLORS[k % 2])))
+            k += 1
+    return np.array(lut)[inv.reshape(team_id.shape)]
+
+
+def _clock_text(play, t):
+    parts = []
+    if play.get("quarter") is not None:
+        parts.append(f"Q{play['quarter']}")
+    gc = play.get("game_clock")
+    if gc is not None and np.isfinite(gc[t]):
+        parts.append(f"{int(gc[t] // 60):02d}:{gc[t] % 60:04.1f}")
+    sc = play.get("shot_clock")
+    if sc is not None and np.isfinite(sc[t]):
+        parts.append(f"SC {sc[t]:.1f}")
+    return "  ".join(parts)
+
+
+def animate_play(play, *, fps=25, step=1, team_colors=None, fig=None, ax=None, trail=0):
+    """
+    Blitted animation of one play.
+
+    The court and all artists are created once: players are a single
+    scatter whose offsets (and colors, only if teams change) are updated
+    per frame, the ball is a second scatter and the clock a text artist.
+
+    Parameters
+    ----------
+    play : dict
+        player_xy (T, N, 2), optional ball_xyz (T, 3), team_id (T, N) or
+        (N,), game_clock / shot_clock (T,), quarter. See play_from_arrays.
+    step : int
+        Draw every step-th frame (the interval keeps real time).
+    trail : int
+        Number of past ball positions drawn as a trail (0 = none).
+
+    Returns
+    -------
+    (fig, matplotlib.animation.FuncAnimation)
+    """
+    xy = np.asarray(play["player_xy"], dtype=float)
+    T, N = xy.shape[:2]
+    team = play.get("team_id")
+    team = np.full((T, N), -1) if team is None else np.broadcast_to(np.asarray(team), (T, N))
+    colors = _team_colors(team, team_colors)
+    static_colors = bool((team == team[:1]).all())
+    ball = play.get("ball_xyz")
+
+    if ax is None:
+        fig, ax = plt.subplots(figsize=(12, 6.5))
+    fig = fig or ax.figure
+    draw_full_court_ft(ax)
+
+    players = ax.scatter(xy[0, :, 0], xy[0, :, 1], s=180, c=colors[0], edgecolors="black", zorder=3)
+    artists = [players]
+    ball_art = trail_art = None
+    if ball is not None:
+        ball = np.asarray(ball, dtype=float)
+        ball_art = ax.scatter(ball[:1, 0], ball[:1, 1], s=90, c=BALL_COLOR, edgecolors="black", zorder=4)
+        artists.append(ball_art)
+        if trail:
+            (trail_art,) = ax.plot([], [], color=BALL_COLOR, lw=1.5, alpha=0.6, zorder=2)
+            artists.append(trail_art)
+    clock = ax.text(0.01, 1.01, "", transform=ax.transAxes, fontsize=11, va="bottom")
+    artists.append(clock)
+
+    frames = np.arange(0, T, max(int(step), 1))
+
+    def init():
+        return artists
+
+    def update(t):
+        players.set_offsets(np.nan_to_num(xy[t], nan=-100.0))
+        if not static_colors:
+            players.set_facecolors(colors[t])
+        if ball_art is not None:
+            ball_art.set_offsets(np.nan_to_num(ball[t:t + 1, :2], nan=-100.0))
+            if trail_art is not None:
+                lo = max(0, t - trail * step)
+                trail_art.set_data(ball[lo:t + 1, 0], ball[lo:t + 1, 1])
+        clock.set_text(_clock_text(play, t))
+        return artists
+
+    anim = animation.FuncAnimation(
+        fig, update, frames=frames, init_func=init,
+        interval=1000.0 * step / fps, blit=True,
+    )
+    return fig, anim
+
+
+def save_animation(anim, path, *, fps=25, step=1, dpi=100):
+    """
+    Write an animation with a local writer: FFMpeg for .mp4 (must be on
+    PATH), Pillow for .gif.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    out_fps = max(fps / max(int(step), 1), 1)
+    suffix = path.suffix.lower()
+    if suffix == ".gif":
+        writer = animation.PillowWriter(fps=out_fps)
+    elif suffix == ".mp4":
+        if not animation.writers.is_available("ffmpeg"):
+            raise ValueError("ffmpeg is not available; export .gif instead or install ffmpeg")
+        writer = animation.FFMpegWriter(fps=out_fps, codec="libx264", extra_args=["-pix_fmt", "yuv420p"])
+    else:
+        raise ValueError(f"unsupported format {suffix!r}; use .mp4 or .gif")
+    anim.save(path, writer=writer, dpi=dpi)
+    return path
+
+
+def _render_one(args):
+    play, path, kwargs = args
+    import matplotlib
+    matplotlib.use("Agg")
+    fps, step, dpi = kwargs.get("fps", 25), kwargs.get("step", 1), kwargs.get("dpi", 100)
+    fig, anim = animate_play(play, fps=fps, step=step, team_colors=kwargs.get("team_colors"),
+                             trail=kwargs.get("trail", 0))
+    try:
+        return str(save_animation(anim, path, fps=fps, step=step, dpi=dpi))
+    finally:
+        plt.close(fig)
+
+
+def render_plays(plays, out_dir, *, names=None, fmt="mp4", workers=None, **kwargs):
+    """
+    Render many plays to video files in parallel worker processes
+    (headless Agg backend), e.g. for a scouting reel.
+
+    Parameters
+    ----------
+    plays : list of play dicts (see animate_play)
+    names : list of str, optional
+        File stems; defaults to play_0000, play_0001, ...
+    fmt : {"mp4", "gif"}
+    kwargs
+        fps, step, dpi, team_colors, trail.
+
+    Returns
+    -------
+    list of str, output paths in input order
+    """
+    out_dir = Path(out_dir)
+    names = names or [f"play_{i:04d}" for i in range(len(plays))]
+    jobs = [(p, out_dir / f"{n}.{fmt}", kwargs) for p, n in zip(plays, names)]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return [_render_one(j) for j in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_render_one, jobs))
@@ -184,6 +184,46 @@ def draw_half_court_ft(ax=None, color="black", lw=2, outer_lines=False, zorder=3
 
     return ax
 
+def draw_full_court_ft(ax=None, color="black", lw=1.5, zorder=1):
+    """
+    Draw a full court in SportVU FEET: x along the length (0-94),
+    y across (0-50), hoops at x = 5.25 and x = 88.75.
+    """
+    if ax is None:
+        ax = plt.gca()
+
+    patches = [
+        Rectangle((0, 0), 94, 50, linewidth=lw, color=color, fill=False),
+        Circle((47, 25), 6.0, linewidth=lw, color=color, fill=False),
+        Circle((47, 25), 2.0, linewidth=lw, color=color, fill=False),
+    ]
+    for hoop_x, side in ((5.25, 1.0), (88.75, -1.0)):
+        base_x = 0.0 if side > 0 else 94.0
+        lane_x = base_x if side > 0 else 94.0 - 19.0
+        patches += [
+            Circle((hoop_x, 25), 0.75, linewidth=lw, color=color, fill=False),
+            Rectangle((lane_x, 17), 19, 16, linewidth=lw, color=color, fill=False),
+            Arc((base_x + side * 19, 25), 12, 12, theta1=-90 if side > 0 else 90,
+                theta2=90 if side > 0 else 270, linewidth=lw, color=color),
+            Arc((hoop_x, 25), 47.5, 47.5,
+                theta1=-68 if side > 0 else 112, theta2=68 if side > 0 else 248,
+                linewidth=lw, color=color),
+        ]
+        ax.plot([base_x, base_x + side * 14], [3, 3], color=color, lw=lw, zorder=zorder)
+        ax.plot([base_x, base_x + side * 14], [47, 47], color=color, lw=lw, zorder=zorder)
+
+    for p in patches:
+        p.set_zorder(zorder)
+        ax.add_patch(p)
+    ax.plot([47, 47], [0, 50], color=color, lw=lw, zorder=zorder)
+
+    ax.set_xlim(-1, 95)
+    ax.set_ylim(-1, 51)
+    ax.set_aspect("equal")
+    ax.set_xticks([])
+    ax.set_yticks([])
+    return ax
+
 def plot_player_map_on_court(m, key="density", title=None, alpha=0.85,
                             baseline_y=-4.75, xlim=(-23.5, 23.5), ylim=(-5, 42)):
     """
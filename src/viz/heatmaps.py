@@ -1,8 +1,101 @@
+import hashlib
+import json
+from pathlib import Path
+
 import numpy as np
+import pandas as pd
 import matplotlib.pyplot as plt
 
 from .court import draw_half_court
 
+
+def _bin_edges(n_bins_x, n_bins_y, x_min, x_max, y_min, y_max):
+    return np.linspace(x_min, x_max, n_bins_x + 1), np.linspace(y_min, y_max, n_bins_y + 1)
+
+
+def binned_xfg_stats(
+    shots,
+    prob_cols=("xFG_calibrated",),
+    *,
+    by=None,
+    mask=None,
+    n_bins_x=20,
+    n_bins_y=20,
+    x_min=-300, x_max=300,
+    y_min=0, y_max=564
+):
+    """
+    Shot counts and mean of several probability columns per court bin,
+    for every group at once.
+
+    Each shot gets one flat code group * H * W + y_bin * W + x_bin, so all
+    groups, bins and columns are aggregated with a few bincount calls
+    instead of a groupby loop.
+
+    Parameters
+    ----------
+    prob_cols : str or list of str
+        Columns to average (e.g. ["xFG", "xFG_calibrated", "SHOT_MADE_FLAG"]).
+        NaNs are skipped in the mean but the shot still counts as an attempt.
+    by : str or list of str, optional
+        Grouping columns (e.g. "PLAYER_ID" or ["SEASON", "ZONE"]); one map
+        per group.
+    mask : boolean array-like, optional
+        Row filter applied before binning.
+
+    Returns
+    -------
+    dict
+        groups   : DataFrame of group keys (one row per map; empty columns
+                   when by is None)
+        attempts : (G, H, W) shot counts
+        mean     : {col: (G, H, W) mean, NaN for empty bins}
+        x_edges, y_edges
+    """
+    prob_cols = [prob_cols] if isinstance(prob_cols, str) else list(prob_cols)
+    by = [] if by is None else [by] if isinstance(by, str) else list(by)
+    missing = [c for c in prob_cols + by if c not in shots.columns]
+    if missing:
+        raise ValueError(f"Columns {missing} not found. Available: {list(shots.columns)}")
+
+    x_edges, y_edges = _bin_edges(n_bins_x, n_bins_y, x_min, x_max, y_min, y_max)
+    H, W = len(y_edges) - 1, len(x_edges) - 1
+
+    x = shots["LOC_X"].to_numpy(dtype=float)
+    y = shots["LOC_Y"].to_numpy(dtype=float)
+    keep = (x >= x_min) & (x <= x_max) & (y >= y_min) & (y <= y_max)
+    if mask is not None:
+        keep &= np.asarray(mask, dtype=bool)
+    rows = np.flatnonzero(keep)
+
+    xb = np.clip(np.digitize(x[rows], x_edges) - 1, 0, W - 1)
+    yb = np.clip(np.digitize(y[rows], y_edges) - 1, 0, H - 1)
+
+    if by:
+        codes, groups = pd.MultiIndex.from_frame(shots[by].iloc[rows]).factorize()
+        groups = pd.DataFrame(list(groups), columns=by)
+        G = len(groups)
+    else:
+        codes = np.zeros(len(rows), dtype=np.int64)
+        groups = pd.DataFrame(index=range(1))
+        G = 1
+
+    flat = (codes * H + yb) * W + xb
+    size = G * H * W
+    attempts = np.bincount(flat, minlength=size).astype(float).reshape(G, H, W)
+
+    mean = {}
+    for col in prob_cols:
+        v = shots[col].to_numpy(dtype=float)[rows]
+        ok = np.isfinite(v)
+        s = np.bincount(flat[ok], weights=v[ok], minlength=size)
+        n = np.bincount(flat[ok], minlength=size)
+        mean[col] = np.divide(s, n, out=np.full(size, np.nan), where=n > 0).reshape(G, H, W)
+
+    return {"groups": groups, "attempts": attempts, "mean": mean,
+            "x_edges": x_edges, "y_edges": y_edges}
+
+
 def build_xfg_heatmap(
     shots,
     prob_col="xFG_calibrated",   # or "xFG"
@@ -18,37 +111,46 @@ def build_xfg_heatmap(
       attempts: shot counts per bin
       x_edges, y_edges
     """
+    if prob_col not in shots.columns:
+        raise ValueError(f"Column '{prob_col}' not found. Available: {list(shots.columns)}")
 
-    s = shots.copy()
-    if prob_col not in s.columns:
-        raise ValueError(f"Column '{prob_col}' not found. Available: {list(s.columns)}")
+    stats = binned_xfg_stats(
+        shots, [prob_col], n_bins_x=n_bins_x, n_bins_y=n_bins_y,
+        x_min=x_min, x_max=x_max, y_min=y_min, y_max=y_max,
+    )
+    mat = stats["mean"][prob_col][0]
+    attempts = stats["attempts"][0]
 
-    # Grid edges
-    x_edges = np.linspace(x_min, x_max, n_bins_x + 1)
-    y_edges = np.linspace(y_min, y_max, n_bins_y + 1)
+    # Mask low-sample bins
+    mat[attempts < min_attempts] = np.nan
 
-    # Filter to half-court bounds
-    s = s[s["LOC_X"].between(x_min, x_max) & s["LOC_Y"].between(y_min, y_max)].copy()
+    return mat, attempts, stats["x_edges"], stats["y_edges"]
 
-    # Bin indices
-    s["x_bin"] = np.digitize(s["LOC_X"], x_edges) - 1
-    s["y_bin"] = np.digitize(s["LOC_Y"], y_edges) - 1
-    s["x_bin"] = s["x_bin"].clip(0, len(x_edges) - 2)
-    s["y_bin"] = s["y_bin"].clip(0, len(y_edges) - 2)
 
-    H, W = len(y_edges) - 1, len(x_edges) - 1
-    mat = np.full((H, W), np.nan, dtype=float)
-    attempts = np.zeros((H, W), dtype=float)
+def _draw_xfg_heatmap(ax, mat, x_edges, y_edges, draw_half_court_fn, title, vmin, vmax,
+                      label_fmt, fontsize, min_show_attempts, att):
+    pcm = ax.pcolormesh(x_edges, y_edges, mat, cmap="coolwarm", vmin=vmin, vmax=vmax, zorder=1)
+    plt.colorbar(pcm, ax=ax, label="xFG")
 
-    # Aggregate mean xFG per bin
-    for (yb, xb), g in s.groupby(["y_bin", "x_bin"]):
-        mat[yb, xb] = g[prob_col].astype(float).mean()
-        attempts[yb, xb] = len(g)
+    # Court on top
+    draw_half_court_fn(ax=ax, outer_lines=True, zorder=2)
 
-    # Mask low-sample bins
-    mat[attempts < min_attempts] = np.nan
+    # Text labels, only for shown cells
+    show = np.isfinite(mat)
+    if min_show_attempts is not None and att is not None:
+        show &= att >= min_show_attempts
+    cx = (x_edges[:-1] + x_edges[1:]) / 2
+    cy = (y_edges[:-1] + y_edges[1:]) / 2
+    for i, j in zip(*np.nonzero(show)):
+        ax.text(cx[j], cy[i], label_fmt.format(mat[i, j]), ha="center", va="center",
+                fontsize=fontsize, color="black", zorder=3)
+
+    ax.set_xlim(-300, 300)
+    ax.set_ylim(0, 564)
+    ax.set_aspect("equal")
+    ax.axis("off")
+    ax.set_title(title)
 
-    return mat, attempts, x_edges, y_edges
 
 def plot_xfg_heatmap_with_labels(
     mat,
@@ -64,49 +166,71 @@ def plot_xfg_heatmap_with_labels(
     att=None
 ):
     fig, ax = plt.subplots(figsize=(12, 11))
+    _draw_xfg_heatmap(ax, mat, x_edges, y_edges, draw_half_court_fn, title, vmin, vmax,
+                      label_fmt, fontsize, min_show_attempts, att)
+    plt.show()
 
-    # Heatmap
-    pcm = ax.pcolormesh(
-        x_edges,
-        y_edges,
-        mat,
-        cmap="coolwarm",
-        vmin=vmin,
-        vmax=vmax,
-        zorder=1
-    )
-    plt.colorbar(pcm, ax=ax, label="xFG")
 
-    # Court on top
-    draw_half_court_fn(ax=ax, outer_lines=True, zorder=2)
+def _heatmap_key(shots, prob_col, params):
+    cols = ["LOC_X", "LOC_Y", prob_col]
+    data = pd.util.hash_pandas_object(shots[cols], index=False).to_numpy()
+    h = hashlib.sha1(data.tobytes())
+    h.update(json.dumps({"prob_col": prob_col, **params}, sort_keys=True, default=str).encode())
+    return h.hexdigest()[:16]
 
-    # Add text labels
-    for i in range(mat.shape[0]):
-        for j in range(mat.shape[1]):
-            if np.isnan(mat[i, j]):
-                continue
-            if min_show_attempts is not None and att is not None:
-                if att[i, j] < min_show_attempts:
-                    continue
-
-            cx = (x_edges[j] + x_edges[j+1]) / 2
-            cy = (y_edges[i] + y_edges[i+1]) / 2
-
-            ax.text(
-                cx,
-                cy,
-                label_fmt.format(mat[i, j]),
-                ha="center",
-                va="center",
-                fontsize=fontsize,
-                color="black",
-                zorder=3
-            )
 
-    ax.set_xlim(-300, 300)
-    ax.set_ylim(0, 564)
-    ax.set_aspect("equal")
-    ax.axis("off")
-    ax.set_title(title)
-    plt.show()
+def render_xfg_heatmap(
+    shots,
+    prob_col="xFG_calibrated",
+    *,
+    cache_dir="data/processed/heatmaps",
+    n_bins_x=20,
+    n_bins_y=20,
+    min_attempts=20,
+    title="Expected FG% (xFG)",
+    vmin=0.2,
+    vmax=0.7,
+    label_fmt="{:.0%}",
+    fontsize=8,
+    dpi=100,
+):
+    """
+    Render an xFG heatmap to a PNG, served from cache when already drawn.
+
+    The cache key hashes the shot coordinates and prob_col values together
+    with every binning and style parameter, so any change in data or
+    parameters renders a new file and identical requests cost only a
+    hash. The binned matrices are cached next to the image.
+
+    Returns
+    -------
+    dict
+        png (Path), stats (Path to .npz with mat, attempts, x_edges,
+        y_edges), cached (bool, True when nothing was recomputed)
+    """
+    params = {
+        "n_bins_x": n_bins_x, "n_bins_y": n_bins_y, "min_attempts": min_attempts,
+        "title": title, "vmin": vmin, "vmax": vmax, "label_fmt": label_fmt,
+        "fontsize": fontsize, "dpi": dpi,
+    }
+    key = _heatmap_key(shots, prob_col, params)
+    cache_dir = Path(cache_dir)
+    png = cache_dir / f"xfg_{key}.png"
+    npz = cache_dir / f"xfg_{key}.npz"
+    if png.exists() and npz.exists():
+        return {"png": png, "stats": npz, "cached": True}
+
+    mat, att, x_edges, y_edges = build_xfg_heatmap(
+        shots, prob_col, n_bins_x=n_bins_x, n_bins_y=n_bins_y, min_attempts=min_attempts,
+    )
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    np.savez(npz, mat=mat, attempts=att, x_edges=x_edges, y_edges=y_edges)
 
+    fig, ax = plt.subplots(figsize=(12, 11))
+    try:
+        _draw_xfg_heatmap(ax, mat, x_edges, y_edges, draw_half_court, title, vmin, vmax,
+                          label_fmt, fontsize, None, None)
+        fig.savefig(png, dpi=dpi, bbox_inches="tight")
+    finally:
+        plt.close(fig)
+    return {"png": png, "stats": npz, "cached": False}
@@ -0,0 +1,204 @@
+# ============================
+# src/viz/reports.py
+# ============================
+import hashlib
+import html
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+
+from src.data_io.maps import export_maps_mmap, open_maps_mmap
+from src.viz.court import draw_half_court_ft
+
+MAP_KEYS = ("density", "quality", "impact")
+
+DEFAULT_STYLE = {
+    "alpha": 0.85,
+    "baseline_y": -4.75,
+    "xlim": (-23.5, 23.5),
+    "ylim": (-5, 42),
+    "figsize": (6, 5),
+    "dpi": 100,
+}
+
+# per-process state: the memory-mapped store and one reusable figure per map key
+_WORKER = {}
+
+
+def _init_worker(maps_dir, style):
+    maps, pid2row = open_maps_mmap(maps_dir)
+    _WORKER.clear()
+    _WORKER.update(maps=maps, pid2row=pid2row, style=style, figs={})
+
+
+def _court_figure(key):
+    """
+    Figure for one map key with the court drawn once. Later players only
+    swap the image data, color limits and title.
+    """
+    figs = _WORKER["figs"]
+    if key not in figs:
+        style, maps = _WORKER["style"], _WORKER["maps"]
+        xedges, yedges = np.asarray(maps["xedges"]), np.asarray(maps["yedges"])
+        # Agg-backed Figure, no pyplot: headless and safe inside notebooks too
+        fig = Figure(figsize=style["figsize"])
+        ax = fig.add_subplot()
+        img = ax.imshow(
+            np.zeros((len(yedges) - 1, len(xedges) - 1)),
+            origin="lower",
+            extent=[xedges[0], xedges[-1], yedges[0], yedges[-1]],
+            aspect="equal",
+            alpha=style["alpha"],
+            zorder=1,
+        )
+        draw_half_court_ft(ax=ax, lw=2, zorder=3, baseline_y=style["baseline_y"])
+        ax.set_xlim(*style["xlim"])
+        ax.set_ylim(*style["ylim"])
+        ax.set_xticks([])
+        ax.set_yticks([])
+        figs[key] = (fig, img, ax.set_title(""))
+    return figs[key]
+
+
+def _render_player(job):
+    pid, name, out_dir, keys = job
+    maps, i = _WORKER["maps"], _WORKER["pid2row"][pid]
+    dpi = _WORKER["style"]["dpi"]
+    paths = {}
+    for key in keys:
+        fig, img, title = _court_figure(key)
+        img.set_data(np.asarray(maps[key][i]).T)
+        img.autoscale()
+        title.set_text(f"{name} - {key}" if name else f"{pid} - {key}")
+        paths[key] = Path(out_dir) / f"{pid}_{key}.png"
+        fig.savefig(paths[key], dpi=dpi)
+    return pid
+
+
+def _player_digest(maps, i, keys, name, style):
+    h = hashlib.sha1()
+    for k in ("xedges", "yedges"):
+        h.update(np.ascontiguousarray(maps[k]).tobytes())
+    for k in keys:
+        h.update(np.ascontiguousarray(maps[k][i]).tobytes())
+    h.update(json.dumps({"keys": list(keys), "name": name, **style}, sort_keys=True, default=str).encode())
+    return h.hexdigest()[:16]
+
+
+def _write_index(out_dir, table, keys):
+    rows = []
+    for r in table.itertuples(index=False):
+        cells = "".join(f'<td><img src="{r.player_id}_{k}.png" width="300"></td>' for k in keys)
+        rows.append(f"<tr><td>{html.escape(str(r.name))}<br>{r.player_id}<br>"
+                    f"{r.attempt_count} FGA</td>{cells}</tr>")
+    head = "".join(f"<th>{k}</th>" for k in keys)
+    page = (
+        "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>Player maps</title></head>\n"
+        f"<body><table>\n<tr><th>player</th>{head}</tr>\n" + "\n".join(rows) + "\n</table></body></html>\n"
+    )
+    path = Path(out_dir) / "index.html"
+    path.write_text(page, encoding="utf-8")
+    return path
+
+
+def build_player_reports(
+    maps_path,
+    out_dir="reports/player_maps",
+    *,
+    keys=MAP_KEYS,
+    player_ids=None,
+    min_attempts=0,
+    meta=None,
+    workers=None,
+    force=False,
+    style=None,
+):
+    """
+    Render map figures for every eligible player and an index page.
+
+    The maps NPZ is unpacked once to .npy files (export_maps_mmap) and
+    memory-mapped by each worker process. A worker keeps one figure per
+    map key with the court already drawn and only swaps the image data, so
+    the court is not redrawn per player.
+
+    Incremental: out_dir/manifest.json stores a digest of each player's
+    maps, name and the style; players whose digest is unchanged and whose
+    images exist are skipped unless force=True.
+
+    Parameters
+    ----------
+    maps_path : str or Path
+        NPZ from save_maps_npz.
+    player_ids : iterable of int, optional
+        Restrict to these players (default: all in the store).
+    min_attempts : int
+        Skip players with fewer attempts (attempt_count).
+    meta : DataFrame, optional
+        PLAYER_ID / PLAYER_NAME for titles and the index.
+    style : dict, optional
+        Overrides for DEFAULT_STYLE.
+
+    Returns
+    -------
+    pd.DataFrame
+        player_id, name, attempt_count, status ("rendered" / "skipped"),
+        sorted by attempts; the index is written to out_dir/index.html.
+    """
+    keys = list(keys)
+    unknown = set(keys) - set(MAP_KEYS)
+    if unknown:
+        raise ValueError(f"unknown map keys: {sorted(unknown)}")
+    style = {**DEFAULT_STYLE, **(style or {})}
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    maps_dir = export_maps_mmap(maps_path, out_dir / "_maps")
+    maps, pid2row = open_maps_mmap(maps_dir)
+
+    names = {}
+    if meta is not None:
+        names = dict(zip(meta["PLAYER_ID"].astype(int), meta["PLAYER_NAME"].astype(str)))
+
+    pids = [int(p) for p in (player_ids if player_ids is not None else maps["player_ids"])]
+    missing = [p for p in pids if p not in pid2row]
+    if missing:
+        raise ValueError(f"players not in maps store: {missing[:10]}")
+    attempts = np.asarray(maps["attempt_count"])
+    pids = [p for p in pids if attempts[pid2row[p]] >= min_attempts]
+
+    manifest_path = out_dir / "manifest.json"
+    manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() and not force else {}
+
+    todo, rows = [], []
+    for p in pids:
+        name = names.get(p, "")
+        digest = _player_digest(maps, pid2row[p], keys, name, style)
+        done = manifest.get(str(p)) == digest and all((out_dir / f"{p}_{k}.png").exists() for k in keys)
+        if not done:
+            todo.append((p, name, str(out_dir), keys))
+        manifest[str(p)] = digest
+        rows.append({"player_id": p, "name": name or str(p), "attempt_count": int(attempts[pid2row[p]]),
+                     "status": "skipped" if done else "rendered"})
+
+    workers = workers or os.cpu_count() or 1
+    if todo:
+        if workers == 1 or len(todo) == 1:
+            _init_worker(maps_dir, style)
+            for job in todo:
+                _render_player(job)
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(maps_dir, style)) as pool:
+                chunk = max(1, len(todo) // (4 * workers))
+                list(pool.map(_render_player, todo, chunksize=chunk))
+
+    manifest_path.write_text(json.dumps(manifest, indent=1))
+    table = pd.DataFrame(rows, columns=["player_id", "name", "attempt_count", "status"])
+    table = table.sort_values("attempt_count", ascending=False, kind="stable").reset_index(drop=True)
+    _write_index(out_dir, table, keys)
+    return table